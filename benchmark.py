@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de performance du pipeline Gatekeeper
+
+Usage :
+    python benchmark.py anomalies --lignes 300000
+    python benchmark.py normalisation --textes 200000
+    python benchmark.py lectures --lignes 50000
+    python benchmark.py excel --lignes 100000
+    python benchmark.py fusion --lignes 1000000
+    python benchmark.py deduplication --lignes 2000000
+    python benchmark.py dates --lignes 1000000
+    python benchmark.py rapport --lignes 200000
+
+Les listes blanches sont écrites dans un dossier temporaire afin de ne pas
+polluer les données persistantes du poste.
+"""
+
+import os
+import re
+import tempfile
+import zipfile
+import time
+import random
+from datetime import datetime, timedelta
+
+# Isoler les données persistantes AVANT l'import des modules du projet
+os.environ['APPDATA'] = tempfile.mkdtemp(prefix="gatekeeper_bench_")
+
+import numpy as np
+import pandas as pd
+import typer
+from unidecode import unidecode
+
+from resource_path import get_persistent_data_path
+from mapping.whitelist_writer import whitelist_writer
+from mapping.whitelist_repository import invalidate_all
+from core.text_utils import (
+    is_similar, is_semantic_change, similarity_cache, text_normalizer,
+    ABBREVIATIONS, STOP_WORDS
+)
+from core import anomalies
+from core.match_utils import associer_rh_aux_utilisateurs
+from core.ext_utils import deduplicate_extraction, robust_datetime_parse
+from core.date_parsing import parse_dates, formater_rapport
+from core.report import inject_to_template, normalize, FIELD_TO_HEADER
+from core.export import exporter_csv
+from openpyxl import load_workbook
+from resource_path import resource_path
+from core.excel_reader import lire_excel, _lire_openpyxl, COLONNES_EXTRACTION
+from mapping.column_mapping import auto_rename_columns
+from mapping import profils_valides, directions_conservees
+from mapping.profils_valides import (
+    charger_profils_valides, est_changement_profil_valide, ajouter_profil_valide
+)
+from mapping.directions_conservees import (
+    charger_directions_conservees, est_direction_conservee, ajouter_direction_valide
+)
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """Benchmarks de performance Gatekeeper"""
+
+PROFILS = [
+    'Développeur', 'Developpeur', 'Dev', 'Chef de projet', 'Chef projet',
+    'Administrateur système', 'Admin système', 'Analyste', 'Analyste fonctionnel',
+    'Ingénieur', 'Ingenieur', 'Technicien', 'Technicien support', 'Manager',
+    'Assistant', 'Assistante', 'Comptable', 'Chef comptable', 'Commercial',
+    'Architecte SI', 'Responsable RH', 'Assistant RH'
+]
+
+DIRECTIONS = [
+    'DSI', 'D.S.I.', 'Direction des Systèmes d\'Information', 'Direction Marketing',
+    'Marketing', 'Direction RH', 'Ressources Humaines', 'Direction Financière',
+    'Finance', 'Direction Commerciale', 'Direction Technique', 'Direction Générale',
+    'Service Informatique', 'Service IT', 'Service Comptabilité', 'Service Client'
+]
+
+
+def generer_df_fusionne(nb_lignes, graine=42):
+    """Générer un DataFrame fusionné (extraction + RH) synthétique"""
+    rng = random.Random(graine)
+    extraction_date = datetime(2025, 6, 1)
+    lignes = []
+    for i in range(nb_lignes):
+        non_rh = rng.random() < 0.05
+        profil = rng.choice(PROFILS)
+        direction = rng.choice(DIRECTIONS)
+        profil_rh = profil if rng.random() < 0.7 else rng.choice(PROFILS)
+        direction_rh = direction if rng.random() < 0.8 else rng.choice(DIRECTIONS)
+        lignes.append({
+            'code_utilisateur': f"U{i:07d}",
+            'nom_prenom': f"utilisateur {i}",
+            'profil': profil.lower(),
+            'direction': direction.lower(),
+            'last_login': extraction_date - timedelta(days=rng.randint(1, 200)),
+            'extraction_date': extraction_date,
+            'profil_rh': None if non_rh else profil_rh,
+            'direction_rh': None if non_rh else direction_rh,
+            'nom_prenom_rh': None if non_rh else f"utilisateur {i}",
+        })
+    df = pd.DataFrame(lignes)
+    df['compte_non_rh'] = df['profil_rh'].isnull()
+    return df
+
+
+def detecter_anomalies_reference(df, certificateur):
+    """Implémentation ligne à ligne historique (référence de comparaison)"""
+    profils_valides = charger_profils_valides()
+    directions_conservees = charger_directions_conservees()
+    df['days_inactive'] = (df['extraction_date'] - df['last_login']).dt.days
+
+    anomalies_, decisions, cas_auto = [], [], []
+    for i, row in df.iterrows():
+        tags = []
+        decision = ""
+        is_auto = False
+        compte_non_rh = row.get('compte_non_rh', False)
+        profil, profil_rh = row.get('profil', ""), row.get('profil_rh', "")
+        direction, direction_rh = row.get('direction', ""), row.get('direction_rh', "")
+        inactif = (row.get('days_inactive') is not None) and (row['days_inactive'] > anomalies.SEUIL_INACTIVITE)
+        if inactif:
+            tags.append("Compte potentiellement inactif")
+        if compte_non_rh:
+            tags.append("Compte non RH")
+        if inactif or compte_non_rh:
+            decision, is_auto = "Désactiver", True
+        elif not is_similar(direction, direction_rh):
+            if est_direction_conservee(row, directions_conservees):
+                decision, is_auto = "Conserver", True
+            elif is_semantic_change(direction, direction_rh):
+                tags.append("Changement de direction à vérifier")
+            else:
+                decision, is_auto = "Conserver", True
+                tags.append("Direction harmonisée")
+                ajouter_direction_valide(row, certificateur)
+        elif not is_similar(profil, profil_rh):
+            if est_changement_profil_valide(row, profils_valides):
+                decision, is_auto = "Conserver", True
+            elif is_semantic_change(profil, profil_rh):
+                tags.append("Changement de profil à vérifier")
+            else:
+                decision, is_auto = "Conserver", True
+                tags.append("Profil harmonisé")
+                ajouter_profil_valide(row, certificateur)
+        anomalies_.append(", ".join(tags))
+        decisions.append(decision)
+        cas_auto.append(is_auto)
+
+    df['anomalie'] = anomalies_
+    df['cas_automatique'] = cas_auto
+    if 'decision_manuelle' not in df.columns:
+        df['decision_manuelle'] = ""
+    for i, (d, auto) in enumerate(zip(decisions, cas_auto)):
+        if d and auto:
+            df.at[df.index[i], 'decision_manuelle'] = d
+    return df
+
+
+def generer_ext_rh(nb_lignes, graine=42):
+    """Générer une extraction préparée et un référentiel RH synthétiques"""
+    rng = np.random.default_rng(graine)
+    codes = np.array([f"U{i:07d}" for i in range(nb_lignes)], dtype=object)
+    noms = np.array([f"utilisateur {i}" for i in range(nb_lignes)], dtype=object)
+    # ~10 % de noms absents dans l'extraction (vides ou 'nan' après normalisation)
+    noms_ext = np.where(rng.random(nb_lignes) < 0.1, rng.choice(['', 'nan'], nb_lignes), noms)
+    ext = pd.DataFrame({
+        'code_utilisateur': codes,
+        'nom_prenom': noms_ext,
+        'profil': rng.choice(PROFILS, nb_lignes),
+        'direction': rng.choice(DIRECTIONS, nb_lignes),
+        'last_login': datetime(2025, 6, 1) - pd.to_timedelta(rng.integers(1, 200, nb_lignes), unit='D'),
+    })
+    # ~5 % de comptes absents du RH, ordre différent de l'extraction
+    presents = rng.permutation(np.flatnonzero(rng.random(nb_lignes) >= 0.05))
+    rh = pd.DataFrame({
+        'code_utilisateur': codes[presents],
+        'nom_prenom': noms[presents],
+        'profil': rng.choice(PROFILS, len(presents)),
+        'direction': rng.choice(DIRECTIONS, len(presents)),
+    })
+    return ext, rh
+
+
+def associer_rh_reference(ext_df, rh_df):
+    """Association historique (merge + apply ligne à ligne, référence de comparaison)"""
+    merged = ext_df.merge(
+        rh_df.rename(columns={
+            'profil': 'profil_rh',
+            'direction': 'direction_rh',
+            'nom_prenom': 'nom_prenom_rh'
+        }),
+        how='left',
+        on='code_utilisateur'
+    )
+    merged['compte_non_rh'] = merged['profil_rh'].isnull()
+    merged['nom_prenom'] = merged.apply(
+        lambda row: row['nom_prenom_rh'] if (pd.isna(row['nom_prenom']) or row['nom_prenom'] in ['', 'nan']) else row['nom_prenom'],
+        axis=1
+    )
+    return merged
+
+
+def generer_extraction_doublons(nb_lignes, graine=42):
+    """Générer une extraction brute où chaque utilisateur apparaît ~2 fois"""
+    rng = np.random.default_rng(graine)
+    # Dates toutes distinctes : pas d'égalité à départager
+    secondes = rng.permutation(nb_lignes)
+    return pd.DataFrame({
+        'code_utilisateur': np.array([f"U{i:07d}" for i in rng.integers(0, nb_lignes // 2, nb_lignes)], dtype=object),
+        'last_login': (pd.Timestamp(2025, 6, 1) - pd.to_timedelta(secondes, unit='s')).strftime('%Y-%m-%d %H:%M:%S'),
+        'profil': rng.choice(PROFILS, nb_lignes),
+        'direction': rng.choice(DIRECTIONS, nb_lignes),
+    })
+
+
+def deduplicate_extraction_reference(df):
+    """Déduplication historique (tri complet + groupby.first)"""
+    return (
+        df.sort_values('last_login', ascending=False)
+        .groupby('code_utilisateur', as_index=False)
+        .first()
+    )
+
+
+def generer_dates(nb_lignes, graine=42):
+    """Générer une colonne de dates jour en premier, avec des valeurs vides et invalides"""
+    rng = np.random.default_rng(graine)
+    secondes = rng.integers(0, 3 * 365 * 86400, nb_lignes)
+    dates = (pd.Timestamp(2023, 1, 13) + pd.to_timedelta(secondes, unit='s')).strftime('%d/%m/%Y %H:%M')
+    valeurs = np.array(dates, dtype=object)
+    valeurs[0] = '13/01/2023 08:00'
+    valeurs[rng.integers(1, nb_lignes, nb_lignes // 100)] = None
+    valeurs[rng.integers(1, nb_lignes, nb_lignes // 1000)] = 'inconnue'
+    return pd.Series(valeurs)
+
+
+def robust_datetime_parse_reference(series):
+    """Analyse historique (format libre, puis nouvelle analyse jour en premier)"""
+    parsed = pd.to_datetime(series, errors='coerce')
+    if parsed.isna().any():
+        parsed = pd.to_datetime(series, errors='coerce', dayfirst=True)
+    return parsed
+
+
+def generer_rapport_final(nb_lignes, graine=42):
+    """Générer un DataFrame prêt pour l'injection dans le template"""
+    df = generer_df_fusionne(nb_lignes, graine)
+    rng = np.random.default_rng(graine)
+    df['recommendation'] = "A certifier"
+    df['certificateur'] = "bench"
+    df['decision'] = rng.choice(['À conserver', 'A desactiver', 'À modifier'], nb_lignes)
+    df['comment_certificateur'] = rng.choice(['', 'Changement de poste', 'Départ'], nb_lignes)
+    df['anomalie'] = rng.choice(['', 'Profil', 'Direction', 'Non RH'], nb_lignes)
+    return df
+
+
+def inject_to_template_reference(report_df, template_path, output_path):
+    """Injection historique, cellule par cellule"""
+    wb = load_workbook(template_path)
+    ws = wb.active
+    header_map = {normalize(cell.value): cell.column for cell in ws[1] if cell.value}
+    for i, row in enumerate(report_df.itertuples(index=False), start=2):
+        for field, val in zip(report_df.columns, row):
+            if field == 'profil':
+                val = getattr(row, 'profil_rh', val) or val
+            elif field == 'direction':
+                val = getattr(row, 'direction_rh', val) or val
+            template_header = FIELD_TO_HEADER.get(field)
+            if not template_header:
+                continue
+            col = header_map.get(normalize(template_header))
+            if col:
+                ws.cell(row=i, column=col, value=val)
+    wb.save(output_path)
+
+
+def normalize_text_reference(text, remove_stop_words=True):
+    """Normalisation historique à base de re.sub (référence de comparaison)"""
+    if pd.isnull(text):
+        return ""
+    text = unidecode(str(text))
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    for abbr, full in ABBREVIATIONS.items():
+        text = re.sub(r'\b' + abbr + r'\b', full, text)
+    if remove_stop_words:
+        text = " ".join(w for w in text.split() if w not in STOP_WORDS)
+    return text
+
+
+def generer_textes(nb_textes, graine=42):
+    """Générer des libellés bruités (accents, ponctuation, abréviations)"""
+    rng = random.Random(graine)
+    fragments = PROFILS + DIRECTIONS + [
+        'Resp.', 'dir', 'Adj', 'ASST', 'admin', 'Dev', 'ing', 'tech', 'Compta',
+        'RH', 'S.I.', 'IT', 'de', 'la', 'des', 'à', 'Œuvre', 'Straße', '#42', '  ', '-'
+    ]
+    return [" ".join(rng.choices(fragments, k=rng.randint(1, 5))) for _ in range(nb_textes)]
+
+
+def generer_extraction_excel(path, nb_lignes, colonnes_inutiles=20, graine=42):
+    """Écrire une extraction Excel synthétique avec des colonnes non utilisées"""
+    from openpyxl import Workbook
+    rng = random.Random(graine)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    inutiles = [f"Champ libre {i}" for i in range(colonnes_inutiles)]
+    ws.append(['Identifiant', 'Nom et Prénoms', 'Profil utilisateur', 'Direction',
+               'DATE DE DERNIERE CONNEXION', 'DATE_EXTRACTION', 'ACTIF'] + inutiles)
+    extraction_date = datetime(2025, 6, 1)
+    for i in range(nb_lignes):
+        ws.append([
+            f"U{i:07d}", f"utilisateur {i}", rng.choice(PROFILS), rng.choice(DIRECTIONS),
+            (extraction_date - timedelta(days=rng.randint(1, 200))).strftime('%Y-%m-%d'),
+            extraction_date.strftime('%Y-%m-%d'), 0
+        ] + [rng.random() for _ in inutiles])
+    wb.save(path)
+
+
+def reinitialiser_listes_blanches():
+    """Supprimer les listes blanches écrites par un précédent passage"""
+    whitelist_writer.discard()
+    invalidate_all()
+    dossier = get_persistent_data_path()
+    for nom in os.listdir(dossier):
+        if nom.endswith(('.csv', '.csv.enc')):
+            os.remove(os.path.join(dossier, nom))
+
+
+def chronometrer(fonction, *args, **kwargs):
+    """Exécuter une fonction et retourner (résultat, durée en secondes)"""
+    debut = time.perf_counter()
+    resultat = fonction(*args, **kwargs)
+    return resultat, time.perf_counter() - debut
+
+
+def afficher_resultat(nom, duree_ref, duree_new):
+    gain = duree_ref / duree_new if duree_new > 0 else float('inf')
+    print(f"📊 {nom}")
+    print(f"   - Référence : {duree_ref:8.3f} s")
+    print(f"   - Optimisé  : {duree_new:8.3f} s")
+    print(f"   - Gain      : x{gain:.1f}")
+
+
+@app.command("anomalies")
+def bench_anomalies(lignes: int = typer.Option(50000, help="Nombre de comptes simulés")):
+    """Comparer detecter_anomalies à l'implémentation ligne à ligne"""
+    base = generer_df_fusionne(lignes)
+    reinitialiser_listes_blanches()
+    ref, duree_ref = chronometrer(detecter_anomalies_reference, base.copy(), "bench")
+    reinitialiser_listes_blanches()
+    similarity_cache.clear()
+    new, duree_new = chronometrer(anomalies.detecter_anomalies, base.copy(), "bench")
+
+    colonnes = ['anomalie', 'cas_automatique', 'decision_manuelle']
+    pd.testing.assert_frame_equal(ref[colonnes], new[colonnes])
+    print(f"✅ Résultats identiques sur {lignes} comptes")
+    afficher_resultat("detecter_anomalies", duree_ref, duree_new)
+    print(f"   - Cache similarité : {similarity_cache.stats()}")
+
+
+@app.command("normalisation")
+def bench_normalisation(textes: int = typer.Option(200000, help="Nombre de textes à normaliser")):
+    """Comparer le normaliseur précompilé à la normalisation à base de re.sub"""
+    echantillon = generer_textes(textes)
+    ref, duree_ref = chronometrer(lambda: [normalize_text_reference(t) for t in echantillon])
+    text_normalizer.clear()
+    new, duree_froid = chronometrer(text_normalizer.normalize_many, echantillon)
+    _, duree_chaud = chronometrer(text_normalizer.normalize_many, echantillon)
+
+    assert ref == new, "Résultats de normalisation différents"
+    print(f"✅ Résultats identiques sur {textes} textes")
+    afficher_resultat("normalize_text (à froid)", duree_ref, duree_froid)
+    afficher_resultat("normalize_text (mémoïsé)", duree_ref, duree_chaud)
+
+
+@app.command("lectures")
+def bench_lectures(lignes: int = typer.Option(50000, help="Nombre de comptes simulés"),
+                   passages: int = typer.Option(3, help="Nombre de détections par cycle")):
+    """
+    Vérifier que chaque fichier de liste blanche est lu au plus une fois par cycle de chargement
+
+    Un cycle va d'une invalidation des dépôts à la suivante ; le second cycle
+    relit les fichiers écrits pendant le premier. Code de sortie 1 si un
+    fichier est lu plus d'une fois dans un cycle.
+    """
+    reinitialiser_listes_blanches()
+    depots = {
+        'profils': profils_valides._depot_profils,
+        'directions': directions_conservees._depot_directions
+    }
+    erreurs = []
+    for cycle in (1, 2):
+        if cycle > 1:
+            invalidate_all()
+        debut = {nom: dict(depot.reads_by_path) for nom, depot in depots.items()}
+        for passage in range(1, passages + 1):
+            anomalies.detecter_anomalies(generer_df_fusionne(lignes, graine=passage), "bench")
+            lectures = {
+                f"{nom}/{os.path.basename(path)}": n - debut[nom].get(path, 0)
+                for nom, depot in depots.items() for path, n in depot.reads_by_path.items()
+            }
+            print(f"📊 Cycle {cycle}, détection n°{passage} : lectures cumulées {lectures}")
+        erreurs += [f"cycle {cycle} : {fichier} lu {n} fois" for fichier, n in lectures.items() if n > 1]
+
+    if erreurs:
+        print("❌ Listes blanches relues pendant un cycle de chargement :")
+        for erreur in erreurs:
+            print(f"   - {erreur}")
+        raise typer.Exit(code=1)
+    print("✅ Chaque liste blanche lue au plus une fois par cycle de chargement")
+
+
+@app.command("excel")
+def bench_excel(lignes: int = typer.Option(100000, help="Nombre de lignes du fichier")):
+    """Comparer pd.read_excel à la lecture en flux avec projection des colonnes"""
+    path = os.path.join(get_persistent_data_path(), "bench_extraction.xlsx")
+    generer_extraction_excel(path, lignes)
+
+    ref, duree_ref = chronometrer(lambda: auto_rename_columns(pd.read_excel(path)))
+    new, duree_new = chronometrer(lambda: auto_rename_columns(_lire_openpyxl(path, COLONNES_EXTRACTION)))
+
+    pd.testing.assert_frame_equal(ref[list(new.columns)], new)
+    print(f"✅ Colonnes utiles identiques ({len(new.columns)}/{len(ref.columns)}) sur {lignes} lignes")
+    afficher_resultat("lecture de l'extraction (openpyxl en flux)", duree_ref, duree_new)
+    if lire_excel is not _lire_openpyxl:
+        _, duree_auto = chronometrer(lambda: lire_excel(path, COLONNES_EXTRACTION))
+        print(f"   - lire_excel (moteur automatique) : {duree_auto:8.3f} s")
+
+
+@app.command("fusion")
+def bench_fusion(lignes: int = typer.Option(1000000, help="Nombre de comptes de l'extraction")):
+    """Comparer associer_rh_aux_utilisateurs au merge + apply historique"""
+    ext, rh = generer_ext_rh(lignes)
+    ref, duree_ref = chronometrer(associer_rh_reference, ext, rh)
+    new, duree_new = chronometrer(associer_rh_aux_utilisateurs, ext, rh)
+
+    pd.testing.assert_frame_equal(ref, new[list(ref.columns)])
+    print(f"✅ Résultats identiques sur {lignes} comptes ({int(new['compte_non_rh'].sum())} non RH)")
+    afficher_resultat("associer_rh_aux_utilisateurs", duree_ref, duree_new)
+
+
+@app.command("deduplication")
+def bench_deduplication(lignes: int = typer.Option(2000000, help="Nombre de lignes de l'extraction")):
+    """Comparer deduplicate_extraction au tri complet + groupby.first"""
+    brut = generer_extraction_doublons(lignes)
+    # Dates déjà analysées, comme dans _preparer_ext
+    brut['last_login'] = robust_datetime_parse(brut['last_login'])
+    ref, duree_ref = chronometrer(deduplicate_extraction_reference, brut)
+    new, duree_new = chronometrer(deduplicate_extraction, brut)
+
+    # Même ligne retenue par utilisateur, utilisateurs dans le même ordre (triés par code)
+    pd.testing.assert_frame_equal(ref, new[list(ref.columns)], check_dtype=False)
+    print(f"✅ Lignes retenues identiques pour {len(new)} utilisateurs "
+          f"({int(new['doublon_incoherent'].sum())} doublons incohérents)")
+    afficher_resultat("deduplicate_extraction", duree_ref, duree_new)
+
+
+@app.command("dates")
+def bench_dates(lignes: int = typer.Option(1000000, help="Nombre de dates à analyser")):
+    """Comparer l'analyse à format déduit à l'analyse libre en deux passes"""
+    brut = generer_dates(lignes)
+    ref, duree_ref = chronometrer(robust_datetime_parse_reference, brut)
+    (new, rapport), duree_new = chronometrer(parse_dates, brut)
+
+    pd.testing.assert_series_equal(ref, new, check_dtype=False)
+    print(f"✅ Dates identiques sur {lignes} valeurs")
+    print(f"   {formater_rapport('last_login', rapport)}")
+    afficher_resultat("analyse des dates", duree_ref, duree_new)
+
+
+@app.command("rapport")
+def bench_rapport(lignes: int = typer.Option(200000, help="Nombre de lignes du rapport")):
+    """Comparer l'injection en flux dans le template à l'écriture cellule par cellule"""
+    df = generer_rapport_final(lignes)
+    template = resource_path(os.path.join('data', 'template.xlsx'))
+    dossier = get_persistent_data_path()
+    ref_path = os.path.join(dossier, "bench_rapport_ref.xlsx")
+    new_path = os.path.join(dossier, "bench_rapport.xlsx")
+    _, duree_ref = chronometrer(inject_to_template_reference, df, template, ref_path)
+    _, duree_new = chronometrer(inject_to_template, df, template, new_path)
+
+    # Feuille identique à l'octet près (seule la date de modification du classeur diffère)
+    with zipfile.ZipFile(ref_path) as ref, zipfile.ZipFile(new_path) as new:
+        differences = [nom for nom in ref.namelist()
+                       if nom != 'docProps/core.xml' and ref.read(nom) != new.read(nom)]
+    assert not differences, f"Parties différentes : {differences}"
+    print(f"✅ Classeurs identiques sur {lignes} lignes")
+    afficher_resultat("inject_to_template", duree_ref, duree_new)
+
+    csv_path = os.path.join(dossier, "bench_rapport.csv")
+    _, duree_csv = chronometrer(exporter_csv, df, csv_path)
+    print(f"   - Export CSV : {duree_csv:8.3f} s ({os.path.getsize(csv_path) / 1e6:.1f} Mo, "
+          f"classeur : {os.path.getsize(new_path) / 1e6:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    app()
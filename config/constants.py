@@ -80,6 +80,24 @@ CONFIG_PARAMS = {
         'inactivity_days': 120
     },
 
+    # Rapprochement approché des comptes dont le code diffère du RH
+    'identity_matching': {
+        # Activer le second passage après la jointure exacte sur le code
+        'enabled': True,
+
+        # Confiance minimale (0-100) pour rapprocher un compte d'une ligne RH
+        'confidence_threshold': 90,
+
+        # Score minimal entre deux noms renseignés (0-100)
+        'name_threshold': 85,
+
+        # Taille au-delà de laquelle un bloc (mot, n-gramme) est ignoré
+        'max_block_size': 1000,
+
+        # Nombre maximal de candidats RH comparés par compte
+        'max_candidates': 50
+    },
+
     # Règles de décision automatique
     'auto_decisions': {
         # Décision pour les comptes inactifs
@@ -99,7 +117,9 @@ CONFIG_PARAMS = {
             'non_rh': "Compte non RH",
             'profile_change': "Changement de profil à vérifier",
             'direction_change': "Changement de direction à vérifier",
-            'inactive': "Compte potentiellement inactif"
+            'inactive': "Compte potentiellement inactif",
+            'duplicate_conflict': "Doublons incohérents (profil/direction)",
+            'uncertain_identity': "Rapprochement RH approché à vérifier"
         },
 
         # Labels de décision pour le rapport
@@ -132,7 +152,10 @@ CONFIG_PARAMS = {
         'max_preview_rows': 100,
 
         # Afficher les cas automatiques dans un onglet séparé
-        'separate_auto_cases': True
+        'separate_auto_cases': True,
+
+        # Délai (ms) après la dernière frappe avant de filtrer les tableaux
+        'search_debounce_ms': 150
     },
 
     # Logging et audit
@@ -145,13 +168,53 @@ CONFIG_PARAMS = {
 
         # Sauvegarder un log des décisions
         'save_decision_log': True,
-        'log_file': "decisions.log"
+        'log_file': "decisions.log",
+
+        # Nombre de décisions journalisées entre deux synchronisations sur disque (fsync)
+        'decision_log_fsync_batch': 10
+    },
+
+    # Performance
+    'performance': {
+        # Nombre maximal de paires de libellés gardées en cache (LRU)
+        'similarity_cache_size': 50000,
+
+        # Nombre maximal de textes bruts mémorisés par le normaliseur
+        'normalize_cache_size': 200000,
+
+        # Délai (secondes) avant l'écriture différée des ajouts aux listes blanches
+        'whitelist_flush_delay_s': 30,
+
+        # Cache chiffré des fichiers importés (extraction / RH) déjà préparés
+        'input_cache_enabled': True,
+
+        # Nombre maximal de fichiers gardés dans le cache d'import
+        'input_cache_max_entries': 32,
+
+        # Nombre maximal de processus pour lire les fichiers RH en parallèle (0 = séquentiel)
+        'rh_max_workers': 4,
+
+        # Nombre maximal de formats d'en-têtes mémorisés par le renommage des colonnes
+        'column_mapping_cache_max_entries': 200,
+
+        # Nombre de lignes écrites par bloc lors de la génération des rapports
+        'report_chunk_size': 10000,
+
+        # Nombre d'éléments traités entre deux signalements de progression (et points d'annulation)
+        'progress_chunk_size': 1000,
+
+        # Nombre de décisions entre deux sauvegardes automatiques de la session en cours
+        'session_autosave_batch': 10
     },
 
     # Export
     'export': {
         # Formats disponibles pour l'export
-        'formats': ["xlsx", "csv"],
+        'formats': ["xlsx", "csv", "parquet"],
+
+        # Séparateur et encodage des exports CSV (lisibles directement par Excel)
+        'csv_separator': ';',
+        'csv_encoding': 'utf-8-sig',
 
         # Inclure un résumé dans le rapport
         'include_summary': True,
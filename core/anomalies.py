@@ -1,24 +1,29 @@
 import pandas as pd
 import numpy as np
-from core.text_utils import (
-    is_similar, is_semantic_change, extract_key_concepts,
-    normalize_text, SIMILARITY_THRESHOLD
-)
+from core.text_utils import is_similar_many, is_semantic_change
 import re
 from unidecode import unidecode
 from mapping.profils_valides import (
-    charger_profils_valides, est_changement_profil_valide,
+    charger_index_profils, est_changement_profil_valide,
     ajouter_profil_valide, classifier_changement_profil
 )
 from mapping.directions_conservees import (
-    charger_directions_conservees, est_direction_conservee,
+    charger_index_directions, est_direction_conservee,
     ajouter_direction_valide, classifier_changement_direction
 )
+from mapping.whitelist_writer import whitelist_writer
 from config.constants import CONFIG_PARAMS
+from core.progress import PROGRESS_CHUNK_SIZE
 
 # Seuil d'inactivité depuis la configuration
 SEUIL_INACTIVITE = CONFIG_PARAMS['thresholds']['inactivity_days']
 
+# Utilisateur présent plusieurs fois dans l'extraction avec des valeurs divergentes
+TAG_DOUBLON_INCOHERENT = CONFIG_PARAMS['messages']['anomalies']['duplicate_conflict']
+
+# Compte rapproché de sa ligne RH par le second passage (rapprochement_approche)
+TAG_IDENTITE_INCERTAINE = CONFIG_PARAMS['messages']['anomalies']['uncertain_identity']
+
 # Mots à ignorer lors de la normalisation
 STOP_WORDS = {
     'de', 'le', 'la', 'les', 'du', 'des', 'un', 'une', 'et', 'ou', 'a', 'au', 'aux',
@@ -79,88 +84,194 @@ def normalize_for_comparison(text):
     return " ".join(filtered_words)
 
 
-def detecter_anomalies(df, certificateur):
-    profils_valides = charger_profils_valides()
-    directions_conservees = charger_directions_conservees()
+def _colonne(df, col, defaut=""):
+    """Récupérer une colonne ou une série constante si elle est absente"""
+    if col in df.columns:
+        return df[col]
+    return pd.Series(defaut, index=df.index, dtype=object)
+
+
+def _decisions_par_paire(df, positions, col, col_rh, est_conserve, ajouter, tag_a_verifier, tag_harmonise, certificateur,
+                         progress_callback=None):
+    """
+    Décider une seule fois par paire distincte (extraction, RH) puis diffuser
+
+    Args:
+        df: DataFrame fusionné
+        positions: Positions (entiers) des lignes à examiner
+        col, col_rh: Colonnes extraction et RH à comparer
+        est_conserve: Fonction de vérification dans la liste blanche
+        ajouter: Fonction d'ajout d'une variation harmonisée
+        tag_a_verifier: Tag posé sur un changement sémantique
+        tag_harmonise: Tag posé sur une variation d'écriture
+        certificateur: Nom du certificateur
+        progress_callback: Fonction appelée avec le nombre de lignes décidées,
+            toutes les PROGRESS_CHUNK_SIZE paires examinées
+
+    Returns:
+        tuple: (similaire, decision, tag) tableaux alignés sur positions
+    """
+    if len(positions) == 0:
+        vide = np.empty(0, dtype=object)
+        return np.empty(0, dtype=bool), vide, vide
+
+    sous_df = df.iloc[positions]
+    valeurs = _colonne(sous_df, col)
+    valeurs_rh = _colonne(sous_df, col_rh)
+    codes = pd.DataFrame({'a': valeurs.values, 'b': valeurs_rh.values}).groupby(
+        ['a', 'b'], dropna=False, sort=False
+    ).ngroup().to_numpy()
+
+    # Les groupes sont numérotés dans l'ordre de première apparition :
+    # on conserve donc l'ordre des ajouts du parcours ligne à ligne
+    _, premieres = np.unique(codes, return_index=True)
+    nb_paires = len(premieres)
+    decision = np.full(nb_paires, "", dtype=object)
+    tag = np.full(nb_paires, "", dtype=object)
+
+    # Scoring de toutes les paires distinctes en un seul appel natif
+    paires_a = valeurs.iloc[premieres].tolist()
+    paires_b = valeurs_rh.iloc[premieres].tolist()
+    similaire = is_similar_many(paires_a, paires_b)
+
+    # Lignes décidées : paires similaires, puis paires examinées une à une
+    lignes_par_paire = np.bincount(codes, minlength=nb_paires)
+    decidees = int(lignes_par_paire[similaire].sum())
+    if progress_callback is not None:
+        progress_callback(decidees)
+
+    for k, code in enumerate(np.flatnonzero(~similaire), start=1):
+        a, b = paires_a[code], paires_b[code]
+        pos = premieres[code]
+        row = df.iloc[positions[pos]]
+        if est_conserve(row):
+            decision[code] = "Conserver"
+        elif is_semantic_change(a, b):
+            tag[code] = tag_a_verifier
+        else:
+            # Variation d'écriture - Auto-conserver
+            decision[code] = "Conserver"
+            tag[code] = tag_harmonise
+            ajouter(row, certificateur)
+        decidees += int(lignes_par_paire[code])
+        if progress_callback is not None and k % PROGRESS_CHUNK_SIZE == 0:
+            progress_callback(decidees)
+
+    return similaire[codes], decision[codes], tag[codes]
+
+
+def _suivi_phase(progress_callback, debut, etendue, taille, total):
+    """Convertir les lignes décidées d'une phase (sur taille) en lignes traitées (sur total)"""
+    if progress_callback is None:
+        return None
+    return lambda decidees: progress_callback(debut + etendue * decidees // max(taille, 1), total)
+
+
+def detecter_anomalies(df, certificateur, progress_callback=None):
+    """
+    Détecter les anomalies de manière vectorisée
+
+    Les masques inactivité / non RH sont calculés colonne par colonne et les
+    comparaisons de libellés ne sont faites qu'une fois par paire distincte
+    (extraction, RH), puis diffusées à toutes les lignes concernées. Les
+    comptes rapprochés de leur ligne RH par le second passage (colonne
+    rapprochement_approche, quel que soit leur score) ne sont jamais décidés sur la base de cette ligne : hors logique
+    prioritaire, ils sont laissés à la vérification manuelle.
+    progress_callback reçoit (lignes traitées, total) : lignes prioritaires,
+    puis comparaison des directions et des profils (une moitié chacune).
+    """
+    # Index des listes blanches construits une fois, recherche O(1) par paire
+    profils_valides = charger_index_profils()
+    directions_conservees = charger_index_directions()
     df['days_inactive'] = (df['extraction_date'] - df['last_login']).dt.days
 
-    anomalies = []
-    decisions = []
-    cas_auto = []
-
-    for i, row in df.iterrows():
-        tags = []
-        decision = ""
-        is_auto = False
-
-        compte_non_rh = row.get('compte_non_rh', False)
-        profil, profil_rh = row.get('profil', ""), row.get('profil_rh', "")
-        direction, direction_rh = row.get('direction', ""), row.get('direction_rh', "")
-        inactif = (row.get('days_inactive') is not None) and (row['days_inactive'] > SEUIL_INACTIVITE)
-
-        # --- AJOUT DES TAGS (toujours additif) ---
-        if inactif:
-            tags.append("Compte potentiellement inactif")
-        if compte_non_rh:
-            tags.append("Compte non RH")
-
-        # --- DÉTERMINATION DE LA DÉCISION ET is_auto (logique prioritaire) ---
-        if inactif:
-            decision = "Désactiver"
-            is_auto = True
-        elif compte_non_rh:
-            decision = "Désactiver"
-            is_auto = True
-        elif not is_similar(direction, direction_rh):
-            if est_direction_conservee(row, directions_conservees):
-                decision = "Conserver"
-                is_auto = True
-            elif is_semantic_change(direction, direction_rh):
-                tags.append("Changement de direction à vérifier")  # Tag ici car pas de décision auto
-            else:
-                # Variation d'écriture - Auto-conserver
-                decision = "Conserver"
-                is_auto = True
-                tags.append("Direction harmonisée")  # Tag ici car décision auto
-                ajouter_direction_valide(row, certificateur)
-        elif not is_similar(profil, profil_rh):
-            if est_changement_profil_valide(row, profils_valides):
-                decision = "Conserver"
-                is_auto = True
-            elif is_semantic_change(profil, profil_rh):
-                tags.append("Changement de profil à vérifier")  # Tag ici car pas de décision auto
-            else:
-                # Variation d'écriture - Auto-conserver
-                decision = "Conserver"
-                is_auto = True
-                tags.append("Profil harmonisé")  # Tag ici car décision auto
-                ajouter_profil_valide(row, certificateur)
-
-        anomalies.append(", ".join(tags))
-        decisions.append(decision)
-        cas_auto.append(is_auto)
-
-    df['anomalie'] = anomalies
-    df['cas_automatique'] = cas_auto
+    n = len(df)
+    inactif = (df['days_inactive'] > SEUIL_INACTIVITE).to_numpy(dtype=bool)
+    compte_non_rh = _colonne(df, 'compte_non_rh', False).astype(bool).to_numpy()
+    incertain = _colonne(df, 'rapprochement_approche', False).astype(bool).to_numpy()
+
+    decisions = np.full(n, "", dtype=object)
+    tags = np.full(n, "", dtype=object)
+    cas_auto = np.zeros(n, dtype=bool)
+
+    # --- Inactivité et comptes non RH (logique prioritaire) ---
+    prioritaire = inactif | compte_non_rh
+    decisions[prioritaire] = "Désactiver"
+    cas_auto[prioritaire] = True
+    tags[inactif & compte_non_rh] = "Compte potentiellement inactif, Compte non RH"
+    tags[inactif & ~compte_non_rh] = "Compte potentiellement inactif"
+    tags[~inactif & compte_non_rh] = "Compte non RH"
+
+    # --- Directions (lignes RH certaines uniquement) ---
+    positions = np.flatnonzero(~prioritaire & ~incertain)
+    moitie = len(positions) // 2
+    similaire, decision, tag = _decisions_par_paire(
+        df, positions, 'direction', 'direction_rh',
+        lambda row: est_direction_conservee(row, directions_conservees),
+        ajouter_direction_valide,
+        "Changement de direction à vérifier", "Direction harmonisée",
+        certificateur,
+        _suivi_phase(progress_callback, n - len(positions), moitie, len(positions), n)
+    )
+    decisions[positions] = decision
+    tags[positions] = tag
+    cas_auto[positions] = decision != ""
+
+    # --- Profils (uniquement si la direction est similaire) ---
+    etendue = len(positions) - moitie
+    positions = positions[similaire]
+    _, decision, tag = _decisions_par_paire(
+        df, positions, 'profil', 'profil_rh',
+        lambda row: est_changement_profil_valide(row, profils_valides),
+        ajouter_profil_valide,
+        "Changement de profil à vérifier", "Profil harmonisé",
+        certificateur,
+        _suivi_phase(progress_callback, n - etendue, etendue, len(positions), n)
+    )
+    decisions[positions] = decision
+    tags[positions] = tag
+    cas_auto[positions] = decision != ""
+
+    # --- Doublons incohérents (signalés lors de la déduplication) ---
+    doublon = _colonne(df, 'doublon_incoherent', False).astype(bool).to_numpy()
+    if doublon.any():
+        tags[doublon] = [f"{t}, {TAG_DOUBLON_INCOHERENT}" if t else TAG_DOUBLON_INCOHERENT for t in tags[doublon]]
+
+    # --- Rapprochements RH approchés (second passage de l'association RH) ---
+    if incertain.any():
+        tags[incertain] = [f"{t}, {TAG_IDENTITE_INCERTAINE}" if t else TAG_IDENTITE_INCERTAINE for t in tags[incertain]]
+
+    df['anomalie'] = tags.tolist()
+    df['cas_automatique'] = cas_auto.tolist()
 
     if 'decision_manuelle' not in df.columns:
         df['decision_manuelle'] = ""
 
-    for i, (d, auto) in enumerate(zip(decisions, cas_auto)):
-        if d and auto:
-            df.at[df.index[i], 'decision_manuelle'] = d
+    a_appliquer = (decisions != "") & cas_auto
+    if a_appliquer.any():
+        df.loc[df.index[a_appliquer], 'decision_manuelle'] = decisions[a_appliquer]
+
+    # Écrire en une fois les variations harmonisées pendant la détection
+    whitelist_writer.flush()
 
+    if progress_callback is not None:
+        progress_callback(n, n)
     return df
 
 
-def extraire_cas_a_verifier(df):
-    """Extraire uniquement les cas nécessitant une vérification manuelle"""
+def masque_cas_a_verifier(df):
+    """Masque des cas nécessitant une vérification manuelle"""
     # Cas à vérifier = anomalie présente ET pas de décision ET pas automatique
-    return df[
+    return (
         (df['anomalie'].str.len() > 0) &
         (df['decision_manuelle'] == "") &
         (~df.get('cas_automatique', False))
-        ]
+    )
+
+
+def extraire_cas_a_verifier(df):
+    """Extraire uniquement les cas nécessitant une vérification manuelle"""
+    return df[masque_cas_a_verifier(df)]
 
 
 def extraire_cas_automatiques(df):
@@ -0,0 +1,157 @@
+"""
+Analyse des colonnes de dates (dernière connexion, date d'extraction)
+
+Le format d'une colonne est déduit d'un échantillon de ses valeurs, puis la
+colonne entière est analysée avec ce format explicite (chemin rapide). Seules
+les valeurs qui ne le respectent pas essaient les autres formats reconnus,
+puis une analyse libre valeur par valeur. Un rapport indique combien de
+valeurs chaque format a reconnues.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Formats reconnus, dans l'ordre de préférence en cas d'égalité sur
+# l'échantillon (mois en premier avant jour en premier, comme pd.to_datetime)
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y/%m/%d',
+    '%Y%m%d',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+]
+
+# Nombre de valeurs distinctes examinées pour déduire le format
+TAILLE_ECHANTILLON = 500
+
+# Libellés du rapport pour les valeurs hors formats reconnus
+RAPPORT_NATIF = 'valeur date native'
+RAPPORT_LIBRE = 'format libre'
+RAPPORT_INVALIDE = 'invalide'
+RAPPORT_VIDE = 'vide'
+
+# Type produit par pd.to_datetime pour du texte (unité selon la version de pandas)
+DATETIME_DTYPE = pd.to_datetime(pd.Series(['2000-01-01'])).dtype
+
+
+def _echantillon(textes, taille=TAILLE_ECHANTILLON):
+    """Valeurs distinctes réparties sur toute la colonne"""
+    distincts = pd.unique(textes)
+    if len(distincts) <= taille:
+        return distincts
+    return distincts[np.linspace(0, len(distincts) - 1, taille).astype(int)]
+
+
+def inferer_formats(textes, formats=DATE_FORMATS):
+    """
+    Classer les formats selon le nombre de valeurs de l'échantillon reconnues
+
+    Args:
+        textes: Valeurs texte (non vides) de la colonne
+        formats: Formats candidats
+
+    Returns:
+        list: Formats reconnaissant au moins une valeur, du meilleur au moins bon
+    """
+    echantillon = pd.Series(_echantillon(textes), dtype=object)
+    scores = []
+    for rang, fmt in enumerate(formats):
+        reconnus = pd.to_datetime(echantillon, format=fmt, errors='coerce').notna().sum()
+        if reconnus:
+            scores.append((-reconnus, rang, fmt))
+    return [fmt for _, _, fmt in sorted(scores)]
+
+
+def _analyse_libre(valeur):
+    """Analyse d'une valeur isolée : format libre, puis jour en premier"""
+    for dayfirst in (False, True):
+        try:
+            horodatage = pd.to_datetime(valeur, dayfirst=dayfirst)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if pd.isna(horodatage):
+            continue
+        if horodatage.tzinfo is not None:
+            horodatage = horodatage.tz_convert(None)
+        return horodatage
+    return pd.NaT
+
+
+def parse_dates(series, formats=DATE_FORMATS):
+    """
+    Convertir une colonne en dates en déduisant son format
+
+    Args:
+        series: Colonne brute (texte, dates natives ou mélange)
+        formats: Formats candidats
+
+    Returns:
+        tuple: (Series de dates, rapport {format: nombre de valeurs reconnues})
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, {RAPPORT_NATIF: int(series.notna().sum()), RAPPORT_VIDE: int(series.isna().sum())}
+
+    valeurs = series.to_numpy(dtype=object)
+    resultat = np.full(len(valeurs), np.datetime64('NaT'), dtype=DATETIME_DTYPE)
+    rapport = {}
+
+    est_texte = np.fromiter((isinstance(v, str) for v in valeurs), dtype=bool, count=len(valeurs))
+    textes = pd.Series(valeurs[est_texte], dtype=object).str.strip()
+    vides = (textes == '').to_numpy()
+    positions_textes = np.flatnonzero(est_texte)
+
+    # Valeurs non textuelles (dates Excel natives, vides) : conversion directe
+    autres = np.flatnonzero(~est_texte)
+    if len(autres):
+        natives = pd.to_datetime(pd.Series(valeurs[autres], dtype=object), errors='coerce')
+        resultat[autres] = natives.to_numpy().astype(DATETIME_DTYPE)
+        if natives.notna().any():
+            rapport[RAPPORT_NATIF] = int(natives.notna().sum())
+        nb_vides = int(natives.isna().sum())
+    else:
+        nb_vides = 0
+    nb_vides += int(vides.sum())
+
+    # Textes : format déduit de l'échantillon (chemin rapide) puis formats suivants
+    restants = np.flatnonzero(~vides)
+    if len(restants):
+        for fmt in inferer_formats(textes.to_numpy()[restants], formats):
+            analyses = pd.to_datetime(textes.iloc[restants], format=fmt, errors='coerce')
+            reconnus = analyses.notna().to_numpy()
+            if reconnus.any():
+                resultat[positions_textes[restants[reconnus]]] = analyses.to_numpy()[reconnus].astype(DATETIME_DTYPE)
+                rapport[fmt] = int(reconnus.sum())
+                restants = restants[~reconnus]
+            if not len(restants):
+                break
+
+    # Dernier recours, valeur par valeur
+    nb_libres = 0
+    for position in restants:
+        horodatage = _analyse_libre(textes.iat[position])
+        if horodatage is not pd.NaT:
+            resultat[positions_textes[position]] = np.datetime64(horodatage.to_datetime64(), 'ns').astype(DATETIME_DTYPE)
+            nb_libres += 1
+    if nb_libres:
+        rapport[RAPPORT_LIBRE] = nb_libres
+    if len(restants) - nb_libres:
+        rapport[RAPPORT_INVALIDE] = len(restants) - nb_libres
+    if nb_vides:
+        rapport[RAPPORT_VIDE] = nb_vides
+
+    return pd.Series(resultat, index=series.index, name=series.name), rapport
+
+
+def formater_rapport(colonne, rapport):
+    """Résumé lisible d'un rapport de formats de dates"""
+    details = ", ".join(f"{fmt}: {nombre}" for fmt, nombre in rapport.items())
+    return f"📅 {colonne} — {details}"
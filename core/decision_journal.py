@@ -0,0 +1,232 @@
+"""
+Journal des décisions de validation manuelle
+
+Chaque décision est ajoutée en fin de fichier, sans jamais réécrire les
+précédentes : un enregistrement est la longueur (4 octets, big-endian) suivie
+du jeton chiffré (EncryptionManager) de l'entrée JSON
+{code, decision, commentaire, certificateur, date}. Les écritures sont
+synchronisées sur disque (fsync) par lots et à la fermeture du journal.
+
+Le journal d'une session se trouve à côté de son instantané
+(core.session_store) : à la réouverture, il est rejoué sur l'extraction pour
+reconstruire les colonnes de décision. Il n'est compacté (dernière décision
+par utilisateur) qu'à la demande, après archivage du journal complet, pour
+ne rien perdre de l'historique d'audit. Un enregistrement incomplet en fin
+de fichier (arrêt pendant une écriture) est ignoré et tronqué à l'ouverture.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import struct
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config.constants import CONFIG_PARAMS
+from core.session_store import get_sessions_dir
+from security.encryption import encryption_manager
+
+SAVE_DECISION_LOG = CONFIG_PARAMS['logging']['save_decision_log']
+DECISION_LOG_FILE = CONFIG_PARAMS['logging']['log_file']
+FSYNC_BATCH = CONFIG_PARAMS['logging']['decision_log_fsync_batch']
+
+# Préfixe de longueur de chaque enregistrement
+_ENTETE = struct.Struct('>I')
+
+
+def get_journal_path(session_id):
+    """Chemin du journal des décisions d'une session"""
+    return os.path.join(get_sessions_dir(), f"{session_id}.{DECISION_LOG_FILE}")
+
+
+def _parcourir(data):
+    """
+    Découper le contenu d'un journal en jetons chiffrés
+
+    Returns:
+        tuple: (jetons, taille des enregistrements complets)
+    """
+    jetons = []
+    offset = 0
+    while offset + _ENTETE.size <= len(data):
+        (taille,) = _ENTETE.unpack_from(data, offset)
+        fin = offset + _ENTETE.size + taille
+        if fin > len(data):
+            break
+        jetons.append(data[offset + _ENTETE.size:fin])
+        offset = fin
+    return jetons, offset
+
+
+def _enregistrement(entree):
+    """Enregistrement (longueur et jeton chiffré) d'une entrée du journal"""
+    jeton = encryption_manager.encrypt_bytes(json.dumps(entree, ensure_ascii=False).encode('utf-8'))
+    return _ENTETE.pack(len(jeton)) + jeton
+
+
+class DecisionJournal:
+    """Journal en ajout seul des décisions de la session en cours"""
+
+    def __init__(self, fsync_batch=FSYNC_BATCH):
+        self.fsync_batch = max(1, fsync_batch)
+        self.path = None
+        self._file = None
+        self._non_synchronises = 0
+
+    def ouvrir(self, session_id):
+        """
+        Ouvrir (ou créer) le journal d'une session pour y ajouter des décisions
+
+        Le journal précédent est fermé. Sans effet si le journal des
+        décisions est désactivé dans la configuration.
+        """
+        self.fermer()
+        if not SAVE_DECISION_LOG or not session_id:
+            return
+        self.path = get_journal_path(session_id)
+
+        # Écarter un enregistrement incomplet laissé par un arrêt brutal
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            _, taille = _parcourir(data)
+            if taille < len(data):
+                os.truncate(self.path, taille)
+        self._file = open(self.path, 'ab')
+
+    def enregistrer(self, code, decision, commentaire, certificateur):
+        """
+        Ajouter une décision au journal
+
+        Args:
+            code: Code de l'utilisateur décidé (clé de la ligne)
+            decision: Décision prise
+            commentaire: Commentaire du certificateur ("" si aucun)
+            certificateur: Nom du certificateur
+        """
+        if self._file is None:
+            return
+        self._file.write(_enregistrement({
+            'code': str(code),
+            'decision': decision,
+            'commentaire': commentaire,
+            'certificateur': certificateur,
+            'date': datetime.now().isoformat(timespec='seconds'),
+        }))
+        self._file.flush()
+        self._non_synchronises += 1
+        if self._non_synchronises >= self.fsync_batch:
+            self.synchroniser()
+
+    def synchroniser(self):
+        """Forcer l'écriture sur disque des décisions ajoutées"""
+        if self._file is None or not self._non_synchronises:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._non_synchronises = 0
+
+    def fermer(self):
+        """Synchroniser et fermer le journal ouvert"""
+        if self._file is None:
+            return
+        self.synchroniser()
+        self._file.close()
+        self._file = None
+        self.path = None
+
+    def lire(self):
+        """
+        Relire les entrées du journal ouvert, dans l'ordre d'écriture
+
+        Returns:
+            list: Entrées (dictionnaires)
+
+        Raises:
+            ValueError: Entrée illisible (clé différente, journal altéré)
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return []
+        self.synchroniser()
+        with open(self.path, 'rb') as f:
+            jetons, _ = _parcourir(f.read())
+        return [json.loads(encryption_manager.decrypt_bytes(jeton).decode('utf-8')) for jeton in jetons]
+
+    def rejouer(self, df):
+        """
+        Appliquer les décisions du journal aux colonnes de décision de df
+
+        Les entrées sont appliquées dans l'ordre : la dernière décision d'un
+        utilisateur l'emporte ; un commentaire vide ne remplace pas le
+        précédent (comme lors de la saisie).
+
+        Returns:
+            int: Nombre d'entrées appliquées
+        """
+        entrees = self.lire()
+        if not entrees or 'code_utilisateur' not in df.columns:
+            return 0
+
+        # Dernière entrée par utilisateur, commentaire non vide le plus récent
+        decisions, commentaires = {}, {}
+        for entree in entrees:
+            decisions[entree['code']] = entree['decision']
+            if entree['commentaire']:
+                commentaires[entree['code']] = entree['commentaire']
+
+        codes = pd.Index(df['code_utilisateur'].astype(str))
+        for colonne, valeurs in (('decision_manuelle', decisions), ('comment_certificateur', commentaires)):
+            if not valeurs:
+                continue
+            positions = codes.get_indexer(list(valeurs))
+            trouves = positions >= 0
+            # Même affectation que la saisie (colonne créée au premier commentaire)
+            df.loc[df.index[positions[trouves]], colonne] = np.array(list(valeurs.values()), dtype=object)[trouves]
+        return len(entrees)
+
+    def compacter(self):
+        """
+        Réécrire le journal ouvert avec la dernière décision de chaque utilisateur
+
+        Le commentaire le plus récent non vide est conservé. Le journal
+        complet est d'abord copié dans une archive (<journal>.<date>.archive,
+        supprimée avec la session), puis le journal compacté, écrit dans un
+        fichier temporaire, le remplace atomiquement : à tout instant, le
+        journal existe (complet ou compacté) et se rejoue à l'identique.
+
+        Returns:
+            str: Chemin de l'archive, None si le journal était déjà compact
+        """
+        entrees = self.lire()
+        dernieres = {}
+        for entree in entrees:
+            precedente = dernieres.pop(entree['code'], None)
+            if precedente and not entree['commentaire']:
+                entree = {**entree, 'commentaire': precedente['commentaire']}
+            dernieres[entree['code']] = entree
+        if len(dernieres) == len(entrees):
+            return None
+
+        path = self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        archive_path = f"{path}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.archive"
+        # lire() a synchronisé le journal : la copie contient toutes les décisions
+        shutil.copy2(path, archive_path)
+        with open(archive_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(_enregistrement(entree) for entree in dernieres.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, path)
+        self._file = open(path, 'ab')
+        return archive_path
+
+
+# Instance globale (journal de la session en cours)
+decision_journal = DecisionJournal()
+
+# Décisions en attente de synchronisation écrites à l'arrêt du processus
+atexit.register(decision_journal.fermer)
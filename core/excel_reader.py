@@ -0,0 +1,131 @@
+"""
+Lecture en flux des fichiers Excel (extraction et RH)
+
+Au lieu de matérialiser toutes les cellules avec pd.read_excel, les lignes
+sont lues en flux (openpyxl read_only) et seules les colonnes que
+auto_rename_columns associe à un nom canonique utile sont conservées.
+Si python-calamine est installé, le moteur calamine de pandas est utilisé.
+"""
+
+import importlib.util
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+from mapping.column_mapping import auto_rename_columns
+from config.constants import COLUMN_ALIASES
+from core.progress import PROGRESS_CHUNK_SIZE, verifier_annulation
+
+CALAMINE_DISPONIBLE = importlib.util.find_spec("python_calamine") is not None
+
+
+def _convertir_valeur(value):
+    """Convertir une valeur de cellule comme le lecteur openpyxl de pandas"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        entier = int(value)
+        if entier == value:
+            return entier
+        return float(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        # Cellule en erreur (#N/A, #REF!...)
+        return np.nan
+    return value
+
+
+def colonnes_projetees(entetes, colonnes_cibles, col_aliases=None):
+    """
+    Déterminer les colonnes à lire
+
+    Args:
+        entetes: En-têtes du fichier (après déduplication pandas)
+        colonnes_cibles: Noms (après renommage) des colonnes utiles
+        col_aliases: Alias de colonnes (défaut : COLUMN_ALIASES)
+
+    Returns:
+        list: Positions des colonnes dont le nom renommé est utile
+    """
+    renommees = auto_rename_columns(pd.DataFrame(columns=entetes), col_aliases).columns
+    return [i for i, nom in enumerate(renommees) if nom in colonnes_cibles]
+
+
+def _lire_openpyxl(path, colonnes_cibles, token=None):
+    """Lire en flux avec openpyxl en ne convertissant que les colonnes utiles"""
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        # values_only : pas d'objet cellule créé pour chaque case
+        lignes = ws.iter_rows(values_only=True)
+
+        premiere = next(lignes, None)
+        if premiere is None:
+            return pd.DataFrame()
+        entete = [_convertir_valeur(v) for v in premiere]
+        while entete and entete[-1] == "":
+            entete.pop()
+        # Noms de colonnes dédupliqués exactement comme pd.read_excel
+        entetes = list(TextParser([entete], header=0).read().columns)
+        if colonnes_cibles is None:
+            positions = list(range(len(entetes)))
+        else:
+            positions = colonnes_projetees(entetes, colonnes_cibles)
+
+        donnees = []
+        for numero, row in enumerate(lignes, start=1):
+            if numero % PROGRESS_CHUNK_SIZE == 0:
+                verifier_annulation(token)
+            # Ligne entièrement vide : ignorée comme par pd.read_excel
+            if all(v is None or v == "" for v in row):
+                continue
+            largeur = len(row)
+            donnees.append([_convertir_valeur(row[i]) if i < largeur else "" for i in positions])
+    finally:
+        wb.close()
+
+    noms = [entetes[i] for i in positions]
+    if not donnees:
+        return pd.DataFrame(columns=noms)
+    # Inférence des types sur la colonne entière (identique à pd.read_excel)
+    return TextParser(donnees, header=None, names=noms).read()
+
+
+def _lire_calamine(path, colonnes_cibles):
+    """Lire avec le moteur calamine (plus rapide) en projetant les colonnes"""
+    if colonnes_cibles is None:
+        return pd.read_excel(path, engine="calamine")
+    entetes = list(pd.read_excel(path, engine="calamine", nrows=0).columns)
+    positions = colonnes_projetees(entetes, colonnes_cibles)
+    return pd.read_excel(path, engine="calamine", usecols=positions)
+
+
+def lire_excel(path, colonnes_cibles=None, token=None):
+    """
+    Lire la première feuille d'un fichier Excel en ne gardant que les colonnes utiles
+
+    Args:
+        path: Chemin du fichier Excel
+        colonnes_cibles: Noms canoniques (après auto_rename_columns) à conserver,
+            None pour tout conserver
+        token: Jeton d'annulation vérifié toutes les PROGRESS_CHUNK_SIZE lignes
+            (lecture openpyxl ; calamine lit le fichier en un appel)
+
+    Returns:
+        DataFrame: Données avec les en-têtes d'origine (à renommer ensuite)
+    """
+    if CALAMINE_DISPONIBLE:
+        df = _lire_calamine(path, colonnes_cibles)
+        verifier_annulation(token)
+        return df
+    return _lire_openpyxl(path, colonnes_cibles, token)
+
+
+# Colonnes utiles de l'extraction applicative
+COLONNES_EXTRACTION = set(COLUMN_ALIASES)
+
+# Colonnes utiles des fichiers RH (prénom / nom séparés acceptés)
+COLONNES_RH = {'code_utilisateur', 'nom_prenom', 'profil', 'direction', 'first_name', 'last_name'}
@@ -0,0 +1,150 @@
+"""
+Export du jeu de données certifié (Excel, CSV, Parquet)
+
+Le CSV et le Parquet contiennent les mêmes colonnes et les mêmes valeurs
+que le rapport injecté dans le template : en-têtes issus de FIELD_TO_HEADER
+(dans cet ordre), valeurs RH pour le profil et la direction. Le CSV est écrit
+par blocs de lignes, en temps linéaire ; le Parquet nécessite pyarrow.
+
+Chaque export est écrit dans un fichier temporaire du dossier de destination,
+renommé une fois complet : un export interrompu (erreur, annulation) ne
+laisse ni fichier partiel ni fichier précédent écrasé.
+"""
+
+import importlib.util
+import os
+from datetime import datetime
+import pandas as pd
+from config.constants import CONFIG_PARAMS
+from core.report import FIELD_TO_HEADER, REPORT_CHUNK_SIZE, inject_to_template, valeurs_champ
+
+EXPORT_PARAMS = CONFIG_PARAMS['export']
+
+PARQUET_DISPONIBLE = importlib.util.find_spec("pyarrow") is not None
+
+# Format d'export -> message affiché une fois le fichier écrit
+MESSAGES_EXPORT = {
+    'xlsx': "✅ Rapport généré avec valeurs RH dans {}",
+    'csv': "✅ Export CSV généré dans {}",
+    'parquet': "✅ Export Parquet généré dans {}",
+}
+
+# Format d'export -> libellé du filtre de fichiers
+FORMATS_EXPORT = {
+    'xlsx': "Fichiers Excel (*.xlsx)",
+    'csv': "Fichiers CSV (*.csv)",
+    'parquet': "Fichiers Parquet (*.parquet)",
+}
+
+
+def formats_disponibles():
+    """Formats configurés et utilisables sur ce poste (Parquet seulement avec pyarrow)"""
+    return [
+        fmt for fmt in EXPORT_PARAMS['formats']
+        if fmt in FORMATS_EXPORT and (fmt != 'parquet' or PARQUET_DISPONIBLE)
+    ]
+
+
+def format_export(output_path):
+    """Format d'export déduit de l'extension du fichier ('xlsx' par défaut)"""
+    extension = os.path.splitext(output_path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS_EXPORT else 'xlsx'
+
+
+def donnees_certifiees(report_df, date_certif=None):
+    """
+    Jeu de données certifié, avec les en-têtes du template
+
+    Args:
+        report_df: Données du rapport
+        date_certif: Date de certification (défaut : aujourd'hui)
+
+    Returns:
+        DataFrame: Une colonne par champ de FIELD_TO_HEADER présent dans report_df
+    """
+    if date_certif is None:
+        date_certif = datetime.now().strftime('%Y-%m-%d')
+    colonnes = list(report_df.columns)
+    donnees = {
+        header: valeurs_champ(report_df, colonnes.index(field), date_certif)
+        for field, header in FIELD_TO_HEADER.items()
+        if field in colonnes
+    }
+    return pd.DataFrame(donnees, index=pd.RangeIndex(len(report_df)))
+
+
+def exporter_csv(report_df, output_path, chunk_size=REPORT_CHUNK_SIZE, progress_callback=None):
+    """
+    Exporter le jeu de données certifié en CSV, par blocs de lignes
+
+    Args:
+        report_df: Données du rapport
+        output_path: Chemin du fichier CSV
+        chunk_size: Nombre de lignes écrites par bloc
+        progress_callback: Fonction appelée avec (lignes écrites, total) après chaque bloc
+    """
+    donnees = donnees_certifiees(report_df)
+    total = len(donnees)
+    with open(output_path, 'w', encoding=EXPORT_PARAMS['csv_encoding'], newline='') as f:
+        if not total:
+            donnees.to_csv(f, sep=EXPORT_PARAMS['csv_separator'], index=False)
+        for debut in range(0, total, chunk_size):
+            donnees.iloc[debut:debut + chunk_size].to_csv(
+                f, sep=EXPORT_PARAMS['csv_separator'], index=False, header=(debut == 0)
+            )
+            if progress_callback is not None:
+                progress_callback(min(debut + chunk_size, total), total)
+
+
+def exporter_parquet(report_df, output_path, progress_callback=None):
+    """
+    Exporter le jeu de données certifié en Parquet
+
+    Args:
+        report_df: Données du rapport
+        output_path: Chemin du fichier Parquet
+        progress_callback: Fonction appelée avec (lignes écrites, total) à la fin
+    """
+    if not PARQUET_DISPONIBLE:
+        raise ImportError("L'export Parquet nécessite le module pyarrow (pip install pyarrow)")
+
+    donnees = donnees_certifiees(report_df).infer_objects()
+    # Colonnes de types mélangés : texte, valeurs manquantes conservées
+    for header in donnees.columns:
+        if donnees[header].dtype == object:
+            donnees[header] = donnees[header].astype('string')
+    donnees.to_parquet(output_path, index=False)
+    if progress_callback is not None:
+        progress_callback(len(donnees), len(donnees))
+
+
+def exporter_rapport(report_df, output_path, template_path=None, certificateur="", progress_callback=None):
+    """
+    Exporter le rapport dans le format indiqué par l'extension du fichier
+
+    Le fichier est écrit sous un nom temporaire puis renommé en output_path ;
+    une exception levée par progress_callback (annulation) abandonne l'export.
+
+    Args:
+        report_df: Données du rapport
+        output_path: Chemin du fichier de sortie (.xlsx, .csv ou .parquet)
+        template_path: Chemin du template Excel (export .xlsx uniquement)
+        certificateur: Nom du certificateur
+        progress_callback: Fonction appelée avec (lignes écrites, total)
+    """
+    fmt = format_export(output_path)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        if fmt == 'csv':
+            exporter_csv(report_df, tmp_path, progress_callback=progress_callback)
+        elif fmt == 'parquet':
+            exporter_parquet(report_df, tmp_path, progress_callback=progress_callback)
+        else:
+            inject_to_template(report_df, template_path, tmp_path,
+                               certificateur=certificateur, progress_callback=progress_callback)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(MESSAGES_EXPORT[fmt].format(output_path))
@@ -1,30 +1,117 @@
+import numpy as np
 import pandas as pd
 from mapping.column_mapping import auto_rename_columns
 from config.constants import COLUMN_ALIASES
+from core.excel_reader import lire_excel, COLONNES_EXTRACTION
+from core.input_cache import charger_avec_cache
+from core.date_parsing import parse_dates, formater_rapport
+from core.progress import verifier_annulation
+
+COLONNES_DATES = ['last_login', 'extraction_date']
 
 
 def robust_datetime_parse(series):
-    parsed = pd.to_datetime(series, errors='coerce')
-    if parsed.isna().any():
-        parsed = pd.to_datetime(series, errors='coerce', dayfirst=True)
+    """Convertir une colonne en dates (format déduit de la colonne, voir parse_dates)"""
+    parsed, _ = parse_dates(series)
     return parsed
 
 
-def deduplicate_extraction(df):
-    # On garde le dernier login le plus récent par utilisateur
-    grouped = (
-        df.sort_values('last_login', ascending=False)
-        .groupby('code_utilisateur', as_index=False)
-        .first()
-    )
-    # (Optionnel) : si profils/directions diffèrent, détecter l'incohérence ici !
+def _colonnes_incoherentes(df, codes, colonnes, token=None):
+    """
+    Repérer les utilisateurs dont les lignes en double divergent
+
+    Args:
+        df: Extraction avant déduplication
+        codes: Numéro de groupe (utilisateur) de chaque ligne
+        colonnes: Colonnes à comparer entre doublons (ex: profil, direction)
+        token: Jeton d'annulation vérifié avant chaque colonne
+
+    Returns:
+        ndarray: Booléen par groupe, vrai si au moins une colonne diverge
+    """
+    nb_groupes = codes.max() + 1 if len(codes) else 0
+    incoherent = np.zeros(nb_groupes, dtype=bool)
+    colonnes = [c for c in colonnes if c in df.columns]
+    taille = np.bincount(codes, minlength=nb_groupes)
+    en_double = taille[codes] > 1
+    if not colonnes or not en_double.any():
+        return incoherent
+
+    # Seules les lignes en double sont normalisées puis comparées
+    doublons = df.iloc[np.flatnonzero(en_double)]
+    codes_doublons = codes[en_double]
+    for col in colonnes:
+        verifier_annulation(token)
+        # Normalisation des seules valeurs distinctes, puis comparaison d'identifiants
+        brutes, uniques = pd.factorize(doublons[col], use_na_sentinel=False)
+        _, normalisees = np.unique(
+            pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().to_numpy(dtype=str),
+            return_inverse=True
+        )
+        valeurs = normalisees[brutes]
+        # Plusieurs valeurs distinctes dans un groupe <=> minimum et maximum différents
+        minimum = np.full(nb_groupes, len(uniques), dtype=np.int64)
+        maximum = np.full(nb_groupes, -1, dtype=np.int64)
+        np.minimum.at(minimum, codes_doublons, valeurs)
+        np.maximum.at(maximum, codes_doublons, valeurs)
+        incoherent |= (maximum >= 0) & (minimum != maximum)
+    return incoherent
+
+
+def deduplicate_extraction(df, token=None):
+    """
+    Garder, pour chaque utilisateur, sa ligne de dernière connexion la plus récente
+
+    Une seule passe linéaire (idxmax par groupe) : la ligne retenue est
+    conservée entière (aucun mélange de valeurs entre doublons) ; à date égale
+    ou inconnue, la première ligne du fichier l'emporte. Les utilisateurs sont
+    rendus triés par code, comme avec le groupby historique. Les utilisateurs dont
+    les doublons divergent sur le profil ou la direction sont signalés dans la
+    colonne 'doublon_incoherent'. token (jeton d'annulation) est vérifié
+    entre les étapes.
+    """
+    df = df[df['code_utilisateur'].notna()]
+    # Codes numérotés dans l'ordre trié : les groupes sortent triés par code
+    codes, _ = pd.factorize(df['code_utilisateur'], sort=True)
+
+    verifier_annulation(token)
+    dates = robust_datetime_parse(df['last_login'])
+    # NaT = plus petit entier : une date connue l'emporte toujours
+    valeurs = dates.to_numpy().view('i8')
+    positions = pd.Series(valeurs).groupby(codes, sort=True).idxmax().to_numpy()
+
+    verifier_annulation(token)
+    grouped = df.iloc[positions].reset_index(drop=True)
+    grouped['last_login'] = dates.iloc[positions].to_numpy()
+    grouped['doublon_incoherent'] = _colonnes_incoherentes(df, codes, ['profil', 'direction'], token)
     return grouped
 
 
-def charger_et_preparer_ext(fichier_ext):
-    df = pd.read_excel(fichier_ext)
+def charger_et_preparer_ext(fichier_ext, token=None):
+    """
+    Args:
+        fichier_ext: Chemin du fichier d'extraction
+        token: Jeton d'annulation (core.progress) vérifié pendant la lecture
+            et la déduplication ; une préparation annulée n'est pas mise en cache
+    """
+    # Fichier déjà préparé : relu depuis le cache chiffré
+    return charger_avec_cache(fichier_ext, 'ext', lambda path: _preparer_ext(path, token))
+
+
+def _preparer_ext(fichier_ext, token=None):
+    df = lire_excel(fichier_ext, COLONNES_EXTRACTION, token)
     df = auto_rename_columns(df, COLUMN_ALIASES)
-    df = deduplicate_extraction(df)
+
+    # Traitement des dates : format déduit par colonne, rapport conservé avec les données
+    rapports = {}
+    for datecol in COLONNES_DATES:
+        verifier_annulation(token)
+        if datecol in df.columns:
+            df[datecol], rapports[datecol] = parse_dates(df[datecol])
+            print(formater_rapport(datecol, rapports[datecol]))
+
+    df = deduplicate_extraction(df, token)
+    verifier_annulation(token)
 
     # Filtrage comptes suspendus/désactivés
     if 'status' in df.columns:
@@ -42,12 +129,9 @@ def charger_et_preparer_ext(fichier_ext):
     else:
         print("Alerte : colonne 'status' absente après mapping, aucun filtrage suspendu.")
 
-    # Traitement des dates
-    for datecol in ['last_login', 'extraction_date']:
-        if datecol in df.columns:
-            df[datecol] = robust_datetime_parse(df[datecol])
     # Normalisation des autres colonnes texte
     for txtcol in ['nom_prenom', 'profil', 'direction', 'status']:
         if txtcol in df.columns:
             df[txtcol] = df[txtcol].astype(str).str.strip().str.lower()
+    df.attrs['formats_dates'] = rapports
     return df
@@ -0,0 +1,257 @@
+"""
+Rapprochement approché des comptes absents du RH (second passage)
+
+Après la jointure exacte sur code_utilisateur, les comptes sans code RH
+correspondant sont rapprochés des lignes RH restées sans compte :
+- blocage : seuls les candidats partageant un mot du nom normalisé ou un
+  n-gramme du code canonique sont comparés (index inversés), ce qui évite
+  la comparaison de toutes les paires
+- score rapidfuzz sur le nom (token_sort_ratio) et sur le code canonique
+- affectation gloutonne par confiance décroissante, chaque ligne RH n'étant
+  rapprochée qu'une fois ; les égalités ambiguës sont ignorées
+"""
+
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+from rapidfuzz import fuzz
+from config.constants import CONFIG_PARAMS
+from core.progress import PROGRESS_CHUNK_SIZE
+
+IDENTITY_PARAMS = CONFIG_PARAMS['identity_matching']
+
+_NON_ALPHANUMERIQUE = re.compile(r'[^0-9a-z]+')
+_ZEROS_NON_SIGNIFICATIFS = re.compile(r'(?<![0-9])0+(?=[0-9])')
+_NON_CHIFFRES = re.compile(r'[^0-9]+')
+
+# Longueur des n-grammes de code
+TAILLE_NGRAMME = 3
+
+# Nombre minimal de chiffres pour rapprocher deux codes sur leur partie numérique
+MIN_CHIFFRES = 3
+
+
+def _ascii_minuscules(valeur):
+    """Texte en minuscules sans accents (unidecode seulement si nécessaire)"""
+    texte = str(valeur)
+    if not texte.isascii():
+        texte = unidecode(texte)
+    return texte.lower()
+
+
+def code_canonique(code):
+    """
+    Forme canonique d'un code utilisateur
+
+    Minuscules, sans séparateurs ni zéros non significatifs :
+    'U-00123', 'u123' et 'U0123' donnent tous 'u123'.
+    """
+    if not isinstance(code, str) and pd.isnull(code):
+        return ""
+    texte = _ascii_minuscules(code)
+    if not texte.isalnum():
+        texte = _NON_ALPHANUMERIQUE.sub('', texte)
+    if '0' in texte:
+        texte = _ZEROS_NON_SIGNIFICATIFS.sub('', texte)
+    return texte
+
+
+def partie_numerique(code_canon):
+    """Chiffres d'un code canonique ('' s'il y en a trop peu)"""
+    chiffres = _NON_CHIFFRES.sub('', code_canon)
+    return chiffres if len(chiffres) >= MIN_CHIFFRES else ""
+
+
+def nom_normalise(nom):
+    """Nom sans accents ni ponctuation ('' si absent)"""
+    if not isinstance(nom, str) and pd.isnull(nom):
+        return ""
+    texte = _NON_ALPHANUMERIQUE.sub(' ', _ascii_minuscules(nom)).strip()
+    if texte == 'nan':
+        return ""
+    return texte
+
+
+def ngrammes(code_canon, taille=TAILLE_NGRAMME):
+    """N-grammes de caractères d'un code canonique (le code entier s'il est court)"""
+    if len(code_canon) <= taille:
+        return {code_canon} if code_canon else set()
+    return {code_canon[i:i + taille] for i in range(len(code_canon) - taille + 1)}
+
+
+def score_code(code_a, code_b):
+    """Score (0-100) de ressemblance de deux codes canoniques"""
+    if not code_a or not code_b:
+        return 0.0
+    if code_a == code_b:
+        return 100.0
+    score = fuzz.ratio(code_a, code_b)
+    # Même identifiant numérique avec un préfixe différent ('ext123' / 'u123')
+    chiffres = partie_numerique(code_a)
+    if chiffres and chiffres == partie_numerique(code_b):
+        score = max(score, 90.0)
+    return score
+
+
+def confiance(nom_a, nom_b, code_a, code_b, name_threshold):
+    """
+    Confiance (0-100) que deux lignes désignent la même personne
+
+    Avec deux noms renseignés : moyenne du score du nom et du score du code,
+    nulle si les noms sont trop différents. Sans nom : score du code minoré,
+    de sorte que seul un code canonique identique puisse suffire.
+    """
+    code = score_code(code_a, code_b)
+    if nom_a and nom_b:
+        nom = fuzz.token_sort_ratio(nom_a, nom_b)
+        if nom < name_threshold:
+            return 0.0
+        return (nom + code) / 2
+    return 0.9 * code
+
+
+class CandidateIndex:
+    """Index inversés (mots du nom, n-grammes et chiffres du code) sur des lignes RH"""
+
+    def __init__(self, noms, codes, max_block_size=IDENTITY_PARAMS['max_block_size'],
+                 cles_utiles=None):
+        """
+        Args:
+            noms: Noms bruts des lignes RH
+            codes: Codes bruts des lignes RH
+            max_block_size: Taille au-delà de laquelle un bloc est ignoré
+                (mot trop fréquent, peu discriminant)
+            cles_utiles: Clés recherchées (seules celles-ci sont indexées),
+                au format de cles()
+        """
+        self.max_block_size = max_block_size
+        self._noms_bruts = noms
+        self._noms = {}
+        self.codes = []
+        self._blocs = ({}, {}, {})
+        par_mot, par_ngramme, par_chiffres = self._blocs
+        mots_utiles, ngrammes_utiles, chiffres_utiles = (
+            cles_utiles if cles_utiles is not None else (None, None, None)
+        )
+
+        # Les mots se répètent d'un nom à l'autre : normalisés une fois chacun
+        mots_normalises = {}
+        for position, (nom, code) in enumerate(zip(noms, codes)):
+            if isinstance(nom, str):
+                for brut in nom.lower().split():
+                    mots = mots_normalises.get(brut)
+                    if mots is None:
+                        mots = mots_normalises[brut] = tuple(
+                            _NON_ALPHANUMERIQUE.sub(' ', _ascii_minuscules(brut)).split()
+                        )
+                    for mot in mots:
+                        if mots_utiles is None or mot in mots_utiles:
+                            par_mot.setdefault(mot, []).append(position)
+
+            canon = code_canonique(code)
+            self.codes.append(canon)
+            for ngramme in ngrammes(canon):
+                if ngrammes_utiles is None or ngramme in ngrammes_utiles:
+                    par_ngramme.setdefault(ngramme, []).append(position)
+            chiffres = partie_numerique(canon)
+            if chiffres and (chiffres_utiles is None or chiffres in chiffres_utiles):
+                par_chiffres.setdefault(chiffres, []).append(position)
+
+    def nom(self, position):
+        """Nom normalisé d'une ligne RH (calculé à la demande)"""
+        nom = self._noms.get(position)
+        if nom is None:
+            nom = self._noms[position] = nom_normalise(self._noms_bruts[position])
+        return nom
+
+    @staticmethod
+    def cles(nom, code):
+        """
+        Clés de blocage d'une ligne
+
+        Returns:
+            tuple: (mots du nom, n-grammes du code, partie numérique du code)
+        """
+        chiffres = partie_numerique(code)
+        return (set(nom.split()), ngrammes(code), {chiffres} if chiffres else set())
+
+    def candidats(self, nom, code, max_candidates=IDENTITY_PARAMS['max_candidates']):
+        """
+        Lignes RH partageant le plus de clés de blocage avec (nom, code)
+
+        Args:
+            nom: Nom normalisé recherché
+            code: Code canonique recherché
+
+        Returns:
+            list: Positions des candidats, les plus prometteurs d'abord
+        """
+        compteur = Counter()
+        for bloc, cles in zip(self._blocs, self.cles(nom, code)):
+            for cle in cles:
+                positions = bloc.get(cle)
+                if positions and len(positions) <= self.max_block_size:
+                    compteur.update(positions)
+        return [position for position, _ in compteur.most_common(max_candidates)]
+
+
+def rapprocher_identites(noms_ext, codes_ext, noms_rh, codes_rh,
+                         threshold=IDENTITY_PARAMS['confidence_threshold'],
+                         name_threshold=IDENTITY_PARAMS['name_threshold'],
+                         progress_callback=None, chunk_size=PROGRESS_CHUNK_SIZE):
+    """
+    Rapprocher des comptes sans correspondance exacte de lignes RH libres
+
+    Args:
+        noms_ext, codes_ext: Noms et codes des comptes non rapprochés
+        noms_rh, codes_rh: Noms et codes des lignes RH sans compte
+        threshold: Confiance minimale pour retenir un rapprochement
+        name_threshold: Score minimal entre deux noms renseignés
+        progress_callback: Fonction appelée avec (comptes examinés, total)
+            tous les chunk_size comptes
+
+    Returns:
+        tuple: (positions RH, confiances) ; position -1 et confiance NaN
+            pour les comptes non rapprochés
+    """
+    noms_ext = [nom_normalise(n) for n in noms_ext]
+    codes_ext = [code_canonique(c) for c in codes_ext]
+
+    positions = np.full(len(noms_ext), -1, dtype=np.int64)
+    confiances = np.full(len(noms_ext), np.nan)
+    if not noms_ext or not len(noms_rh):
+        return positions, confiances
+
+    # Seules les clés présentes côté extraction méritent d'être indexées
+    cles_utiles = (set(), set(), set())
+    for nom, code in zip(noms_ext, codes_ext):
+        for utiles, cles in zip(cles_utiles, CandidateIndex.cles(nom, code)):
+            utiles |= cles
+    index = CandidateIndex(noms_rh, codes_rh, cles_utiles=cles_utiles)
+
+    propositions = []
+    for i, (nom, code) in enumerate(zip(noms_ext, codes_ext)):
+        if progress_callback is not None and i and i % chunk_size == 0:
+            progress_callback(i, len(noms_ext))
+        scores = sorted(
+            ((confiance(nom, index.nom(j), code, index.codes[j], name_threshold), j)
+             for j in index.candidats(nom, code)),
+            reverse=True
+        )
+        if not scores or scores[0][0] < threshold:
+            continue
+        if len(scores) > 1 and scores[1][0] == scores[0][0]:
+            # Deux lignes RH aussi probables : rapprochement ambigu
+            continue
+        propositions.append((scores[0][0], i, scores[0][1]))
+
+    rh_pris = set()
+    for score, i, j in sorted(propositions, key=lambda p: (-p[0], p[1])):
+        if j in rh_pris:
+            continue
+        rh_pris.add(j)
+        positions[i] = j
+        confiances[i] = score
+    return positions, confiances
@@ -0,0 +1,223 @@
+"""
+Cache des fichiers importés (extraction et RH) déjà préparés
+
+Le DataFrame obtenu après lecture, auto_rename_columns et normalisation est
+conservé dans le dossier de données persistantes, chiffré avec
+l'EncryptionManager. La clé combine l'empreinte SHA-256 du contenu du fichier,
+le type de préparation et la version du code de préparation : un fichier
+modifié ou un code de préparation différent ne réutilise jamais une entrée.
+
+Format : DataFrame sérialisé par pandas (stockage par blocs de colonnes,
+types conservés à l'identique), chiffré (Fernet, donc authentifié).
+"""
+
+import hashlib
+import importlib
+import io
+import json
+import os
+import pickle
+from functools import lru_cache
+from config.constants import CONFIG_PARAMS, COLUMN_ALIASES
+from resource_path import get_persistent_data_path
+from security.encryption import encryption_manager
+
+# A incrémenter à chaque changement du résultat de la préparation des fichiers
+PREPARATION_VERSION = 4
+
+CACHE_ENABLED = CONFIG_PARAMS['performance']['input_cache_enabled']
+CACHE_MAX_ENTRIES = CONFIG_PARAMS['performance']['input_cache_max_entries']
+CACHE_EXTENSION = '.cache.enc'
+
+# Modules dont dépend le résultat de la préparation
+_MODULES_PREPARATION = [
+    'core.date_parsing',
+    'core.excel_reader',
+    'core.ext_utils',
+    'core.rh_utils',
+    'core.text_utils',
+    'mapping.column_mapping',
+]
+
+
+def get_cache_dir():
+    """Dossier du cache d'import (créé si nécessaire)"""
+    cache_dir = os.path.join(get_persistent_data_path(), 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    Version du code de préparation
+
+    Combine PREPARATION_VERSION, les alias de colonnes et, lorsqu'il est
+    disponible (exécution depuis les sources), le code des modules concernés.
+
+    Returns:
+        str: Empreinte hexadécimale de la version
+    """
+    h = hashlib.sha256()
+    h.update(str(PREPARATION_VERSION).encode())
+    h.update(json.dumps(COLUMN_ALIASES, sort_keys=True).encode('utf-8'))
+    for name in _MODULES_PREPARATION:
+        source = getattr(importlib.import_module(name), '__file__', None)
+        if source and source.endswith('.py') and os.path.exists(source):
+            with open(source, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(path, kind):
+    """
+    Clé de cache d'un fichier
+
+    Args:
+        path: Chemin du fichier importé
+        kind: Type de préparation ('ext', 'rh')
+
+    Returns:
+        str: Clé (type, version du code, empreinte du contenu)
+    """
+    return f"{kind}_{code_version()}_{file_digest(path)}"
+
+
+def _entry_path(key):
+    return os.path.join(get_cache_dir(), key + CACHE_EXTENSION)
+
+
+def _serialize(df):
+    buffer = io.BytesIO()
+    df.to_pickle(buffer, compression=None)
+    return buffer.getvalue()
+
+
+def _deserialize(data):
+    return pickle.loads(data)
+
+
+def lire_cache(key):
+    """
+    Lire une entrée du cache
+
+    Returns:
+        DataFrame: Données préparées, ou None si absentes ou illisibles
+            (autre certificateur, fichier corrompu)
+    """
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            data = encryption_manager.decrypt_bytes(f.read())
+        df = _deserialize(data)
+    except Exception:
+        return None
+    # Marquer l'entrée comme récemment utilisée
+    os.utime(path)
+    return df
+
+
+def ecrire_cache(key, df):
+    """Écrire une entrée du cache (écriture atomique)"""
+    path = _entry_path(key)
+    tmp_path = path + '.tmp'
+    data = encryption_manager.encrypt_bytes(_serialize(df))
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _purger(CACHE_MAX_ENTRIES)
+
+
+def _purger(max_entries):
+    """Supprimer les entrées les moins récemment utilisées au-delà de max_entries"""
+    cache_dir = get_cache_dir()
+    entries = [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.endswith(CACHE_EXTENSION)
+    ]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def vider_cache():
+    """Supprimer toutes les entrées du cache d'import"""
+    cache_dir = get_cache_dir()
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_EXTENSION) or name.endswith(CACHE_EXTENSION + '.tmp'):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def chercher(path, kind):
+    """
+    Chercher un fichier préparé dans le cache
+
+    Args:
+        path: Chemin du fichier à importer
+        kind: Type de préparation ('ext', 'rh')
+
+    Returns:
+        tuple: (clé, DataFrame) ; DataFrame vaut None en cas d'absence et
+            la clé vaut None si le cache est inutilisable
+    """
+    if not CACHE_ENABLED or not encryption_manager.is_initialized():
+        return (None, None)
+    try:
+        key = cache_key(path, kind)
+    except OSError:
+        return (None, None)
+    return (key, lire_cache(key))
+
+
+def memoriser(key, df, path=None):
+    """Mettre en cache un fichier préparé (sans effet si la clé vaut None)"""
+    if key is None:
+        return
+    try:
+        ecrire_cache(key, df)
+    except Exception as e:
+        nom = os.path.basename(path) if path else key
+        print(f"⚠️ Impossible de mettre en cache {nom}: {e}")
+
+
+def charger_avec_cache(path, kind, preparer):
+    """
+    Charger un fichier préparé depuis le cache, ou le préparer puis le mettre en cache
+
+    Le cache n'est utilisé que si le chiffrement est initialisé (aucune donnée
+    RH n'est écrite en clair).
+
+    Args:
+        path: Chemin du fichier à importer
+        kind: Type de préparation ('ext', 'rh')
+        preparer: Fonction path -> DataFrame préparé
+
+    Returns:
+        DataFrame: Données préparées (copie indépendante du cache)
+    """
+    key, df = chercher(path, kind)
+    if df is not None:
+        return df
+
+    df = preparer(path)
+    memoriser(key, df, path)
+    return df
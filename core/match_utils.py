@@ -1,18 +1,118 @@
+import numpy as np
 import pandas as pd
+from config.constants import CONFIG_PARAMS
+from core.identity_matching import rapprocher_identites
 
-def associer_rh_aux_utilisateurs(ext_df, rh_df):
-    merged = ext_df.merge(
-        rh_df.rename(columns={
-            'profil': 'profil_rh',
-            'direction': 'direction_rh',
-            'nom_prenom': 'nom_prenom_rh'
-        }),
-        how='left',
-        on='code_utilisateur'
-    )
+RAPPROCHEMENT_APPROCHE = CONFIG_PARAMS['identity_matching']['enabled']
+
+RH_RENAME = {
+    'profil': 'profil_rh',
+    'direction': 'direction_rh',
+    'nom_prenom': 'nom_prenom_rh'
+}
+
+# Valeurs de nom_prenom considérées comme absentes (texte normalisé de NaN inclus)
+NOMS_ABSENTS = ['', 'nan']
+
+
+def _cles_compatibles(ext_cles, rh_cles):
+    """Vérifier que la jointure indexée donne le même résultat que merge"""
+    if ext_cles.dtype == rh_cles.dtype:
+        return True
+    return pd.api.types.is_numeric_dtype(ext_cles) and pd.api.types.is_numeric_dtype(rh_cles)
+
+
+def _joindre_rh(ext_df, rh):
+    """
+    Jointure gauche sur code_utilisateur par index (équivalente à merge how='left')
+
+    Chaque code de l'extraction est cherché une fois dans l'index des codes RH
+    (get_indexer), puis les colonnes RH sont alignées par position.
+    """
+    ext_cles = ext_df['code_utilisateur']
+    rh_cles = pd.Index(rh['code_utilisateur'])
+    rh_colonnes = [c for c in rh.columns if c != 'code_utilisateur']
+
+    if (not rh_cles.is_unique or not _cles_compatibles(ext_cles, rh_cles)
+            or any(c in ext_df.columns for c in rh_colonnes)):
+        # Cas marginaux (doublons, types de clés différents, collisions de noms) : merge
+        return ext_df.merge(rh, how='left', on='code_utilisateur')
+
+    positions = rh_cles.get_indexer(ext_cles)
+
+    merged = ext_df.reset_index(drop=True)
+    for col in rh_colonnes:
+        # Position -1 (code absent du RH) : NaN, avec la même promotion de type que merge
+        merged[col] = pd.api.extensions.take(rh[col].to_numpy(), positions, allow_fill=True)
+    return merged
+
+
+def _rapprocher_non_trouves(merged, rh, progress_callback=None):
+    """
+    Second passage : rapprocher les comptes sans code RH des lignes RH libres
+
+    Ajoute code_rh (code RH retenu), confiance_rh (100 pour une jointure
+    exacte, score du rapprochement approché, NaN sans correspondance) et
+    rapprochement_approche (vrai pour les comptes rapprochés par ce second
+    passage : leur score peut lui aussi atteindre 100).
+    progress_callback reçoit (lignes traitées, total) : les comptes joints
+    exactement, puis les comptes examinés par le rapprochement approché.
+    """
+    codes = merged['code_utilisateur']
+    trouves = codes.isin(rh['code_utilisateur']).to_numpy()
+    code_rh = codes.to_numpy(dtype=object).copy()
+    code_rh[~trouves] = np.nan
+    confiance_rh = np.where(trouves, 100.0, np.nan)
+    approche = np.zeros(len(merged), dtype=bool)
+
+    non_trouves = np.flatnonzero(~trouves)
+    joints = len(merged) - len(non_trouves)
+    suivi = None
+    if progress_callback is not None:
+        progress_callback(joints, len(merged))
+        suivi = lambda examines, _total: progress_callback(joints + examines, len(merged))
+    if RAPPROCHEMENT_APPROCHE and len(non_trouves):
+        libres = rh[~rh['code_utilisateur'].isin(codes)]
+        noms = merged['nom_prenom'] if 'nom_prenom' in merged.columns else pd.Series("", index=merged.index)
+        noms_rh = libres['nom_prenom_rh'] if 'nom_prenom_rh' in libres.columns else pd.Series("", index=libres.index)
+        positions, confiances = rapprocher_identites(
+            noms.to_numpy()[non_trouves], codes.to_numpy()[non_trouves],
+            noms_rh.to_numpy(), libres['code_utilisateur'].to_numpy(),
+            progress_callback=suivi
+        )
+        rapproches = positions >= 0
+        if rapproches.any():
+            lignes = non_trouves[rapproches]
+            lignes_rh = libres.iloc[positions[rapproches]]
+            for col in rh.columns:
+                if col == 'code_utilisateur' or col not in merged.columns:
+                    continue
+                valeurs = merged[col].to_numpy(dtype=object).copy()
+                valeurs[lignes] = lignes_rh[col].to_numpy(dtype=object)
+                merged[col] = pd.Series(valeurs, index=merged.index).infer_objects()
+            code_rh[lignes] = lignes_rh['code_utilisateur'].to_numpy(dtype=object)
+            confiance_rh[lignes] = confiances[rapproches]
+            approche[lignes] = True
+
+    merged['code_rh'] = pd.Series(code_rh, index=merged.index).infer_objects()
+    merged['confiance_rh'] = confiance_rh
+    merged['rapprochement_approche'] = approche
+    return merged
+
+
+def associer_rh_aux_utilisateurs(ext_df, rh_df, progress_callback=None):
+    rh = rh_df.rename(columns=RH_RENAME)
+    merged = _joindre_rh(ext_df, rh)
+    # Comptes dont le code a été reformaté (zéros, préfixe, casse) : second passage
+    merged = _rapprocher_non_trouves(merged, rh, progress_callback)
     merged['compte_non_rh'] = merged['profil_rh'].isnull()
-    merged['nom_prenom'] = merged.apply(
-        lambda row: row['nom_prenom_rh'] if (pd.isna(row['nom_prenom']) or row['nom_prenom'] in ['', 'nan']) else row['nom_prenom'],
-        axis=1
-    )
+
+    # Nom de l'extraction, complété par le nom RH lorsqu'il est absent
+    nom = merged['nom_prenom']
+    absent = nom.isna().to_numpy() | nom.isin(NOMS_ABSENTS).to_numpy()
+    valeurs = np.where(absent, merged['nom_prenom_rh'].to_numpy(dtype=object), nom.to_numpy(dtype=object))
+    # Type du résultat déduit des valeurs, comme pour l'ancien apply ligne à ligne
+    merged['nom_prenom'] = pd.Series(valeurs.tolist(), index=merged.index)
+    if progress_callback is not None:
+        progress_callback(len(merged), len(merged))
     return merged
@@ -0,0 +1,105 @@
+"""
+Progression et annulation des traitements longs
+
+Un traitement est découpé en étapes pondérées ; chaque étape signale les
+éléments traités sur son total, entre deux blocs. SuiviProgression en
+déduit l'avancement global et le temps restant estimé, et vérifie à chaque
+signalement le jeton d'annulation : une annulation interrompt le
+traitement au bloc suivant (exception TraitementAnnule).
+"""
+
+import threading
+import time
+from config.constants import CONFIG_PARAMS
+
+# Nombre d'éléments traités entre deux signalements de progression
+PROGRESS_CHUNK_SIZE = CONFIG_PARAMS['performance']['progress_chunk_size']
+
+
+class TraitementAnnule(Exception):
+    """Traitement interrompu à la demande de l'utilisateur"""
+
+
+class CancellationToken:
+    """Jeton d'annulation partagé entre l'interface et le thread de traitement"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Lever TraitementAnnule si l'annulation a été demandée"""
+        if self._event.is_set():
+            raise TraitementAnnule("Traitement annulé")
+
+
+def verifier_annulation(token):
+    """Point d'annulation d'une boucle : TraitementAnnule si token a été annulé (None = jamais)"""
+    if token is not None:
+        token.check()
+
+
+class SuiviProgression:
+    """Avancement global d'un traitement en étapes pondérées, avec temps restant estimé"""
+
+    def __init__(self, etapes, callback=None, token=None):
+        """
+        Args:
+            etapes: Liste de (nom, poids) dans l'ordre d'exécution
+            callback: Fonction appelée avec (nom de l'étape, traités, total,
+                avancement global entre 0 et 1, secondes restantes ou None)
+            token: Jeton d'annulation vérifié à chaque signalement
+        """
+        poids_total = sum(poids for _, poids in etapes) or 1
+        self._debuts = {}
+        self._poids = {}
+        cumul = 0
+        for nom, poids in etapes:
+            self._debuts[nom] = cumul / poids_total
+            self._poids[nom] = poids / poids_total
+            cumul += poids
+        self.callback = callback
+        self.token = token
+        self.etape = None
+        self.avancement = 0.0
+        self._debut = time.perf_counter()
+
+    def demarrer(self, etape, total=0):
+        """Commencer une étape (avancement au début de l'étape)"""
+        self.etape = etape
+        self.avancer(0, total)
+
+    def avancer(self, traites, total):
+        """
+        Signaler l'avancement de l'étape en cours
+
+        Args:
+            traites: Éléments traités dans l'étape
+            total: Nombre total d'éléments de l'étape
+        """
+        verifier_annulation(self.token)
+        fraction = min(traites / total, 1.0) if total else 0.0
+        self.avancement = max(self.avancement, self._debuts[self.etape] + self._poids[self.etape] * fraction)
+        if self.callback is not None:
+            self.callback(self.etape, traites, total, self.avancement, self.temps_restant())
+
+    def temps_restant(self):
+        """Secondes restantes estimées au rythme moyen observé (None au démarrage)"""
+        if self.avancement <= 0:
+            return None
+        ecoule = time.perf_counter() - self._debut
+        return ecoule * (1 - self.avancement) / self.avancement
+
+
+def formater_duree(secondes):
+    """Durée lisible ('1 min 05 s', '12 s')"""
+    secondes = int(round(secondes))
+    if secondes >= 60:
+        return f"{secondes // 60} min {secondes % 60:02d} s"
+    return f"{secondes} s"
@@ -1,9 +1,15 @@
 from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
 from datetime import datetime
 from core.text_utils import normalize_text
+from core.template_writer import ecrire_template, types_pris_en_charge
+from config.constants import CONFIG_PARAMS
+import numpy as np
 import pandas as pd
 import os
 
+REPORT_CHUNK_SIZE = CONFIG_PARAMS['performance']['report_chunk_size']
+
 FIELD_TO_HEADER = {
     'code_utilisateur':           'Code/identifiant utilisateur',
     'nom_prenom':                 'Nom et Prénom utilisateur',
@@ -21,50 +27,182 @@ FIELD_TO_HEADER = {
     'date_certification':         'Date certification'
 }
 
+# Colonnes RH substituées aux valeurs de l'extraction dans le rapport
+CHAMPS_RH = {
+    'profil': 'profil_rh',
+    'direction': 'direction_rh'
+}
+
 def normalize(text: str) -> str:
     """Normaliser un texte pour la comparaison"""
     return normalize_text(text, remove_stop_words=False)
 
-def inject_to_template(report_df, template_path: str, output_path: str, certificateur: str = ""):
+def valeurs_champ(report_df, position, date_certif):
+    """
+    Valeurs d'un champ du rapport telles qu'écrites dans le template
+
+    Args:
+        report_df: Données du rapport
+        position: Position de la colonne du champ dans report_df
+        date_certif: Date de certification (champ date_certification)
+
+    Returns:
+        ndarray: Valeurs (objets), une par ligne
+    """
+    field = report_df.columns[position]
+    if field == 'date_certification':
+        return np.full(len(report_df), date_certif, dtype=object)
+
+    valeurs = report_df.iloc[:, position].to_numpy(dtype=object)
+    # TOUJOURS utiliser valeurs RH pour profil/direction (si renseignées)
+    col_rh = CHAMPS_RH.get(field)
+    if col_rh in report_df.columns:
+        valeurs_rh = report_df.iloc[:, list(report_df.columns).index(col_rh)].to_numpy(dtype=object)
+        renseignees = np.fromiter(map(bool, valeurs_rh), dtype=bool, count=len(valeurs_rh))
+        valeurs = np.where(renseignees, valeurs_rh, valeurs)
+    return valeurs
+
+def _valeurs_template(report_df, header_map, date_certif):
+    """
+    Valeurs à écrire dans chaque colonne du template, calculées une fois par champ
+
+    Args:
+        report_df: Données du rapport
+        header_map: En-tête normalisé du template -> numéro de colonne
+        date_certif: Date de certification écrite pour chaque ligne
+
+    Returns:
+        dict: Numéro de colonne -> tableau des valeurs (None = cellule non écrite)
+    """
+    colonnes = {}
+    for position, field in enumerate(report_df.columns):
+        template_header = FIELD_TO_HEADER.get(field)
+        if not template_header:
+            continue
+        col = header_map.get(normalize(template_header))
+        if not col:
+            continue
+
+        valeurs = valeurs_champ(report_df, position, date_certif)
+        if col in colonnes:
+            # Deux champs pour une même colonne : le dernier l'emporte, sauf valeur vide
+            vides = np.fromiter((v is None for v in valeurs), dtype=bool, count=len(valeurs))
+            valeurs = np.where(vides, colonnes[col], valeurs)
+        colonnes[col] = valeurs
+    return colonnes
+
+def inject_to_template(report_df, template_path: str, output_path: str, certificateur: str = "",
+                       progress_callback=None):
+    """
+    Injecter le rapport dans le template Excel
+
+    Les colonnes du template sont associées aux champs une seule fois, puis
+    les lignes sont écrites en flux dans la feuille (voir core.template_writer).
+    Un template contenant déjà des lignes de données, ou des valeurs d'un type
+    non pris en charge (dates), est rempli cellule par cellule.
+
+    Args:
+        report_df: Données du rapport
+        template_path: Chemin du template Excel
+        output_path: Chemin du fichier Excel de sortie
+        certificateur: Nom du certificateur
+        progress_callback: Fonction appelée avec (lignes écrites, total)
+    """
     wb = load_workbook(template_path)
     ws = wb.active
     header_map = {normalize(cell.value): cell.column for cell in ws[1] if cell.value}
     date_certif = datetime.now().strftime('%Y-%m-%d')
-    
-    for i, row in enumerate(report_df.itertuples(index=False), start=2):
-        for field, val in zip(report_df.columns, row):
-            # TOUJOURS utiliser valeurs RH pour profil/direction
-            if field == 'profil':
-                val = getattr(row, 'profil_rh', val) or val
-            elif field == 'direction':
-                val = getattr(row, 'direction_rh', val) or val
-                
-            template_header = FIELD_TO_HEADER.get(field)
-            if not template_header:
-                continue
-                
-            col = header_map.get(normalize(template_header))
-            if col:
-                if field == 'date_certification':
-                    ws.cell(row=i, column=col, value=date_certif)
-                else:
-                    ws.cell(row=i, column=col, value=val)
-    
-    wb.save(output_path)
-    print(f"✅ Rapport généré avec valeurs RH dans {output_path}")
+    colonnes = _valeurs_template(report_df, header_map, date_certif)
+
+    en_flux = (
+        ws.max_row <= 1
+        and all(ligne <= 1 for ligne in ws.row_dimensions)
+        and all(types_pris_en_charge(valeurs) for valeurs in colonnes.values())
+    )
+    if en_flux:
+        ecrire_template(wb, ws, colonnes, len(report_df), output_path,
+                        chunk_size=REPORT_CHUNK_SIZE, progress_callback=progress_callback)
+    else:
+        for col, valeurs in colonnes.items():
+            for i, val in enumerate(valeurs, start=2):
+                ws.cell(row=i, column=col, value=val)
+        wb.save(output_path)
+        if progress_callback is not None:
+            progress_callback(len(report_df), len(report_df))
+
+def _classer_types_changement(types):
+    """
+    Drapeaux et libellé du type de changement de chaque ligne, en une passe
+
+    Args:
+        types: Valeurs de type_changement (dictionnaires champ -> type)
+
+    Returns:
+        tuple: (variation, changement, libellés) ; variation et changement
+            sont des tableaux booléens, libellés la liste des 'champ: type'
+            joints par ' | '
+    """
+    variation = np.zeros(len(types), dtype=bool)
+    changement = np.zeros(len(types), dtype=bool)
+    libelles = []
+    for i, x in enumerate(types):
+        if not isinstance(x, dict):
+            libelles.append('')
+            continue
+        valeurs = [str(v).lower() for v in x.values()]
+        variation[i] = any('variation' in v for v in valeurs)
+        changement[i] = any('changement' in v for v in valeurs)
+        libelles.append(' | '.join(f"{k}: {v}" for k, v in x.items()))
+    return variation, changement, libelles
+
+def _longueurs_cellules(df):
+    """
+    Longueur du texte de chaque cellule telle qu'écrite par to_excel
+
+    Returns:
+        dict: Colonne -> tableau des longueurs (0 pour une valeur vide)
+    """
+    longueurs = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            textes = serie.dt.strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            textes = serie.astype(str)
+        longueurs[col] = np.where(serie.isna().to_numpy(), 0, textes.str.len().to_numpy())
+    return longueurs
+
+def _ajuster_largeurs(worksheet, colonnes, longueurs, lignes=None):
+    """
+    Ajuster la largeur des colonnes d'une feuille (texte le plus long, 50 au plus)
+
+    Args:
+        worksheet: Feuille openpyxl
+        colonnes: En-têtes des colonnes, dans l'ordre de la feuille
+        longueurs: Colonne -> longueurs des cellules (voir _longueurs_cellules)
+        lignes: Masque des lignes écrites dans la feuille (toutes si None)
+    """
+    for idx, col in enumerate(colonnes, start=1):
+        valeurs = longueurs[col] if lignes is None else longueurs[col][lignes]
+        max_length = max(len(str(col)), int(valeurs.max()) if len(valeurs) else 0)
+        worksheet.column_dimensions[get_column_letter(idx)].width = min(max_length + 2, 50)
 
 def generer_rapport(df, output_path):
     """
     Génère un rapport Excel détaillé des anomalies et décisions.
     
+    Le type de changement de chaque ligne est classé une seule fois ; les
+    feuilles et le résumé sont des sélections de ces colonnes précalculées.
+    
     Args:
         df (pd.DataFrame): DataFrame contenant les données à exporter
         output_path (str): Chemin du fichier Excel de sortie
     """
-    # Créer un writer Excel
-    writer = pd.ExcelWriter(output_path, engine='openpyxl')
+    types = df['type_changement'] if 'type_changement' in df.columns else [None] * len(df)
+    variation, changement, libelles = _classer_types_changement(types)
+    automatique = df['cas_automatique'].to_numpy(dtype=bool)
+    decision = df['decision_finale']
     
-    # Préparer les données pour chaque feuille
     # 1. Résumé
     summary = pd.DataFrame({
         'Métrique': [
@@ -79,66 +217,33 @@ def generer_rapport(df, output_path):
         ],
         'Valeur': [
             len(df),
-            len(df[df['cas_automatique']]),
-            len(df[~df['cas_automatique']]),
-            len(df[df['type_changement'].apply(lambda x: any('variation' in str(v).lower() for v in x.values()))]),
-            len(df[df['type_changement'].apply(lambda x: any('changement' in str(v).lower() for v in x.values()))]),
-            len(df[df['decision_finale'].notna()]),
-            len(df[df['decision_finale'] == 'Conserver']),
-            len(df[df['decision_finale'] == 'Désactiver'])
+            int(automatique.sum()),
+            int((~automatique).sum()),
+            int(variation.sum()),
+            int(changement.sum()),
+            int(decision.notna().sum()),
+            int((decision == 'Conserver').sum()),
+            int((decision == 'Désactiver').sum())
         ]
     })
     
-    # 2. Tous les cas
+    # 2 à 6. Tous les cas, puis sélections des lignes (masques précalculés)
     all_cases = df.copy()
-    all_cases['Type de changement'] = all_cases['type_changement'].apply(
-        lambda x: ' | '.join(f"{k}: {v}" for k, v in x.items())
-    )
-    
-    # 3. Cas automatiques
-    auto_cases = df[df['cas_automatique']].copy()
-    auto_cases['Type de changement'] = auto_cases['type_changement'].apply(
-        lambda x: ' | '.join(f"{k}: {v}" for k, v in x.items())
-    )
-    
-    # 4. Cas à vérifier
-    manual_cases = df[~df['cas_automatique']].copy()
-    manual_cases['Type de changement'] = manual_cases['type_changement'].apply(
-        lambda x: ' | '.join(f"{k}: {v}" for k, v in x.items())
-    )
-    
-    # 5. Variations
-    variations = df[df['type_changement'].apply(
-        lambda x: any('variation' in str(v).lower() for v in x.values())
-    )].copy()
-    variations['Type de changement'] = variations['type_changement'].apply(
-        lambda x: ' | '.join(f"{k}: {v}" for k, v in x.items())
-    )
-    
-    # 6. Changements
-    changements = df[df['type_changement'].apply(
-        lambda x: any('changement' in str(v).lower() for v in x.values())
-    )].copy()
-    changements['Type de changement'] = changements['type_changement'].apply(
-        lambda x: ' | '.join(f"{k}: {v}" for k, v in x.items())
-    )
-    
-    # Écrire chaque feuille
-    summary.to_excel(writer, sheet_name='Résumé', index=False)
-    all_cases.to_excel(writer, sheet_name='Tous les cas', index=False)
-    auto_cases.to_excel(writer, sheet_name='Cas automatiques', index=False)
-    manual_cases.to_excel(writer, sheet_name='Cas à vérifier', index=False)
-    variations.to_excel(writer, sheet_name='Variations', index=False)
-    changements.to_excel(writer, sheet_name='Changements', index=False)
-    
-    # Ajuster la largeur des colonnes
-    for sheet_name in writer.sheets:
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(worksheet.columns):
-            max_length = max(
-                len(str(cell.value)) for cell in col
-            )
-            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
+    all_cases['Type de changement'] = libelles
+    feuilles = {
+        'Tous les cas': None,
+        'Cas automatiques': automatique,
+        'Cas à vérifier': ~automatique,
+        'Variations': variation,
+        'Changements': changement
+    }
+    longueurs = _longueurs_cellules(all_cases)
     
-    # Sauvegarder le fichier
-    writer.close()
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        summary.to_excel(writer, sheet_name='Résumé', index=False)
+        _ajuster_largeurs(writer.sheets['Résumé'], summary.columns, _longueurs_cellules(summary))
+        
+        for sheet_name, lignes in feuilles.items():
+            donnees = all_cases if lignes is None else all_cases[lignes]
+            donnees.to_excel(writer, sheet_name=sheet_name, index=False)
+            _ajuster_largeurs(writer.sheets[sheet_name], all_cases.columns, longueurs, lignes)
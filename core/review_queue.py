@@ -0,0 +1,120 @@
+"""
+File des cas à vérifier pendant la validation manuelle
+
+La file est construite une seule fois à partir de l'extraction : les
+positions des cas en attente sont chaînées (suivant / précédent) dans
+l'ordre de l'extraction, si bien que retirer le cas décidé et passer au
+cas suivant se font en temps constant, quelle que soit la taille de
+l'extraction. L'extraction reste la référence : un cas décidé ailleurs
+(decision_manuelle renseignée) est retiré de la file dès qu'il est atteint.
+"""
+
+import numpy as np
+from core.anomalies import masque_cas_a_verifier
+
+
+class ReviewQueue:
+    """Positions des cas en attente, cas courant et cas décidés"""
+
+    def __init__(self, df):
+        """
+        Args:
+            df: Extraction (ext_df) ; les positions sont celles de ses lignes
+        """
+        self.df = df
+        self.positions = np.flatnonzero(masque_cas_a_verifier(df).to_numpy(dtype=bool))
+        self.decided = np.zeros(len(df), dtype=bool)
+        self.total = len(self.positions)
+
+        # Liste doublement chaînée sur les rangs de self.positions (-1 = aucun)
+        rangs = np.arange(self.total)
+        self._suivant = np.where(rangs + 1 < self.total, rangs + 1, -1)
+        self._precedent = rangs - 1
+        self._tete = 0 if self.total else -1
+        self._courant = self._tete
+        self._restants = self.total
+        # Rang du cas courant parmi les cas restants
+        self.rank = 0
+        self._colonne_decision = df.columns.get_loc('decision_manuelle')
+        self._ecarter_decides()
+
+    def __len__(self):
+        return self._restants
+
+    def current(self):
+        """Position (iloc) du cas courant dans l'extraction, None si la file est vide"""
+        return None if self._courant < 0 else int(self.positions[self._courant])
+
+    def decide(self):
+        """Retirer le cas courant s'il a reçu une décision et revenir au premier cas en attente"""
+        if self._courant < 0:
+            return
+        if self._est_decide(self._courant):
+            self._retirer(self._courant)
+        self._courant = self._tete
+        self.rank = 0
+        self._ecarter_decides()
+
+    def skip(self):
+        """Passer au cas suivant sans décision (retour au premier après le dernier)"""
+        if self._courant < 0:
+            return
+        suivant = self._suivant[self._courant]
+        if suivant < 0:
+            self._courant = self._tete
+            self.rank = 0
+        else:
+            self._courant = suivant
+            self.rank += 1
+        self._ecarter_decides()
+
+    def seek(self, position):
+        """
+        Se placer sur le cas en position (reprise d'une session enregistrée)
+
+        Args:
+            position: Position (iloc) du cas ; premier cas en attente s'il
+                n'est plus dans la file
+        """
+        self._courant, self.rank = self._tete, 0
+        rang, rang_file = self._tete, 0
+        while rang >= 0:
+            if self.positions[rang] == position:
+                self._courant, self.rank = rang, rang_file
+                break
+            rang = self._suivant[rang]
+            rang_file += 1
+        self._ecarter_decides()
+
+    def is_decided(self, position):
+        """Le cas en position a-t-il été décidé depuis la construction de la file"""
+        return bool(self.decided[position])
+
+    def _est_decide(self, rang):
+        """Décision renseignée dans l'extraction pour le cas de ce rang"""
+        return self.df.iat[self.positions[rang], self._colonne_decision] != ""
+
+    def _retirer(self, rang):
+        """Détacher un rang de la chaîne et marquer son cas décidé"""
+        precedent, suivant = self._precedent[rang], self._suivant[rang]
+        if precedent >= 0:
+            self._suivant[precedent] = suivant
+        else:
+            self._tete = suivant
+        if suivant >= 0:
+            self._precedent[suivant] = precedent
+        self.decided[self.positions[rang]] = True
+        self._restants -= 1
+
+    def _ecarter_decides(self):
+        """Retirer les cas atteints qui ont reçu une décision hors de la file"""
+        while self._courant >= 0:
+            if not self._est_decide(self._courant):
+                return
+            suivant = self._suivant[self._courant]
+            self._retirer(self._courant)
+            if suivant < 0:
+                self._courant = self._tete
+                self.rank = 0
+            else:
+                self._courant = suivant
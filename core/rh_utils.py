@@ -1,20 +1,137 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
-from mapping.column_mapping import auto_rename_columns
-from config.constants import COLUMN_ALIASES
+from mapping.column_mapping import auto_rename_columns, column_mapping_cache
+from config.constants import COLUMN_ALIASES, CONFIG_PARAMS
+from core.excel_reader import lire_excel, COLONNES_RH
+from core.input_cache import chercher, memoriser
+from core.progress import TraitementAnnule
 
-def charger_et_preparer_rh(fichiers_rh):
-    dfs = []
+RH_MAX_WORKERS = CONFIG_PARAMS['performance']['rh_max_workers']
+
+def _preparer_fichier_rh(f):
+    df = lire_excel(f, COLONNES_RH)
+    df = auto_rename_columns(df, COLUMN_ALIASES)
+    if 'nom_prenom' not in df.columns or df['nom_prenom'].isnull().any():
+        if 'first_name' in df.columns and 'last_name' in df.columns:
+            df['nom_prenom'] = df['first_name'].fillna('') + ' ' + df['last_name'].fillna('')
+            df['nom_prenom'] = df['nom_prenom'].str.strip()
+        else:
+            df['nom_prenom'] = df['nom_prenom'].fillna('')
+    useful = [c for c in ['code_utilisateur', 'nom_prenom', 'profil', 'direction'] if c in df.columns]
+    return df[useful].copy()
+
+def _preparer_fichier_rh_chronometre(f):
+    """
+    Préparer un fichier RH (exécuté dans un processus du pool) et mesurer la durée
+
+    Returns:
+        tuple: (DataFrame, durée, associations de colonnes à fusionner dans
+            le cache du processus principal)
+    """
+    debut = time.perf_counter()
+    df = _preparer_fichier_rh(f)
+    return df, time.perf_counter() - debut, column_mapping_cache.a_transmettre()
+
+def _preparer_fichiers_rh(fichiers, max_workers, signaler):
+    """
+    Préparer plusieurs fichiers RH, en parallèle si possible
+
+    Args:
+        fichiers: Chemins des fichiers à préparer
+        max_workers: Nombre maximal de processus (0 ou 1 = séquentiel)
+        signaler: Fonction appelée avec (fichier, DataFrame, durée, erreur) ;
+            une TraitementAnnule levée par signaler interrompt la lecture
+    """
+    restants = list(fichiers)
+    if max_workers > 1 and len(fichiers) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(fichiers))) as pool:
+                futures = {f: pool.submit(_preparer_fichier_rh_chronometre, f) for f in fichiers}
+                try:
+                    for f, future in futures.items():
+                        try:
+                            df, duree, associations = future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            signaler(f, None, None, e)
+                        else:
+                            column_mapping_cache.fusionner(associations)
+                            signaler(f, df, duree, None)
+                        restants.remove(f)
+                except TraitementAnnule:
+                    # Annulation : les fichiers pas encore commencés ne sont pas lus
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        except (BrokenProcessPool, OSError) as e:
+            # Pool indisponible (environnement restreint) : lecture séquentielle
+            print(f"⚠️ Lecture parallèle indisponible ({e}), lecture séquentielle")
+
+    for f in restants:
+        try:
+            df, duree, _ = _preparer_fichier_rh_chronometre(f)
+        except Exception as e:
+            signaler(f, None, None, e)
+        else:
+            signaler(f, df, duree, None)
+
+def charger_et_preparer_rh(fichiers_rh, progress_callback=None, max_workers=None):
+    """
+    Charger et préparer les fichiers RH
+
+    Les fichiers absents du cache sont lus dans un pool de processus ; la
+    durée ou l'erreur de chaque fichier est transmise à progress_callback.
+
+    Args:
+        fichiers_rh: Chemins des fichiers RH
+        progress_callback: Fonction recevant un message par fichier (optionnel)
+        max_workers: Nombre maximal de processus (défaut : configuration)
+
+    Returns:
+        DataFrame: Données RH concaténées, dédupliquées par code utilisateur
+    """
+    if max_workers is None:
+        max_workers = RH_MAX_WORKERS
+
+    resultats = {}
+    erreurs = {}
+    cles = {}
+
+    def signaler(f, df, duree, erreur):
+        nom = os.path.basename(f)
+        if erreur is not None:
+            erreurs[f] = erreur
+            message = f"❌ {nom} : {erreur}"
+        else:
+            resultats[f] = df
+            memoriser(cles.get(f), df, f)
+            message = f"📄 {nom} chargé en {duree:.2f} s ({len(df)} lignes)"
+        if progress_callback is not None:
+            progress_callback(message)
+
+    # Fichiers déjà préparés : relus depuis le cache chiffré
+    a_preparer = []
     for f in fichiers_rh:
-        df = pd.read_excel(f)
-        df = auto_rename_columns(df, COLUMN_ALIASES)
-        if 'nom_prenom' not in df.columns or df['nom_prenom'].isnull().any():
-            if 'first_name' in df.columns and 'last_name' in df.columns:
-                df['nom_prenom'] = df['first_name'].fillna('') + ' ' + df['last_name'].fillna('')
-                df['nom_prenom'] = df['nom_prenom'].str.strip()
-            else:
-                df['nom_prenom'] = df['nom_prenom'].fillna('')
-        useful = [c for c in ['code_utilisateur', 'nom_prenom', 'profil', 'direction'] if c in df.columns]
-        df = df[useful].copy()
-        dfs.append(df)
+        if f in resultats or f in a_preparer:
+            continue
+        cles[f], df = chercher(f, 'rh')
+        if df is not None:
+            resultats[f] = df
+            if progress_callback is not None:
+                progress_callback(f"📄 {os.path.basename(f)} chargé depuis le cache ({len(df)} lignes)")
+        else:
+            a_preparer.append(f)
+
+    _preparer_fichiers_rh(a_preparer, max_workers, signaler)
+
+    if erreurs:
+        f, erreur = next((f, erreurs[f]) for f in fichiers_rh if f in erreurs)
+        raise ValueError(f"Erreur lors du chargement de {os.path.basename(f)}: {erreur}") from erreur
+
+    # Concaténation dans l'ordre des fichiers (le premier code rencontré est conservé)
+    dfs = [resultats[f] for f in fichiers_rh]
     rh_all = pd.concat(dfs).drop_duplicates('code_utilisateur')
-    return rh_all
\ No newline at end of file
+    return rh_all
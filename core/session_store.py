@@ -0,0 +1,304 @@
+"""
+Instantanés chiffrés des sessions de certification
+
+Une session est enregistrée en deux fichiers du dossier de données
+persistantes (sous-dossier sessions) :
+- <id>.session.enc : l'extraction traitée (ext_df) complète, écrite une fois
+  à la fin du traitement, avec les fichiers et le certificateur de la session
+- <id>.decisions.enc : les colonnes de décision et la position de revue,
+  réécrites après chaque lot de décisions (quelques colonnes seulement)
+
+Format : conteneur npz non compressé, un tableau par colonne. Les colonnes
+numériques, booléennes et de dates sont stockées telles quelles ; les
+colonnes de texte sont codées par dictionnaire (codes int32 et valeurs
+distinctes en UTF-8 concaténé avec leurs positions) ; les autres colonnes
+d'objets (dictionnaires de type_changement) sont sérialisées par pickle.
+Le conteneur est chiffré avec l'EncryptionManager (Fernet, donc authentifié).
+La réouverture ne relit ni ne prépare aucun fichier importé.
+"""
+
+import io
+import json
+import os
+import pickle
+import uuid
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config.constants import CONFIG_PARAMS
+from resource_path import get_persistent_data_path
+from security.encryption import encryption_manager
+
+# A incrémenter à chaque changement du format des instantanés
+SESSION_VERSION = 1
+
+SESSION_EXTENSION = '.session.enc'
+DECISIONS_EXTENSION = '.decisions.enc'
+
+# Colonnes modifiées pendant la revue, enregistrées après chaque lot de décisions
+COLONNES_DECISIONS = ['decision_manuelle', 'comment_certificateur']
+
+# Nombre de décisions entre deux sauvegardes automatiques
+SESSION_AUTOSAVE_BATCH = CONFIG_PARAMS['performance']['session_autosave_batch']
+
+_NUMPY_KINDS = 'biufcmM'
+
+
+def get_sessions_dir():
+    """Dossier des sessions (créé si nécessaire)"""
+    sessions_dir = os.path.join(get_persistent_data_path(), 'sessions')
+    os.makedirs(sessions_dir, exist_ok=True)
+    return sessions_dir
+
+
+def _session_path(session_id, extension):
+    return os.path.join(get_sessions_dir(), session_id + extension)
+
+
+def nouvel_identifiant():
+    """Identifiant d'une nouvelle session (date et suffixe aléatoire)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def session_existe(session_id):
+    """Vérifier qu'un instantané existe pour session_id"""
+    return bool(session_id) and os.path.exists(_session_path(session_id, SESSION_EXTENSION))
+
+
+# --- Codage en colonnes ---------------------------------------------------
+
+def _valeur_nulle(serie):
+    """Marqueur des valeurs nulles d'une colonne de texte (None si ambigu)"""
+    nulles = {type(v) for v in serie[serie.isna()]}
+    if not nulles:
+        return 'aucune'
+    if nulles == {type(None)}:
+        return 'none'
+    if nulles == {float}:
+        return 'nan'
+    return None
+
+
+def _coder_colonne(serie, prefixe, tableaux):
+    """
+    Coder une colonne dans tableaux (nom -> ndarray)
+
+    Returns:
+        dict: Description de la colonne (type de codage et dtype d'origine)
+    """
+    dtype = serie.dtype
+    description = {'dtype': str(dtype)}
+
+    if isinstance(dtype, np.dtype) and dtype.kind in _NUMPY_KINDS:
+        description['codage'] = 'numpy'
+        tableaux[prefixe] = serie.to_numpy()
+        return description
+
+    est_texte = dtype == object or pd.api.types.is_string_dtype(dtype)
+    nulle = _valeur_nulle(serie) if est_texte else None
+    # Types vérifiés sans hachage : une colonne de dictionnaires passe par pickle
+    if est_texte and nulle is not None and all(type(v) is str for v in serie.dropna()):
+        codes, valeurs = pd.factorize(serie, use_na_sentinel=True)
+        octets = [v.encode('utf-8') for v in valeurs]
+        positions = np.zeros(len(octets) + 1, dtype=np.int64)
+        np.cumsum([len(o) for o in octets], out=positions[1:])
+        description.update(codage='texte', nulle=nulle)
+        tableaux[prefixe + '.codes'] = codes.astype(np.int32)
+        tableaux[prefixe + '.utf8'] = np.frombuffer(b''.join(octets), dtype=np.uint8)
+        tableaux[prefixe + '.positions'] = positions
+        return description
+
+    description['codage'] = 'pickle'
+    tableaux[prefixe] = np.frombuffer(pickle.dumps(serie.tolist(), protocol=5), dtype=np.uint8)
+    return description
+
+
+def _decoder_colonne(description, prefixe, tableaux):
+    """
+    Valeurs d'une colonne codée par _coder_colonne
+
+    Returns:
+        ndarray: Valeurs, à convertir au dtype d'origine (voir _dtype_origine)
+    """
+    codage = description['codage']
+    if codage == 'numpy':
+        return tableaux[prefixe]
+
+    if codage == 'texte':
+        utf8 = tableaux[prefixe + '.utf8'].tobytes()
+        positions = tableaux[prefixe + '.positions']
+        valeurs = np.array(
+            [utf8[debut:fin].decode('utf-8') for debut, fin in zip(positions[:-1], positions[1:])] + [None],
+            dtype=object
+        )
+        if description['nulle'] == 'nan':
+            valeurs[-1] = np.nan
+        # Code -1 (valeur nulle) : dernier élément
+        return valeurs[tableaux[prefixe + '.codes']]
+
+    valeurs = pickle.loads(tableaux[prefixe].tobytes())
+    resultat = np.empty(len(valeurs), dtype=object)
+    resultat[:] = valeurs
+    return resultat
+
+
+def _dtype_origine(description):
+    """
+    dtype à restaurer explicitement (None pour un tableau numpy)
+
+    Sans lui, pandas convertirait une colonne d'objets texte en dtype str
+    (et ses None en NaN).
+    """
+    return None if description['codage'] == 'numpy' else description['dtype']
+
+
+def encoder_dataframe(df, meta=None):
+    """
+    Sérialiser un DataFrame au format colonnes (npz)
+
+    Args:
+        df: DataFrame à sérialiser
+        meta: Informations JSON conservées avec les données
+
+    Returns:
+        bytes: Conteneur npz
+    """
+    tableaux = {}
+    colonnes = []
+    for i, col in enumerate(df.columns):
+        description = _coder_colonne(df.iloc[:, i], f"c{i}", tableaux)
+        description['nom'] = col
+        colonnes.append(description)
+
+    if isinstance(df.index, pd.RangeIndex):
+        index = {'codage': 'range', 'start': df.index.start, 'stop': df.index.stop, 'step': df.index.step}
+    else:
+        index = _coder_colonne(pd.Series(df.index.to_numpy(), dtype=df.index.dtype), 'index', tableaux)
+
+    manifeste = {
+        'version': SESSION_VERSION,
+        'lignes': len(df),
+        'colonnes': colonnes,
+        'index': index,
+        'meta': meta or {},
+    }
+    tableaux['manifeste'] = np.frombuffer(json.dumps(manifeste).encode('utf-8'), dtype=np.uint8)
+    tableaux['attrs'] = np.frombuffer(pickle.dumps(df.attrs, protocol=5), dtype=np.uint8)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **tableaux)
+    return buffer.getvalue()
+
+
+def decoder_dataframe(data):
+    """
+    Relire un DataFrame sérialisé par encoder_dataframe
+
+    Returns:
+        tuple: (DataFrame, meta)
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        tableaux = {nom: npz[nom] for nom in npz.files}
+    manifeste = json.loads(tableaux['manifeste'].tobytes().decode('utf-8'))
+    if manifeste['version'] != SESSION_VERSION:
+        raise ValueError(f"Version d'instantané non prise en charge : {manifeste['version']}")
+
+    index = manifeste['index']
+    if index['codage'] == 'range':
+        index = pd.RangeIndex(index['start'], index['stop'], index['step'])
+    else:
+        index = pd.Index(_decoder_colonne(index, 'index', tableaux), dtype=_dtype_origine(index))
+
+    donnees = {
+        i: pd.Series(_decoder_colonne(description, f"c{i}", tableaux), index=index,
+                     dtype=_dtype_origine(description), copy=False)
+        for i, description in enumerate(manifeste['colonnes'])
+    }
+    df = pd.DataFrame(donnees, index=index)
+    df.columns = [description['nom'] for description in manifeste['colonnes']]
+    df.attrs = pickle.loads(tableaux['attrs'].tobytes())
+    return df, manifeste['meta']
+
+
+# --- Lecture et écriture des sessions ---------------------------------------
+
+def _ecrire(path, data):
+    """Écriture atomique d'un fichier chiffré"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(encryption_manager.encrypt_bytes(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _lire(path):
+    with open(path, 'rb') as f:
+        return encryption_manager.decrypt_bytes(f.read())
+
+
+def enregistrer_session(session_id, ext_df, meta):
+    """
+    Enregistrer l'instantané complet d'une session
+
+    Args:
+        session_id: Identifiant de la session (nouvel_identifiant)
+        ext_df: Extraction traitée
+        meta: Fichiers de la session, certificateur, etc. (JSON)
+    """
+    _ecrire(_session_path(session_id, SESSION_EXTENSION), encoder_dataframe(ext_df, meta))
+    enregistrer_decisions(session_id, ext_df)
+
+
+def enregistrer_decisions(session_id, ext_df, curseur=None):
+    """
+    Enregistrer les colonnes de décision et la position de revue d'une session
+
+    Args:
+        session_id: Identifiant de la session
+        ext_df: Extraction en cours de revue
+        curseur: Position (iloc) du cas affiché, None si aucun
+    """
+    colonnes = [c for c in COLONNES_DECISIONS if c in ext_df.columns]
+    meta = {'curseur': None if curseur is None else int(curseur)}
+    data = encoder_dataframe(ext_df[colonnes].reset_index(drop=True), meta)
+    _ecrire(_session_path(session_id, DECISIONS_EXTENSION), data)
+
+
+def charger_session(session_id):
+    """
+    Rouvrir une session : instantané complet et dernières décisions
+
+    Returns:
+        tuple: (ext_df, meta) ; meta['curseur'] est la position de revue
+    """
+    ext_df, meta = decoder_dataframe(_lire(_session_path(session_id, SESSION_EXTENSION)))
+    meta['curseur'] = None
+
+    decisions_path = _session_path(session_id, DECISIONS_EXTENSION)
+    if os.path.exists(decisions_path):
+        decisions, meta_decisions = decoder_dataframe(_lire(decisions_path))
+        if len(decisions) == len(ext_df):
+            for col in decisions.columns:
+                ext_df[col] = decisions[col].set_axis(ext_df.index)
+            meta['curseur'] = meta_decisions.get('curseur')
+    return ext_df, meta
+
+
+def purger_sessions(garder=()):
+    """
+    Supprimer les sessions qui ne sont pas dans garder (instantané,
+    décisions et journal des décisions)
+
+    Args:
+        garder: Identifiants des sessions à conserver (sessions récentes)
+    """
+    garder = set(garder)
+    sessions_dir = get_sessions_dir()
+    for name in os.listdir(sessions_dir):
+        session_id = name.split('.', 1)[0]
+        if session_id not in garder:
+            try:
+                os.remove(os.path.join(sessions_dir, name))
+            except OSError:
+                pass
@@ -0,0 +1,149 @@
+"""
+Écriture en flux des lignes du rapport dans le template Excel
+
+openpyxl sérialise chaque cellule en créant puis en écrivant un élément XML,
+ce qui domine la génération des gros rapports. Ici, le template (en-tête,
+styles, validations de données) est enregistré par openpyxl sans les lignes
+de données, puis les lignes sont ajoutées par blocs au XML de la feuille,
+avec exactement la même forme de cellule qu'openpyxl (chaînes en ligne,
+nombres, booléens, formules et codes d'erreur).
+"""
+
+import io
+import math
+import re
+import zipfile
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.compat.numbers import NUMERIC_TYPES
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+# Longueur maximale d'une chaîne dans une cellule Excel
+MAX_LONGUEUR_CHAINE = 32767
+
+_DIMENSION = re.compile(r'<dimension ref="[^"]*"\s*/>')
+_SHEETDATA_VIDE = re.compile(r'<sheetData\s*/>')
+
+
+def types_pris_en_charge(valeurs):
+    """Vérifier que toutes les valeurs peuvent être écrites en flux (texte, nombre, booléen, vide)"""
+    return all(
+        t is str or t is bool or t is type(None) or issubclass(t, NUMERIC_TYPES)
+        for t in set(map(type, valeurs))
+    )
+
+
+def _echapper(texte):
+    if '&' in texte:
+        texte = texte.replace('&', '&amp;')
+    if '<' in texte:
+        texte = texte.replace('<', '&lt;')
+    if '>' in texte:
+        texte = texte.replace('>', '&gt;')
+    return texte
+
+
+def _suffixe_chaine(valeur):
+    """Fin de l'élément <c> d'une chaîne (après l'attribut r)"""
+    valeur = valeur[:MAX_LONGUEUR_CHAINE]
+    if next(ILLEGAL_CHARACTERS_RE.finditer(valeur), None):
+        raise IllegalCharacterError(f"{valeur} cannot be used in worksheets.")
+    if len(valeur) > 1 and valeur.startswith('='):
+        return f'><f>{_echapper(valeur[1:])}</f><v /></c>'
+    if valeur in ERROR_CODES:
+        return f' t="e"><v>{_echapper(valeur)}</v></c>'
+    if valeur == '':
+        return ' t="inlineStr" />'
+    nettoye = valeur.strip()
+    espace = ' xml:space="preserve"' if nettoye and nettoye != valeur else ''
+    return f' t="inlineStr"><is><t{espace}>{_echapper(valeur)}</t></is></c>'
+
+
+def _suffixe_nombre(valeur):
+    """Fin de l'élément <c> d'un nombre (NaN et infinis écrits vides)"""
+    if math.isnan(valeur) or math.isinf(valeur):
+        return ' t="n"><v /></c>'
+    return f' t="n"><v>{"%.16g" % valeur}</v></c>'
+
+
+class _Colonne:
+    """Valeurs d'une colonne du template et sérialisation mémorisée des chaînes"""
+
+    def __init__(self, numero, valeurs):
+        self.lettre = get_column_letter(numero)
+        self.valeurs = valeurs
+        self._chaines = {}
+
+    def cellule(self, ligne, valeur):
+        """Élément <c> d'une valeur ('' pour une valeur vide, non écrite)"""
+        if valeur is None:
+            return ''
+        if type(valeur) is str:
+            suffixe = self._chaines.get(valeur)
+            if suffixe is None:
+                suffixe = self._chaines[valeur] = _suffixe_chaine(valeur)
+        elif type(valeur) is bool:
+            suffixe = f' t="b"><v>{int(valeur)}</v></c>'
+        else:
+            suffixe = _suffixe_nombre(valeur)
+        return f'<c r="{self.lettre}{ligne}"{suffixe}'
+
+
+def _lignes_xml(colonnes, nb_lignes, premiere_ligne, chunk_size):
+    """Lignes <row> de la feuille, par blocs de chunk_size lignes"""
+    colonnes = [_Colonne(numero, colonnes[numero]) for numero in sorted(colonnes)]
+    for debut in range(0, nb_lignes, chunk_size):
+        fin = min(debut + chunk_size, nb_lignes)
+        bloc = []
+        for position in range(debut, fin):
+            ligne = premiere_ligne + position
+            cellules = ''.join(c.cellule(ligne, c.valeurs[position]) for c in colonnes)
+            bloc.append(f'<row r="{ligne}">{cellules}</row>' if cellules else f'<row r="{ligne}" />')
+        yield ''.join(bloc), fin
+
+
+def ecrire_template(wb, ws, colonnes, nb_lignes, output_path, chunk_size=10000, progress_callback=None):
+    """
+    Enregistrer le template avec les lignes du rapport écrites en flux
+
+    Args:
+        wb: Classeur du template (chargé par openpyxl, sans lignes de données)
+        ws: Feuille recevant les lignes
+        colonnes: Numéro de colonne -> valeurs (une par ligne, à partir de la ligne 2)
+        nb_lignes: Nombre de lignes du rapport
+        output_path: Chemin du fichier Excel de sortie
+        chunk_size: Nombre de lignes sérialisées par bloc
+        progress_callback: Fonction appelée avec (lignes écrites, total) après chaque bloc
+    """
+    # Template seul (en-tête, styles, validations), enregistré par openpyxl
+    template = io.BytesIO()
+    wb.save(template)
+    feuille = ws.path.lstrip('/')
+
+    # Plage utilisée, calculée comme openpyxl (en-tête du template inclus)
+    dimension = "{}{}:{}{}".format(
+        get_column_letter(ws.min_column), ws.min_row,
+        get_column_letter(max([ws.max_column] + list(colonnes))),
+        nb_lignes + 1 if colonnes and nb_lignes else ws.max_row
+    )
+
+    with zipfile.ZipFile(template) as source, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as cible:
+        for info in source.infolist():
+            if info.filename != feuille:
+                cible.writestr(info, source.read(info.filename))
+                continue
+
+            xml = source.read(feuille).decode('utf-8')
+            xml = _DIMENSION.sub(f'<dimension ref="{dimension}" />', xml, count=1)
+            xml = _SHEETDATA_VIDE.sub('<sheetData></sheetData>', xml, count=1)
+            debut, fin = xml.split('</sheetData>', 1)
+
+            with cible.open(info.filename, 'w') as f:
+                f.write(debut.encode('utf-8'))
+                if colonnes:
+                    for bloc, ecrites in _lignes_xml(colonnes, nb_lignes, 2, chunk_size):
+                        f.write(bloc.encode('utf-8'))
+                        if progress_callback is not None:
+                            progress_callback(ecrites, nb_lignes)
+                f.write(('</sheetData>' + fin).encode('utf-8'))
@@ -3,13 +3,25 @@ Module centralisé pour la normalisation et le fuzzy matching des textes
 """
 
 import re
+import string
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from unidecode import unidecode
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from config.constants import CONFIG_PARAMS
 
 # Constantes
 SIMILARITY_THRESHOLD = CONFIG_PARAMS["thresholds"]["similarity"]
+SIMILARITY_CACHE_SIZE = CONFIG_PARAMS["performance"]["similarity_cache_size"]
+NORMALIZE_CACHE_SIZE = CONFIG_PARAMS["performance"]["normalize_cache_size"]
+
+# Bandes de score pour le scoring par lot
+BAND_DIFFERENT = 0  # score < seuil : différent
+BAND_GREY = 1       # seuil <= score < 95 : vérification sémantique nécessaire
+BAND_SIMILAR = 2    # score >= 95 : similaire
 
 # Mots à ignorer lors de la normalisation
 STOP_WORDS = {
@@ -42,6 +54,87 @@ ROLE_KEYWORDS = {
     'commercial', 'vendeur', 'acheteur', 'approvisionneur'
 }
 
+class TextNormalizer:
+    """
+    Normaliseur de texte précompilé
+
+    Produit exactement le même résultat que l'enchaînement historique
+    unidecode -> minuscules -> re.sub ponctuation -> re.sub espaces ->
+    abréviations -> mots non significatifs, mais en une seule passe :
+    - table de translittération (accents latins) puis table de ponctuation
+    - découpage sur les espaces et substitution des abréviations mot à mot
+    Les résultats sont mémorisés par texte brut pour la durée du processus.
+    """
+
+    # Plage couverte par la table d'accents (Latin-1 + Latin étendu A/B)
+    _PLAGE_ACCENTS = range(0x80, 0x250)
+
+    def __init__(self, abbreviations=ABBREVIATIONS, stop_words=STOP_WORDS, maxsize=NORMALIZE_CACHE_SIZE):
+        self.abbreviations = dict(abbreviations)
+        self.stop_words = frozenset(stop_words)
+        self._accents = str.maketrans({chr(c): unidecode(chr(c)) for c in self._PLAGE_ACCENTS})
+        # Tout caractère ASCII hors [a-z0-9] et espaces devient un espace
+        self._ponctuation = str.maketrans({
+            chr(c): ' ' for c in range(128)
+            if chr(c) not in string.ascii_lowercase + string.digits and not chr(c).isspace()
+        })
+        self._normaliser_memo = lru_cache(maxsize=maxsize)(self._normaliser)
+
+    def _normaliser(self, text, remove_stop_words):
+        """Normaliser un texte brut non nul (sans mémoïsation)"""
+        if not text.isascii():
+            text = text.translate(self._accents)
+            if not text.isascii():
+                text = unidecode(text)
+        words = text.lower().translate(self._ponctuation).split()
+
+        abbreviations = self.abbreviations
+        words = [abbreviations.get(w, w) for w in words]
+        if remove_stop_words:
+            stop_words = self.stop_words
+            words = [w for w in words if w not in stop_words]
+        return " ".join(words)
+
+    def normalize(self, text, remove_stop_words=True):
+        """
+        Normaliser un texte pour la comparaison
+
+        Args:
+            text: Texte à normaliser
+            remove_stop_words: Si True, supprime les mots non significatifs
+
+        Returns:
+            str: Texte normalisé
+        """
+        if pd.isnull(text):
+            return ""
+        return self._normaliser_memo(str(text), remove_stop_words)
+
+    def normalize_many(self, texts, remove_stop_words=True):
+        """
+        Normaliser une collection de textes
+
+        Args:
+            texts: Itérable de textes (liste, Series...)
+            remove_stop_words: Si True, supprime les mots non significatifs
+
+        Returns:
+            list: Textes normalisés, dans le même ordre
+        """
+        normalize = self.normalize
+        return [normalize(t, remove_stop_words) for t in texts]
+
+    def cache_info(self):
+        """Statistiques de la mémoïsation (hits, misses, taille)"""
+        return self._normaliser_memo.cache_info()
+
+    def clear(self):
+        """Vider la mémoïsation"""
+        self._normaliser_memo.cache_clear()
+
+# Instance globale
+text_normalizer = TextNormalizer()
+
 def normalize_text(text, remove_stop_words=True):
     """
     Normaliser un texte pour la comparaison
@@ -53,32 +146,20 @@ def normalize_text(text, remove_stop_words=True):
     Returns:
         str: Texte normalisé
     """
-    if pd.isnull(text):
-        return ""
-
-    # Convertir en string et retirer les accents
-    text = unidecode(str(text))
-
-    # Convertir en minuscules
-    text = text.lower()
-
-    # Retirer les caractères non alphanumériques (garder espaces)
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    return text_normalizer.normalize(text, remove_stop_words)
 
-    # Remplacer les espaces multiples par un seul espace
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    # Remplacer les abréviations
-    for abbr, full in ABBREVIATIONS.items():
-        text = re.sub(r'\b' + abbr + r'\b', full, text)
+def normalize_many(texts, remove_stop_words=True):
+    """
+    Normaliser une collection de textes
 
-    # Supprimer les mots non significatifs si demandé
-    if remove_stop_words:
-        words = text.split()
-        filtered_words = [w for w in words if w not in STOP_WORDS]
-        text = " ".join(filtered_words)
+    Args:
+        texts: Itérable de textes
+        remove_stop_words: Si True, supprime les mots non significatifs
 
-    return text
+    Returns:
+        list: Textes normalisés
+    """
+    return text_normalizer.normalize_many(texts, remove_stop_words)
 
 def normalize_column_name(name):
     """
@@ -121,9 +202,10 @@ def extract_key_concepts(text):
 
     return key_concepts
 
-def is_semantic_change(text1, text2):
+def _detecter_changement_semantique(text1, text2):
     """
     Détecter si deux textes représentent un changement sémantique significatif
+    (calcul brut, sans passer par le cache)
 
     Args:
         text1: Premier texte
@@ -148,6 +230,126 @@ def is_semantic_change(text1, text2):
 
     return False
 
+SimilarityEntry = namedtuple('SimilarityEntry', ['score', 'semantic_change', 'similar'])
+
+class SimilarityCache:
+    """
+    Cache LRU borné des comparaisons de libellés
+
+    Clé : paire (a, b) normalisée. Valeur : score fuzz.ratio, verdict de
+    changement sémantique et résultat de is_similar au seuil par défaut.
+    """
+
+    def __init__(self, maxsize=SIMILARITY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, a, b, a_normalized=None, b_normalized=None):
+        """
+        Obtenir (ou calculer) l'entrée de la paire (a, b)
+
+        Args:
+            a: Première chaîne brute (non nulle)
+            b: Deuxième chaîne brute (non nulle)
+            a_normalized: Version normalisée de a si déjà calculée
+            b_normalized: Version normalisée de b si déjà calculée
+
+        Returns:
+            SimilarityEntry: Score, changement sémantique et similarité
+        """
+        if a_normalized is None:
+            a_normalized = normalize_text(a)
+        if b_normalized is None:
+            b_normalized = normalize_text(b)
+        key = (a_normalized, b_normalized)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._compute(a, b, a_normalized, b_normalized)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _compute(a, b, a_normalized, b_normalized):
+        """Calculer l'entrée d'une paire absente du cache"""
+        score = fuzz.ratio(a_normalized, b_normalized)
+        semantic_change = _detecter_changement_semantique(a, b)
+        similar = _decider_similarite(score, semantic_change, SIMILARITY_THRESHOLD)
+        return SimilarityEntry(score, semantic_change, similar)
+
+    def clear(self):
+        """Vider le cache et remettre les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques d'utilisation du cache
+
+        Returns:
+            dict: Taille, taille maximale, hits, misses et taux de hits
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+def _decider_similarite(score, semantic_change, threshold):
+    """Appliquer les règles de similarité à une paire déjà scorée"""
+    # Si identiques après normalisation (score 100) ou score très élevé (>95),
+    # considérer comme similaire
+    if score >= 95:
+        return True
+
+    # Si le score est dans la zone grise (threshold-95), vérifier la sémantique
+    if score >= threshold:
+        # Changement de poste réel ou simple variation de libellé
+        return not semantic_change
+
+    return False
+
+# Instance globale
+similarity_cache = SimilarityCache()
+
+def is_semantic_change(text1, text2):
+    """
+    Détecter si deux textes représentent un changement sémantique significatif
+
+    Args:
+        text1: Premier texte
+        text2: Deuxième texte
+
+    Returns:
+        bool: True si changement sémantique significatif
+    """
+    if pd.isnull(text1) or pd.isnull(text2):
+        return False
+    return similarity_cache.get(text1, text2).semantic_change
+
 def is_similar(a, b, threshold=SIMILARITY_THRESHOLD):
     """
     Vérifier si deux chaînes sont similaires en tenant compte de la sémantique
@@ -163,29 +365,11 @@ def is_similar(a, b, threshold=SIMILARITY_THRESHOLD):
     if pd.isnull(a) or pd.isnull(b):
         return False
 
-    # Normaliser pour la comparaison
-    a_normalized = normalize_text(a)
-    b_normalized = normalize_text(b)
-
-    # Si identiques après normalisation, c'est similaire
-    if a_normalized == b_normalized:
-        return True
-
-    # Calculer le score de similarité sur les versions normalisées
-    similarity_score = fuzz.ratio(a_normalized, b_normalized)
-
-    # Si le score est très élevé (>95), considérer comme similaire
-    if similarity_score >= 95:
-        return True
+    entry = similarity_cache.get(a, b)
+    if threshold == SIMILARITY_THRESHOLD:
+        return entry.similar
 
-    # Si le score est dans la zone grise (threshold-95), vérifier la sémantique
-    if similarity_score >= threshold:
-        # Vérifier s'il y a un changement sémantique significatif
-        if is_semantic_change(a, b):
-            return False  # Changement de poste réel
-        return True  # Simple variation de libellé
-
-    return False
+    return _decider_similarite(entry.score, entry.semantic_change, threshold)
 
 def get_similarity_score(a, b):
     """
@@ -201,7 +385,82 @@ def get_similarity_score(a, b):
     if pd.isnull(a) or pd.isnull(b):
         return 0.0
 
-    a_normalized = normalize_text(a)
-    b_normalized = normalize_text(b)
+    return similarity_cache.get(a, b).score
+
+def similarity_bands(scores, threshold=SIMILARITY_THRESHOLD):
+    """
+    Classer des scores dans les bandes de similarité
+
+    Args:
+        scores: Tableau de scores (0-100)
+        threshold: Seuil de similarité (0-100)
 
-    return fuzz.ratio(a_normalized, b_normalized)
\ No newline at end of file
+    Returns:
+        np.ndarray: BAND_SIMILAR, BAND_GREY ou BAND_DIFFERENT pour chaque score
+    """
+    scores = np.asarray(scores)
+    bands = np.full(scores.shape, BAND_DIFFERENT, dtype=np.int8)
+    bands[scores >= threshold] = BAND_GREY
+    bands[scores >= 95] = BAND_SIMILAR
+    return bands
+
+def score_pairs(values_a, values_b, workers=-1):
+    """
+    Scorer des paires (a[i], b[i]) en un minimum d'appels natifs
+
+    Chaque paire distincte (après normalisation) est scorée une seule fois,
+    en un appel process.cpdist (scores deux à deux des listes alignées :
+    temps et mémoire linéaires), puis les scores sont diffusés aux paires.
+
+    Args:
+        values_a: Premières valeurs des paires
+        values_b: Deuxièmes valeurs des paires
+        workers: Nombre de threads rapidfuzz (-1 = tous les cœurs)
+
+    Returns:
+        np.ndarray: Score de chaque paire (NaN si une des valeurs est nulle)
+    """
+    values_a = pd.Series(values_a, dtype=object).reset_index(drop=True)
+    values_b = pd.Series(values_b, dtype=object).reset_index(drop=True)
+    scores = np.full(len(values_a), np.nan)
+
+    valides = (values_a.notna() & values_b.notna()).to_numpy()
+    if not valides.any():
+        return scores
+
+    paires = pd.DataFrame({
+        'a': normalize_many(values_a[valides]),
+        'b': normalize_many(values_b[valides]),
+    })
+    codes = paires.groupby(['a', 'b'], sort=False).ngroup().to_numpy()
+    _, premieres = np.unique(codes, return_index=True)
+
+    distinctes = process.cpdist(
+        paires['a'].iloc[premieres].tolist(), paires['b'].iloc[premieres].tolist(),
+        scorer=fuzz.ratio, dtype=np.float64, workers=workers
+    )
+    scores[valides] = distinctes[codes]
+    return scores
+
+def is_similar_many(values_a, values_b, threshold=SIMILARITY_THRESHOLD):
+    """
+    Version par lot de is_similar sur des paires (a[i], b[i])
+
+    Args:
+        values_a: Premières valeurs des paires
+        values_b: Deuxièmes valeurs des paires
+        threshold: Seuil de similarité (0-100)
+
+    Returns:
+        np.ndarray: Booléens, identiques à is_similar(a[i], b[i], threshold)
+    """
+    values_a = list(values_a)
+    values_b = list(values_b)
+    scores = score_pairs(values_a, values_b)
+    bands = similarity_bands(np.nan_to_num(scores, nan=-1.0), threshold)
+
+    similaires = bands == BAND_SIMILAR
+    # Zone grise : seule la vérification sémantique tranche
+    for i in np.flatnonzero(bands == BAND_GREY):
+        similaires[i] = not is_semantic_change(values_a[i], values_b[i])
+    return similaires
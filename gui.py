@@ -5,6 +5,7 @@ avec thème très sombre sans glassmorphism
 """
 
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPalette, QColor
@@ -64,4 +65,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Requis pour le pool de processus (lecture RH) dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
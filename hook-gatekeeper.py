@@ -23,22 +23,38 @@ for module in project_modules:
 # Ajouter les imports cachés spécifiques
 hiddenimports += [
     'core.anomalies',
+    'core.date_parsing',
+    'core.decision_journal',
+    'core.excel_reader',
+    'core.export',
     'core.ext_utils',
+    'core.identity_matching',
+    'core.input_cache',
     'core.manual_review',
     'core.match_utils',
+    'core.progress',
     'core.report',
+    'core.review_queue',
     'core.rh_utils',
+    'core.session_store',
+    'core.template_writer',
     'core.text_utils',
     'mapping.column_mapping',
     'mapping.directions_conservees',
     'mapping.profils_valides',
+    'mapping.whitelist_index',
+    'mapping.whitelist_writer',
+    'mapping.whitelist_repository',
     'config.constants',
     'ui.main_window',
+    'ui.models.anomalies_table_model',
+    'ui.models.row_filter',
     'ui.pages.loading_page',
     'ui.pages.anomalies_page',
     'ui.pages.validation_page',
     'ui.pages.report_page',
     'ui.threads.processing_thread',
+    'ui.threads.report_thread',
     'ui.widgets.stat_widget',
     'ui.widgets.file_drop_widget',
     'ui.styles',
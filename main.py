@@ -1,10 +1,11 @@
+import multiprocessing
 import typer
 from core.rh_utils import charger_et_preparer_rh
 from core.ext_utils import charger_et_preparer_ext
 from core.match_utils import associer_rh_aux_utilisateurs
 from core.anomalies import detecter_anomalies, extraire_cas_a_verifier, extraire_cas_automatiques
 from core.manual_review import traiter_cas_manuels
-from core.report import inject_to_template
+from core.export import exporter_rapport
 from security.encryption import encryption_manager
 
 # Mapping centralisé des décisions
@@ -33,7 +34,7 @@ def run(
     rh_files: str = typer.Option(..., help="Fichiers RH, séparés par une virgule"),
     ext_file: str = typer.Option(..., help="Fichier d'extraction applicative"),
     template_file: str = typer.Option(..., help="Template Excel"),
-    output_file: str = typer.Option(..., help="Fichier de rapport à générer"),
+    output_file: str = typer.Option(..., help="Fichier de rapport à générer (.xlsx, .csv ou .parquet)"),
     cert_name: str = typer.Option(..., help="Nom du certificateur"),
 ):
     # NOUVELLE LIGNE: Initialiser le chiffrement
@@ -41,7 +42,7 @@ def run(
     # Chargement et préparation des données
     print("📁 Chargement des fichiers...")
     rh_paths = [p.strip() for p in rh_files.split(",")]
-    rh_df = charger_et_preparer_rh(rh_paths)
+    rh_df = charger_et_preparer_rh(rh_paths, progress_callback=lambda m: print(f"   {m}"))
     ext_df = charger_et_preparer_ext(ext_file)
     
     # Association et détection d'anomalies
@@ -84,8 +85,8 @@ def run(
     if len(anomalies_sans_decision) > 0:
         print(f"⚠️  Attention: {len(anomalies_sans_decision)} cas sans décision!")
     
-    # Injection dans le template
-    inject_to_template(ext_df, template_file, output_file, certificateur=cert_name)
+    # Injection dans le template (ou export CSV / Parquet selon l'extension)
+    exporter_rapport(ext_df, output_file, template_path=template_file, certificateur=cert_name)
     
     print(f"\n✅ Rapport généré avec succès: {output_file}")
     print(f"   - Total des lignes: {len(ext_df)}")
@@ -94,4 +95,6 @@ def run(
     print(f"   - Comptes à désactiver: {len(ext_df[ext_df['decision_manuelle'] == 'Désactiver'])}")
 
 if __name__ == "__main__":
+    # Requis pour le pool de processus (lecture RH) dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     app()
\ No newline at end of file
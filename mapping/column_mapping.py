@@ -1,5 +1,31 @@
-from config.constants import COLUMN_ALIASES
-from core.text_utils import normalize_column_name, is_similar
+"""
+Association des colonnes des fichiers importés aux noms canoniques
+
+Le renommage résolu pour une suite d'en-têtes est mémorisé par signature
+(empreinte des en-têtes normalisés, des alias et du seuil) et conservé avec
+les listes blanches : un format d'export déjà rencontré est associé sans
+aucun calcul. Pour un format inconnu, les colonnes sans alias exact sont
+rapprochées de l'index des alias par process.extract, puis confirmées par
+is_similar dans l'ordre des scores.
+
+Seul le processus principal écrit le fichier : les associations résolues
+dans un processus de lecture (fichiers RH en parallèle) lui sont transmises
+avec le fichier lu (a_transmettre / fusionner).
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from rapidfuzz import fuzz, process
+from config.constants import COLUMN_ALIASES, CONFIG_PARAMS
+from core.text_utils import normalize_column_name, normalize_many, normalize_text, is_similar
+from resource_path import persistent_data_path
+
+MAPPING_CACHE_PATH = persistent_data_path("column_mappings.json")
+MAPPING_CACHE_MAX_ENTRIES = CONFIG_PARAMS['performance']['column_mapping_cache_max_entries']
 
 
 def load_column_aliases(path=None):
@@ -10,6 +36,189 @@ def load_column_aliases(path=None):
     return COLUMN_ALIASES
 
 
+def _empreinte(*parties):
+    """Empreinte SHA-256 d'une structure sérialisable en JSON"""
+    return hashlib.sha256(json.dumps(parties, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AliasIndex:
+    """Alias normalisés -> nom canonique, avec les textes de recherche approchée"""
+
+    def __init__(self, col_aliases):
+        self.alias_map = {}
+        for canon, variants in col_aliases.items():
+            for v in variants:
+                self.alias_map[normalize_column_name(v)] = canon
+            self.alias_map[normalize_column_name(canon)] = canon
+        self.keys = list(self.alias_map.keys())
+        # Textes comparés par is_similar, normalisés une fois pour toutes
+        self.choices = normalize_many(self.keys)
+
+    def resolve(self, key, threshold):
+        """
+        Nom canonique d'un en-tête normalisé
+
+        Args:
+            key: En-tête normalisé (normalize_column_name)
+            threshold: Seuil de similarité (0-100)
+
+        Returns:
+            str: Nom canonique, ou None si aucun alias ne correspond
+        """
+        # 1. Correspondance exacte
+        if key in self.alias_map:
+            return self.alias_map[key]
+        # 2. Alias au-dessus du seuil, du plus proche au plus éloigné : le premier
+        # confirmé par la vérification sémantique l'emporte (is_similar exige
+        # un score d'au moins threshold, aucun autre alias ne peut convenir)
+        candidats = process.extract(
+            normalize_text(key), self.choices, scorer=fuzz.ratio,
+            processor=None, score_cutoff=threshold, limit=None
+        )
+        for _, _, position in candidats:
+            alias_key = self.keys[position]
+            if is_similar(key, alias_key, threshold):
+                return self.alias_map[alias_key]
+        return None
+
+
+class ColumnMappingCache:
+    """Renommages résolus par signature d'en-têtes, persistés dans un fichier JSON"""
+
+    def __init__(self, path=MAPPING_CACHE_PATH, max_entries=MAPPING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = None
+        self._indexes = {}
+        self._lock = threading.Lock()
+        # Associations résolues dans un processus de lecture, à transmettre au principal
+        self._a_transmettre = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        """Entrées sur disque, lues au premier accès seulement"""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def _limiter(self):
+        """Retirer les entrées les plus anciennes au-delà de max_entries"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _enregistrer(self, nouvelles):
+        """
+        Persister de nouvelles entrées (déjà ajoutées en mémoire)
+
+        Dans un processus de lecture, elles sont seulement gardées pour être
+        transmises au processus principal : le fichier n'a qu'un écrivain.
+        """
+        if multiprocessing.parent_process() is not None:
+            self._a_transmettre.update(nouvelles)
+            return
+        self._save()
+
+    def a_transmettre(self):
+        """
+        Associations résolues dans ce processus de lecture depuis le dernier appel
+
+        Returns:
+            dict: Signature -> noms canoniques (vide dans le processus principal)
+        """
+        with self._lock:
+            nouvelles, self._a_transmettre = self._a_transmettre, {}
+        return nouvelles
+
+    def fusionner(self, nouvelles):
+        """
+        Ajouter les associations transmises par un processus de lecture
+
+        Args:
+            nouvelles: Résultat de a_transmettre dans le processus de lecture
+        """
+        if not nouvelles:
+            return
+        with self._lock:
+            entries = self._load()
+            entries.update(nouvelles)
+            self._limiter()
+            self._enregistrer(nouvelles)
+
+    def _save(self):
+        """Écriture atomique du fichier (propre à chaque processus avant renommage)"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Impossible d'enregistrer les associations de colonnes: {e}")
+
+    def alias_index(self, col_aliases):
+        """Index des alias, construit une fois par jeu d'alias"""
+        digest = _empreinte(col_aliases)
+        with self._lock:
+            index = self._indexes.get(digest)
+        if index is None:
+            index = AliasIndex(col_aliases)
+            with self._lock:
+                self._indexes[digest] = index
+        return index, digest
+
+    def resolve(self, columns, col_aliases, threshold):
+        """
+        Noms canoniques d'une suite d'en-têtes
+
+        Args:
+            columns: En-têtes du fichier
+            col_aliases: Alias par nom canonique
+            threshold: Seuil de similarité (0-100)
+
+        Returns:
+            list: Nom canonique de chaque en-tête (None si non associé)
+        """
+        keys = [normalize_column_name(c) for c in columns]
+        index, digest = self.alias_index(col_aliases)
+        signature = _empreinte(digest, threshold, keys)
+
+        with self._lock:
+            entries = self._load()
+            targets = entries.get(signature)
+            if targets is not None:
+                entries.move_to_end(signature)
+                self.hits += 1
+                return targets
+            self.misses += 1
+
+        targets = [index.resolve(key, threshold) for key in keys]
+
+        with self._lock:
+            entries[signature] = targets
+            self._limiter()
+            self._enregistrer({signature: targets})
+        return targets
+
+    def clear(self):
+        """Oublier les renommages mémorisés (en mémoire et sur disque)"""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._a_transmettre = {}
+            self.hits = 0
+            self.misses = 0
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+# Instance globale
+column_mapping_cache = ColumnMappingCache()
+
+
 def auto_rename_columns(df, col_aliases=None, threshold=85):
     """
     Renommer automatiquement les colonnes selon les alias
@@ -17,31 +226,9 @@ def auto_rename_columns(df, col_aliases=None, threshold=85):
     if col_aliases is None:
         col_aliases = COLUMN_ALIASES
 
-    alias_map = {}
-    canon_names = set()
-    for canon, variants in col_aliases.items():
-        canon_names.add(canon)
-        for v in variants:
-            alias_map[normalize_column_name(v)] = canon
-        alias_map[normalize_column_name(canon)] = canon
-
-    all_keys = list(alias_map.keys())
+    targets = column_mapping_cache.resolve(list(df.columns), col_aliases, threshold)
     new_cols = {}
-    for c in df.columns:
-        key = normalize_column_name(c)
-        # 1. Correspondance exacte
-        if key in alias_map:
-            new_cols[c] = alias_map[key]
-            continue
-        # 2. Fuzzy matching sur les alias connus
-        best_score = 0
-        best_canon = None
-        for alias_key in all_keys:
-            if is_similar(key, alias_key, threshold):
-                best_canon = alias_map[alias_key]
-                break
-        if best_canon:
-            new_cols[c] = best_canon
-        else:
-            new_cols[c] = c  # Pas de mapping trouvé, garder le nom original
-    return df.rename(columns=new_cols)
\ No newline at end of file
+    for c, canon in zip(df.columns, targets):
+        # Pas de mapping trouvé : garder le nom original
+        new_cols[c] = canon if canon else c
+    return df.rename(columns=new_cols)
@@ -1,16 +1,20 @@
 import pandas as pd
 from datetime import datetime
 import os
-from core.text_utils import is_semantic_change
 from resource_path import persistent_data_path
 from security.encryption import encryption_manager
+from mapping.whitelist_index import WhitelistIndex, TYPE_VARIATION, TYPE_CHANGEMENT
+from mapping.whitelist_writer import whitelist_writer
+from mapping.whitelist_repository import WhitelistRepository
 
 CSV_VARIATIONS_DIR = persistent_data_path("variations_directions.csv")
 CSV_CHANGEMENTS_DIR = persistent_data_path("changements_directions.csv")
 CSV_WHITELIST_DIR = persistent_data_path("directions_conservees.csv")
 
-def charger_variations_directions(path=CSV_VARIATIONS_DIR):
-    """Charger les variations d'écriture des directions connues avec déchiffrement"""
+SUBSET_DIRECTIONS = ['direction_extraction', 'direction_rh']
+
+def _lire_variations_directions(path=CSV_VARIATIONS_DIR):
+    """Charger les variations d'écriture des directions connues avec déchiffrement (fichier sur disque)"""
     if not encryption_manager.is_initialized():
         # Fallback: charger en mode non chiffré si pas initialisé
         if os.path.exists(path):
@@ -19,8 +23,14 @@ def charger_variations_directions(path=CSV_VARIATIONS_DIR):
     
     return encryption_manager.load_encrypted_csv(path)
 
-def charger_changements_directions(path=CSV_CHANGEMENTS_DIR):
-    """Charger les changements réels de directions validés avec déchiffrement"""
+def charger_variations_directions(path=CSV_VARIATIONS_DIR):
+    """Charger les variations d'écriture des directions connues avec déchiffrement, ajouts en attente d'écriture inclus"""
+    if path == CSV_VARIATIONS_DIR:
+        return _depot_directions.variations()
+    return whitelist_writer.merge_pending(path, _lire_variations_directions(path), SUBSET_DIRECTIONS)
+
+def _lire_changements_directions(path=CSV_CHANGEMENTS_DIR):
+    """Charger les changements réels de directions validés avec déchiffrement (fichier sur disque)"""
     if not encryption_manager.is_initialized():
         # Fallback: charger en mode non chiffré si pas initialisé
         if os.path.exists(path):
@@ -29,6 +39,22 @@ def charger_changements_directions(path=CSV_CHANGEMENTS_DIR):
     
     return encryption_manager.load_encrypted_csv(path)
 
+def charger_changements_directions(path=CSV_CHANGEMENTS_DIR):
+    """Charger les changements réels de directions validés avec déchiffrement, ajouts en attente d'écriture inclus"""
+    if path == CSV_CHANGEMENTS_DIR:
+        return _depot_directions.changements()
+    return whitelist_writer.merge_pending(path, _lire_changements_directions(path), SUBSET_DIRECTIONS)
+
+# Dépôt chargé une seule fois : lectures et déchiffrements évités à chaque appel
+_depot_directions = WhitelistRepository(
+    CSV_VARIATIONS_DIR, CSV_CHANGEMENTS_DIR, 'direction_extraction', 'direction_rh',
+    _lire_variations_directions, _lire_changements_directions
+)
+
+def invalider_directions():
+    """Forcer la relecture des fichiers de directions au prochain accès"""
+    _depot_directions.invalidate()
+
 def charger_directions_conservees(path=CSV_WHITELIST_DIR):
     """Charger toutes les directions validées (compatibilité)"""
     variations = charger_variations_directions()
@@ -42,6 +68,15 @@ def charger_directions_conservees(path=CSV_WHITELIST_DIR):
     
     return all_directions
 
+def charger_index_directions():
+    """
+    Obtenir l'index en mémoire des directions validées (construit une seule fois)
+
+    Returns:
+        WhitelistIndex: Index (libellé extraction, libellé RH) -> type
+    """
+    return _depot_directions.index()
+
 def classifier_changement_direction(direction_ext, direction_rh):
     """
     Classifier un changement de direction
@@ -49,23 +84,8 @@ def classifier_changement_direction(direction_ext, direction_rh):
     Returns:
         tuple: (type, est_connu) où type est 'variation', 'changement' ou None
     """
-    # Vérifier si c'est une variation connue
-    variations = charger_variations_directions()
-    if len(variations[(variations['direction_extraction'] == direction_ext) & 
-                     (variations['direction_rh'] == direction_rh)]) > 0:
-        return ('variation', True)
-    
-    # Vérifier si c'est un changement connu
-    changements = charger_changements_directions()
-    if len(changements[(changements['direction_extraction'] == direction_ext) & 
-                      (changements['direction_rh'] == direction_rh)]) > 0:
-        return ('changement', True)
-    
-    # Analyser sémantiquement
-    if is_semantic_change(direction_ext, direction_rh):
-        return ('changement', False)
-    else:
-        return ('variation', False)
+    # Recherche dans l'index en mémoire, puis analyse sémantique
+    return _depot_directions.classify(direction_ext, direction_rh)
 
 def ajouter_direction_valide(row, certificateur, path=CSV_WHITELIST_DIR):
     """Ajouter une direction validée en distinguant le type"""
@@ -81,7 +101,6 @@ def ajouter_direction_valide(row, certificateur, path=CSV_WHITELIST_DIR):
 
 def ajouter_variation_direction(row, certificateur, path=CSV_VARIATIONS_DIR):
     """Ajouter une variation d'écriture de direction avec chiffrement"""
-    variations = charger_variations_directions(path)
     nv = {
         "direction_extraction": row['direction'],
         "direction_rh": row['direction_rh'],
@@ -89,18 +108,14 @@ def ajouter_variation_direction(row, certificateur, path=CSV_VARIATIONS_DIR):
         "certificateur": certificateur,
         "type_variation": "ecriture"
     }
-    variations = pd.concat([variations, pd.DataFrame([nv])], ignore_index=True)
-    variations.drop_duplicates(subset=['direction_extraction', 'direction_rh'], inplace=True)
-    
-    # Sauvegarder avec chiffrement si disponible
-    if encryption_manager.is_initialized():
-        encryption_manager.save_encrypted_csv(variations, path)
+    # Écriture différée : une seule écriture chiffrée pour tous les ajouts
+    if path == CSV_VARIATIONS_DIR:
+        _depot_directions.add(path, nv, row['direction'], row['direction_rh'], TYPE_VARIATION)
     else:
-        variations.to_csv(path, index=False)
+        whitelist_writer.add(path, nv, SUBSET_DIRECTIONS, _lire_variations_directions)
 
 def ajouter_changement_direction(row, certificateur, type_changement="evolution", path=CSV_CHANGEMENTS_DIR):
     """Ajouter un changement réel de direction avec chiffrement"""
-    changements = charger_changements_directions(path)
     nv = {
         "direction_extraction": row['direction'],
         "direction_rh": row['direction_rh'],
@@ -108,20 +123,27 @@ def ajouter_changement_direction(row, certificateur, type_changement="evolution"
         "certificateur": certificateur,
         "type_changement": type_changement
     }
-    changements = pd.concat([changements, pd.DataFrame([nv])], ignore_index=True)
-    changements.drop_duplicates(subset=['direction_extraction', 'direction_rh'], inplace=True)
-    
-    # Sauvegarder avec chiffrement si disponible
-    if encryption_manager.is_initialized():
-        encryption_manager.save_encrypted_csv(changements, path)
+    # Écriture différée : une seule écriture chiffrée pour tous les ajouts
+    if path == CSV_CHANGEMENTS_DIR:
+        _depot_directions.add(path, nv, row['direction'], row['direction_rh'], TYPE_CHANGEMENT)
     else:
-        changements.to_csv(path, index=False)
+        whitelist_writer.add(path, nv, SUBSET_DIRECTIONS, _lire_changements_directions)
 
 def est_direction_conservee(row, directions_conservees=None):
-    """Vérifier si un changement de direction est déjà validé"""
+    """
+    Vérifier si un changement de direction est déjà validé
+
+    Args:
+        row: Ligne portant 'direction' et 'direction_rh'
+        directions_conservees: WhitelistIndex, DataFrame (compatibilité) ou None pour
+            utiliser l'index en mémoire courant
+    """
     if directions_conservees is None:
-        directions_conservees = charger_directions_conservees()
-    
+        directions_conservees = charger_index_directions()
+
+    if isinstance(directions_conservees, WhitelistIndex):
+        return directions_conservees.contains(row['direction'], row['direction_rh'])
+
     f = (
         (directions_conservees['direction_extraction'] == row['direction']) &
         (directions_conservees['direction_rh'] == row['direction_rh'])
@@ -1,16 +1,20 @@
 import pandas as pd
 from datetime import datetime
 import os
-from core.text_utils import is_semantic_change
 from resource_path import persistent_data_path
 from security.encryption import encryption_manager
+from mapping.whitelist_index import WhitelistIndex, TYPE_VARIATION, TYPE_CHANGEMENT
+from mapping.whitelist_writer import whitelist_writer
+from mapping.whitelist_repository import WhitelistRepository
 
 CSV_VARIATIONS = persistent_data_path("variations_profils.csv")
 CSV_CHANGEMENTS = persistent_data_path("changements_profils.csv")
 CSV_WHITELIST = persistent_data_path("profils_valides.csv")
 
-def charger_variations_profils(path=CSV_VARIATIONS):
-    """Charger les variations d'écriture connues avec déchiffrement"""
+SUBSET_PROFILS = ['profil_extraction', 'profil_rh']
+
+def _lire_variations_profils(path=CSV_VARIATIONS):
+    """Charger les variations d'écriture connues avec déchiffrement (fichier sur disque)"""
     if not encryption_manager.is_initialized():
         # Fallback: charger en mode non chiffré si pas initialisé
         if os.path.exists(path):
@@ -19,8 +23,14 @@ def charger_variations_profils(path=CSV_VARIATIONS):
     
     return encryption_manager.load_encrypted_csv(path)
 
-def charger_changements_profils(path=CSV_CHANGEMENTS):
-    """Charger les changements réels validés avec déchiffrement"""
+def charger_variations_profils(path=CSV_VARIATIONS):
+    """Charger les variations d'écriture connues avec déchiffrement, ajouts en attente d'écriture inclus"""
+    if path == CSV_VARIATIONS:
+        return _depot_profils.variations()
+    return whitelist_writer.merge_pending(path, _lire_variations_profils(path), SUBSET_PROFILS)
+
+def _lire_changements_profils(path=CSV_CHANGEMENTS):
+    """Charger les changements réels validés avec déchiffrement (fichier sur disque)"""
     if not encryption_manager.is_initialized():
         # Fallback: charger en mode non chiffré si pas initialisé
         if os.path.exists(path):
@@ -29,6 +39,22 @@ def charger_changements_profils(path=CSV_CHANGEMENTS):
     
     return encryption_manager.load_encrypted_csv(path)
 
+def charger_changements_profils(path=CSV_CHANGEMENTS):
+    """Charger les changements réels validés avec déchiffrement, ajouts en attente d'écriture inclus"""
+    if path == CSV_CHANGEMENTS:
+        return _depot_profils.changements()
+    return whitelist_writer.merge_pending(path, _lire_changements_profils(path), SUBSET_PROFILS)
+
+# Dépôt chargé une seule fois : lectures et déchiffrements évités à chaque appel
+_depot_profils = WhitelistRepository(
+    CSV_VARIATIONS, CSV_CHANGEMENTS, 'profil_extraction', 'profil_rh',
+    _lire_variations_profils, _lire_changements_profils
+)
+
+def invalider_profils():
+    """Forcer la relecture des fichiers de profils au prochain accès"""
+    _depot_profils.invalidate()
+
 def charger_profils_valides(path=CSV_WHITELIST):
     """Charger tous les profils validés (compatibilité)"""
     variations = charger_variations_profils()
@@ -42,6 +68,15 @@ def charger_profils_valides(path=CSV_WHITELIST):
     
     return all_profils
 
+def charger_index_profils():
+    """
+    Obtenir l'index en mémoire des profils validés (construit une seule fois)
+
+    Returns:
+        WhitelistIndex: Index (libellé extraction, libellé RH) -> type
+    """
+    return _depot_profils.index()
+
 def classifier_changement_profil(profil_ext, profil_rh):
     """
     Classifier un changement de profil
@@ -49,23 +84,8 @@ def classifier_changement_profil(profil_ext, profil_rh):
     Returns:
         tuple: (type, est_connu) où type est 'variation', 'changement' ou None
     """
-    # Vérifier si c'est une variation connue
-    variations = charger_variations_profils()
-    if len(variations[(variations['profil_extraction'] == profil_ext) & 
-                     (variations['profil_rh'] == profil_rh)]) > 0:
-        return ('variation', True)
-    
-    # Vérifier si c'est un changement connu
-    changements = charger_changements_profils()
-    if len(changements[(changements['profil_extraction'] == profil_ext) & 
-                      (changements['profil_rh'] == profil_rh)]) > 0:
-        return ('changement', True)
-    
-    # Analyser sémantiquement
-    if is_semantic_change(profil_ext, profil_rh):
-        return ('changement', False)
-    else:
-        return ('variation', False)
+    # Recherche dans l'index en mémoire, puis analyse sémantique
+    return _depot_profils.classify(profil_ext, profil_rh)
 
 def ajouter_profil_valide(row, certificateur, path=CSV_WHITELIST):
     """Ajouter un profil validé en distinguant le type"""
@@ -81,7 +101,6 @@ def ajouter_profil_valide(row, certificateur, path=CSV_WHITELIST):
 
 def ajouter_variation_profil(row, certificateur, path=CSV_VARIATIONS):
     """Ajouter une variation d'écriture avec chiffrement"""
-    variations = charger_variations_profils(path)
     nv = {
         "profil_extraction": row['profil'],
         "profil_rh": row['profil_rh'],
@@ -89,18 +108,14 @@ def ajouter_variation_profil(row, certificateur, path=CSV_VARIATIONS):
         "certificateur": certificateur,
         "type_variation": "ecriture"
     }
-    variations = pd.concat([variations, pd.DataFrame([nv])], ignore_index=True)
-    variations.drop_duplicates(subset=['profil_extraction', 'profil_rh'], inplace=True)
-    
-    # Sauvegarder avec chiffrement si disponible
-    if encryption_manager.is_initialized():
-        encryption_manager.save_encrypted_csv(variations, path)
+    # Écriture différée : une seule écriture chiffrée pour tous les ajouts
+    if path == CSV_VARIATIONS:
+        _depot_profils.add(path, nv, row['profil'], row['profil_rh'], TYPE_VARIATION)
     else:
-        variations.to_csv(path, index=False)
+        whitelist_writer.add(path, nv, SUBSET_PROFILS, _lire_variations_profils)
 
 def ajouter_changement_profil(row, certificateur, type_changement="evolution", path=CSV_CHANGEMENTS):
     """Ajouter un changement réel avec chiffrement"""
-    changements = charger_changements_profils(path)
     nv = {
         "profil_extraction": row['profil'],
         "profil_rh": row['profil_rh'],
@@ -108,20 +123,27 @@ def ajouter_changement_profil(row, certificateur, type_changement="evolution", p
         "certificateur": certificateur,
         "type_changement": type_changement
     }
-    changements = pd.concat([changements, pd.DataFrame([nv])], ignore_index=True)
-    changements.drop_duplicates(subset=['profil_extraction', 'profil_rh'], inplace=True)
-    
-    # Sauvegarder avec chiffrement si disponible
-    if encryption_manager.is_initialized():
-        encryption_manager.save_encrypted_csv(changements, path)
+    # Écriture différée : une seule écriture chiffrée pour tous les ajouts
+    if path == CSV_CHANGEMENTS:
+        _depot_profils.add(path, nv, row['profil'], row['profil_rh'], TYPE_CHANGEMENT)
     else:
-        changements.to_csv(path, index=False)
+        whitelist_writer.add(path, nv, SUBSET_PROFILS, _lire_changements_profils)
 
 def est_changement_profil_valide(row, profils_valides=None):
-    """Vérifier si un changement est déjà validé"""
+    """
+    Vérifier si un changement est déjà validé
+
+    Args:
+        row: Ligne portant 'profil' et 'profil_rh'
+        profils_valides: WhitelistIndex, DataFrame (compatibilité) ou None pour
+            utiliser l'index en mémoire courant
+    """
     if profils_valides is None:
-        profils_valides = charger_profils_valides()
-    
+        profils_valides = charger_index_profils()
+
+    if isinstance(profils_valides, WhitelistIndex):
+        return profils_valides.contains(row['profil'], row['profil_rh'])
+
     f = (
         (profils_valides['profil_extraction'] == row['profil']) &
         (profils_valides['profil_rh'] == row['profil_rh'])
@@ -0,0 +1,87 @@
+"""
+Index en mémoire des listes blanches (profils et directions)
+
+Remplace le filtrage d'un DataFrame complet par une recherche O(1) dans un
+dictionnaire clé (libellé extraction, libellé RH) -> type de validation.
+"""
+
+import pandas as pd
+
+TYPE_VARIATION = 'variation'
+TYPE_CHANGEMENT = 'changement'
+
+
+class WhitelistIndex:
+    """Index (libellé extraction, libellé RH) -> 'variation' ou 'changement'"""
+
+    def __init__(self, col_extraction, col_rh):
+        self.col_extraction = col_extraction
+        self.col_rh = col_rh
+        self._types = {}
+
+    @classmethod
+    def from_dataframes(cls, variations, changements, col_extraction, col_rh):
+        """
+        Construire l'index à partir des DataFrames de variations et de changements
+
+        Args:
+            variations: DataFrame des variations d'écriture
+            changements: DataFrame des changements réels
+            col_extraction: Nom de la colonne du libellé extraction
+            col_rh: Nom de la colonne du libellé RH
+
+        Returns:
+            WhitelistIndex: Index construit
+        """
+        index = cls(col_extraction, col_rh)
+        # Les changements d'abord : une variation connue reste prioritaire
+        index.add_dataframe(changements, TYPE_CHANGEMENT)
+        index.add_dataframe(variations, TYPE_VARIATION)
+        return index
+
+    def add_dataframe(self, df, type_validation):
+        """Ajouter toutes les paires d'un DataFrame de liste blanche"""
+        if df is None or df.empty:
+            return
+        if self.col_extraction not in df.columns or self.col_rh not in df.columns:
+            return
+        for ext, rh in zip(df[self.col_extraction], df[self.col_rh]):
+            self.add(ext, rh, type_validation)
+
+    def add(self, ext, rh, type_validation):
+        """
+        Ajouter une paire à l'index
+
+        Une paire absente des comparaisons pandas (valeur nulle) n'est pas
+        indexée, et une variation n'est jamais écrasée par un changement.
+        """
+        if pd.isnull(ext) or pd.isnull(rh):
+            return
+        key = (ext, rh)
+        if type_validation == TYPE_CHANGEMENT and key in self._types:
+            return
+        self._types[key] = type_validation
+
+    def type_of(self, ext, rh):
+        """
+        Type de validation d'une paire
+
+        Returns:
+            str: 'variation', 'changement' ou None si la paire est inconnue
+        """
+        try:
+            return self._types.get((ext, rh))
+        except TypeError:
+            # Valeur non hashable : jamais présente dans la liste blanche
+            return None
+
+    def contains(self, ext, rh):
+        """Vérifier si une paire est présente dans la liste blanche"""
+        return self.type_of(ext, rh) is not None
+
+    def __contains__(self, key):
+        ext, rh = key
+        return self.contains(ext, rh)
+
+    def __len__(self):
+        return len(self._types)
@@ -0,0 +1,125 @@
+"""
+Dépôt des listes blanches chargé une seule fois en mémoire
+
+Chaque fichier (variations, changements) est lu et déchiffré au plus une fois
+jusqu'à invalidation explicite. Les ajouts passent par l'écriture différée
+(whitelist_writer) et mettent à jour l'index en mémoire, de sorte que la
+classification d'une paire se résume à une recherche dans un dictionnaire.
+"""
+
+from core.text_utils import is_semantic_change
+from mapping.whitelist_index import WhitelistIndex, TYPE_VARIATION, TYPE_CHANGEMENT
+from mapping.whitelist_writer import whitelist_writer
+
+# Dépôts instanciés, pour l'invalidation globale
+_repositories = []
+
+
+class WhitelistRepository:
+    """Variations et changements validés d'un type de libellé (profil, direction)"""
+
+    def __init__(self, variations_path, changements_path, col_extraction, col_rh,
+                 read_variations, read_changements):
+        self.variations_path = variations_path
+        self.changements_path = changements_path
+        self.col_extraction = col_extraction
+        self.col_rh = col_rh
+        self.subset = [col_extraction, col_rh]
+        self._readers = {
+            variations_path: read_variations,
+            changements_path: read_changements
+        }
+        self._snapshots = {}
+        self._index = None
+        self._lock = whitelist_writer.lock
+        # Nombre de lectures de fichiers effectuées, au total et par fichier (instrumentation)
+        self.reads = 0
+        self.reads_by_path = {}
+        _repositories.append(self)
+
+    def snapshot(self, path):
+        """
+        Contenu sur disque d'un fichier, lu au premier accès seulement
+
+        Args:
+            path: Chemin du fichier de variations ou de changements
+
+        Returns:
+            DataFrame: Contenu du fichier (hors ajouts en attente)
+        """
+        with self._lock:
+            if path not in self._snapshots:
+                self._snapshots[path] = self._readers[path](path)
+                self.reads += 1
+                self.reads_by_path[path] = self.reads_by_path.get(path, 0) + 1
+            return self._snapshots[path]
+
+    def variations(self):
+        """Variations d'écriture, ajouts en attente inclus"""
+        return whitelist_writer.merge_pending(
+            self.variations_path, self.snapshot(self.variations_path), self.subset
+        )
+
+    def changements(self):
+        """Changements réels, ajouts en attente inclus"""
+        return whitelist_writer.merge_pending(
+            self.changements_path, self.snapshot(self.changements_path), self.subset
+        )
+
+    def index(self):
+        """Index (libellé extraction, libellé RH) -> type, construit une fois"""
+        with self._lock:
+            if self._index is None:
+                self._index = WhitelistIndex.from_dataframes(
+                    self.variations(), self.changements(), self.col_extraction, self.col_rh
+                )
+            return self._index
+
+    def classify(self, ext, rh):
+        """
+        Classifier un changement de libellé
+
+        Returns:
+            tuple: (type, est_connu) où type est 'variation' ou 'changement'
+        """
+        type_connu = self.index().type_of(ext, rh)
+        if type_connu is not None:
+            return (type_connu, True)
+
+        # Analyser sémantiquement
+        if is_semantic_change(ext, rh):
+            return (TYPE_CHANGEMENT, False)
+        return (TYPE_VARIATION, False)
+
+    def add(self, path, row, ext, rh, type_validation):
+        """
+        Ajouter une ligne validée : écriture différée et mise à jour de l'index
+
+        Args:
+            path: Fichier cible (variations ou changements)
+            row: Dictionnaire de la ligne à écrire
+            ext: Libellé extraction
+            rh: Libellé RH
+            type_validation: 'variation' ou 'changement'
+        """
+        with self._lock:
+            whitelist_writer.add(path, row, self.subset, self.snapshot, self._saved)
+            if self._index is not None:
+                self._index.add(ext, rh, type_validation)
+
+    def _saved(self, path, df):
+        """Mettre à jour l'instantané après une écriture différée"""
+        with self._lock:
+            self._snapshots[path] = df
+
+    def invalidate(self):
+        """Oublier les fichiers chargés : ils seront relus au prochain accès"""
+        with self._lock:
+            self._snapshots.clear()
+            self._index = None
+
+
+def invalidate_all():
+    """Invalider tous les dépôts (changement d'utilisateur, effacement des données)"""
+    for repository in _repositories:
+        repository.invalidate()
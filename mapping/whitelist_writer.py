@@ -0,0 +1,142 @@
+"""
+Écriture différée (write-behind) des listes blanches
+
+Les ajouts de variations / changements sont accumulés en mémoire puis écrits
+en une seule opération (un chiffrement, une écriture atomique par fichier) :
+- à la fin de la détection des anomalies
+- après un délai suivant le premier ajout en attente
+- à la fermeture de l'application (ou du processus)
+"""
+
+import atexit
+import os
+import threading
+import pandas as pd
+from config.constants import CONFIG_PARAMS
+from security.encryption import encryption_manager
+
+FLUSH_DELAY = CONFIG_PARAMS['performance']['whitelist_flush_delay_s']
+
+
+def save_csv(df, path):
+    """
+    Sauvegarder une liste blanche de manière atomique
+
+    Chiffrée si le gestionnaire de chiffrement est initialisé, en clair sinon.
+    Le contenu est écrit dans un fichier temporaire puis renommé.
+    """
+    if encryption_manager.is_initialized():
+        encryption_manager.save_encrypted_csv(df, path)
+        return
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class WhitelistWriter:
+    """Tampon des ajouts aux listes blanches, vidé en une écriture par fichier"""
+
+    def __init__(self, delay=FLUSH_DELAY):
+        self.delay = delay
+        self._pending = {}
+        # Verrou partagé avec les dépôts de listes blanches (ordre de verrouillage unique)
+        self.lock = threading.RLock()
+        self._timer = None
+
+    def add(self, path, row, subset, reader, on_saved=None):
+        """
+        Mettre en attente une nouvelle ligne de liste blanche
+
+        Args:
+            path: Chemin du fichier de liste blanche
+            row: Dictionnaire de la ligne à ajouter
+            subset: Colonnes de déduplication
+            reader: Fonction de lecture du fichier sur disque (path -> DataFrame)
+            on_saved: Fonction appelée avec (path, DataFrame) après écriture
+        """
+        with self.lock:
+            entry = self._pending.setdefault(path, {'rows': [], 'subset': subset, 'reader': reader, 'on_saved': on_saved})
+            entry['rows'].append(row)
+            self._schedule()
+
+    def pending(self, path):
+        """Lignes en attente d'écriture pour un fichier"""
+        with self.lock:
+            entry = self._pending.get(path)
+            return list(entry['rows']) if entry else []
+
+    def merge_pending(self, path, df, subset):
+        """
+        Ajouter à un DataFrame lu sur disque les lignes encore en attente
+
+        Returns:
+            DataFrame: Contenu tel qu'il sera après la prochaine écriture
+        """
+        rows = self.pending(path)
+        if not rows:
+            return df
+        merged = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
+        merged.drop_duplicates(subset=subset, inplace=True)
+        return merged
+
+    def has_pending(self):
+        """Vérifier s'il reste des ajouts non écrits"""
+        with self.lock:
+            return any(entry['rows'] for entry in self._pending.values())
+
+    def flush(self):
+        """Écrire toutes les lignes en attente (une écriture par fichier)"""
+        with self.lock:
+            self._cancel_timer()
+            pending, self._pending = self._pending, {}
+
+            for path, entry in pending.items():
+                if not entry['rows']:
+                    continue
+                try:
+                    df = entry['reader'](path)
+                    df = pd.concat([df, pd.DataFrame(entry['rows'])], ignore_index=True)
+                    df.drop_duplicates(subset=entry['subset'], inplace=True)
+                    save_csv(df, path)
+                    if entry['on_saved'] is not None:
+                        entry['on_saved'](path, df)
+                except Exception as e:
+                    # Conserver les lignes pour une prochaine tentative
+                    print(f"⚠️ Erreur lors de l'écriture de {os.path.basename(path)}: {e}")
+                    retry = self._pending.setdefault(path, dict(entry, rows=[]))
+                    retry['rows'][:0] = entry['rows']
+
+    def discard(self):
+        """Abandonner les ajouts en attente (ex: effacement des listes blanches)"""
+        with self.lock:
+            self._cancel_timer()
+            self._pending = {}
+
+    def _schedule(self):
+        """Programmer une écriture différée si aucune n'est prévue"""
+        if self._timer is not None or not self.delay:
+            return
+        self._timer = threading.Timer(self.delay, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        with self.lock:
+            self._timer = None
+        self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+# Instance globale
+whitelist_writer = WhitelistWriter()
+
+# Dernière chance d'écriture à la sortie du processus
+atexit.register(whitelist_writer.flush)
@@ -121,6 +121,39 @@ class EncryptionManager:
         except Exception as e:
             raise ValueError(f"Erreur de déchiffrement: {e}")
     
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """
+        Chiffrer des données binaires
+        
+        Args:
+            data: Données en clair
+            
+        Returns:
+            Données chiffrées
+        """
+        if self._cipher is None:
+            raise ValueError("EncryptionManager not initialized")
+        
+        return self._cipher.encrypt(data)
+    
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """
+        Déchiffrer des données binaires
+        
+        Args:
+            encrypted_data: Données chiffrées
+            
+        Returns:
+            Données en clair
+        """
+        if self._cipher is None:
+            raise ValueError("EncryptionManager not initialized")
+        
+        try:
+            return self._cipher.decrypt(encrypted_data)
+        except Exception as e:
+            raise ValueError(f"Erreur de déchiffrement: {e}")
+    
     def save_encrypted_csv(self, df: pd.DataFrame, file_path: str) -> None:
         """
         Sauvegarder un DataFrame chiffré
@@ -135,10 +168,14 @@ class EncryptionManager:
         # Chiffrer
         encrypted_data = self.encrypt_csv_data(csv_content)
         
-        # Sauvegarder avec extension .enc
+        # Sauvegarder avec extension .enc (fichier temporaire puis renommage atomique)
         encrypted_file_path = file_path + '.enc'
-        with open(encrypted_file_path, 'wb') as f:
+        tmp_file_path = encrypted_file_path + '.tmp'
+        with open(tmp_file_path, 'wb') as f:
             f.write(encrypted_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, encrypted_file_path)
         
         # Supprimer l'ancien fichier non chiffré s'il existe
         if os.path.exists(file_path):
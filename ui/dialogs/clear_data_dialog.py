@@ -9,7 +9,7 @@ class ClearDataDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Effacer les données mémorisées")
         self.setModal(True)
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 330)
         self.setup_ui()
     
     def setup_ui(self):
@@ -30,11 +30,13 @@ class ClearDataDialog(QDialog):
         self.check_profiles = QCheckBox("Profils validés (whitelist)")
         self.check_directions = QCheckBox("Directions conservées")
         self.check_variations = QCheckBox("Variations d'écriture")
+        self.check_cache = QCheckBox("Fichiers importés (cache)")
         
         group_layout.addWidget(self.check_recent)
         group_layout.addWidget(self.check_profiles)
         group_layout.addWidget(self.check_directions)
         group_layout.addWidget(self.check_variations)
+        group_layout.addWidget(self.check_cache)
         
         # Tout sélectionner
         self.check_all = QCheckBox("Tout sélectionner")
@@ -64,6 +66,7 @@ class ClearDataDialog(QDialog):
         self.check_profiles.setChecked(checked)
         self.check_directions.setChecked(checked)
         self.check_variations.setChecked(checked)
+        self.check_cache.setChecked(checked)
     
     def get_selected_items(self):
         """Récupérer les éléments sélectionnés"""
@@ -76,4 +79,6 @@ class ClearDataDialog(QDialog):
             items.append("Directions conservées")
         if self.check_variations.isChecked():
             items.append("Variations d'écriture")
+        if self.check_cache.isChecked():
+            items.append("Fichiers importés (cache)")
         return items 
\ No newline at end of file
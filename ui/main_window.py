@@ -20,7 +20,7 @@ from ui.pages.anomalies_page import AnomaliesPage
 from ui.pages.validation_page import ValidationPage
 from ui.pages.report_page import ReportPage
 from ui.pages.login_page import LoginWindow
-from ui.threads.processing_thread import ProcessingThread
+from ui.threads.processing_thread import ProcessingThread, LIBELLES_ETAPES
 from ui.utils import (save_recent_files, load_recent_files, show_about_dialog,
                      show_documentation_dialog, show_question_message, 
                      show_error_message)
@@ -29,6 +29,14 @@ from resource_path import persistent_data_path
 from security.auth.auth_manager import auth_manager
 from security.auth.user_store import user_store
 from security.encryption import encryption_manager
+from mapping.whitelist_writer import whitelist_writer
+from mapping.whitelist_repository import invalidate_all as invalider_listes_blanches
+from core.input_cache import vider_cache as vider_cache_import
+from core.progress import formater_duree
+from core.session_store import (nouvel_identifiant, enregistrer_session, enregistrer_decisions,
+                                charger_session, session_existe, purger_sessions)
+from core.decision_journal import decision_journal
+from mapping.column_mapping import column_mapping_cache
 
 
 class CertificateurApp(QMainWindow):
@@ -56,6 +64,11 @@ class CertificateurApp(QMainWindow):
         self.rh_paths = []
         self.ext_path = ""
         self.template_path = ""
+        # Instantané de la session en cours (core.session_store), None si aucun
+        self.session_id = None
+        self.processing_thread = None
+        # Traitements annulés encore en cours d'arrêt (gardés jusqu'à leur fin)
+        self.cancelled_threads = []
         
         # Settings pour persistance
         self.settings = QSettings("Gatekeeper", "Certificateur")
@@ -90,6 +103,8 @@ class CertificateurApp(QMainWindow):
         
         # Initialiser le chiffrement avec l'utilisateur connecté
         encryption_manager.initialize(username)
+        # Les listes blanches en mémoire ont pu être déchiffrées avec une autre clé
+        invalider_listes_blanches()
         
         # Fermer la fenêtre de login
         if hasattr(self, 'login_window'):
@@ -187,8 +202,14 @@ class CertificateurApp(QMainWindow):
         """Effacer les données sélectionnées"""
         import os
         
+        # Écrire d'abord les ajouts en attente pour qu'ils soient effacés avec le reste
+        whitelist_writer.flush()
+        
         if "Historique des fichiers récents" in items:
             self.settings.remove("recent_files")
+            decision_journal.fermer()
+            purger_sessions()
+            self.session_id = None
             self.update_recent_menu()
         
         if "Profils validés (whitelist)" in items:
@@ -211,6 +232,13 @@ class CertificateurApp(QMainWindow):
                 path = persistent_data_path(f)
                 if os.path.exists(path):
                     os.remove(path)
+        
+        if "Fichiers importés (cache)" in items:
+            vider_cache_import()
+            column_mapping_cache.clear()
+        
+        # Relire les listes blanches au prochain accès
+        invalider_listes_blanches()
     
     def create_file_menu(self, menubar):
         """Créer le menu Fichier"""
@@ -249,6 +277,11 @@ class CertificateurApp(QMainWindow):
             
             file_menu.addSeparator()
         
+        # Compacter le journal des décisions de la session (journal complet archivé)
+        compact_journal_action = QAction('Compacter le journal des décisions', self)
+        compact_journal_action.triggered.connect(self.compact_decision_journal)
+        file_menu.addAction(compact_journal_action)
+        
         # Effacer les données mémorisées
         clear_data_action = QAction('Effacer les données mémorisées...', self)
         clear_data_action.triggered.connect(self.show_clear_data_dialog)
@@ -370,6 +403,7 @@ class CertificateurApp(QMainWindow):
         if step == 2:
             self.validation_page.show_current_case(self.ext_df)
         elif step == 3:
+            self.autosave_session()
             self.report_page.update_page(self.ext_df)
     
     def process_data(self):
@@ -386,18 +420,23 @@ class CertificateurApp(QMainWindow):
         self.loading_page.process_button.setText("⏳ Traitement en cours...")
         self.loading_page.process_button.setEnabled(False)
         
-        # Afficher la progression
+        # Afficher la progression (pour mille de l'avancement global)
         self.loading_page.progress_bar.setVisible(True)
         self.loading_page.progress_label.setVisible(True)
-        self.loading_page.progress_bar.setRange(0, 0)  # Mode indéterminé
+        self.loading_page.progress_bar.setRange(0, 1000)
+        self.loading_page.progress_bar.setValue(0)
+        self.loading_page.cancel_button.setVisible(True)
+        self.loading_page.cancel_button.setEnabled(True)
         
         # Créer et lancer le thread
+        self.cancelled_threads = [t for t in self.cancelled_threads if t.isRunning()]
         self.processing_thread = ProcessingThread(
             self.rh_paths, 
             self.ext_path, 
             self.certificateur
         )
         self.processing_thread.progress.connect(self.update_progress)
+        self.processing_thread.progress_value.connect(self.update_progress_value)
         self.processing_thread.finished.connect(self.processing_finished)
         self.processing_thread.error.connect(self.processing_error)
         self.processing_thread.start()
@@ -407,20 +446,66 @@ class CertificateurApp(QMainWindow):
         self.loading_page.progress_label.setText(message)
         self.show_status_message(message, 0)
     
+    def update_progress_value(self, etape, traites, total, avancement, restant):
+        """Mettre à jour la barre de progression et le temps restant estimé"""
+        self.loading_page.progress_bar.setValue(int(avancement * 1000))
+        libelle, unite = LIBELLES_ETAPES.get(etape, ("", ""))
+        message = f"{libelle} {traites:,}/{total:,} {unite} – {avancement:.0%}".replace(",", " ")
+        if restant >= 0:
+            message += f" – reste ~{formater_duree(restant)}"
+        self.show_status_message(message, 0)
+    
+    def cancel_processing(self):
+        """Annuler le traitement en cours et libérer ses données"""
+        thread = self.processing_thread
+        if thread is None or not thread.isRunning():
+            return
+        thread.cancel()
+        # Résultats du thread ignorés : il s'arrête au prochain bloc
+        for signal in (thread.progress, thread.progress_value, thread.finished, thread.error):
+            signal.disconnect()
+        self.cancelled_threads.append(thread)
+        self.processing_thread = None
+        
+        self.hide_processing_progress()
+        self.loading_page.process_button.setEnabled(True)
+        self.show_status_message("⏹️ Traitement annulé", 3000)
+    
+    def hide_processing_progress(self):
+        """Masquer la progression du traitement et restaurer le bouton"""
+        self.loading_page.progress_bar.setVisible(False)
+        self.loading_page.progress_label.setVisible(False)
+        self.loading_page.cancel_button.setVisible(False)
+        self.loading_page.process_button.setText("🚀 Lancer le traitement")
+    
     def processing_finished(self, ext_df):
         """Traitement terminé avec succès"""
+        if self.sender() in self.cancelled_threads:
+            return
         self.ext_df = ext_df
+        self.processing_thread = None
         
         # Masquer la progression
-        self.loading_page.progress_bar.setVisible(False)
-        self.loading_page.progress_label.setVisible(False)
-        
-        # Restaurer le bouton
-        self.loading_page.process_button.setText("🚀 Lancer le traitement")
+        self.hide_processing_progress()
         
         # Message de succès
         self.show_status_message("✅ Traitement terminé avec succès!", 3000)
         
+        # Instantané de la session, rouvert depuis les fichiers récents sans retraitement
+        self.session_id = nouvel_identifiant()
+        try:
+            enregistrer_session(self.session_id, ext_df, {
+                "rh_files": self.rh_paths,
+                "ext_file": self.ext_path,
+                "template_file": self.template_path,
+                "certificateur": self.certificateur,
+            })
+        except Exception as e:
+            # Session non enregistrée : le traitement reste utilisable
+            print(f"Erreur lors de l'enregistrement de la session: {e}")
+            self.session_id = None
+        decision_journal.ouvrir(self.session_id)
+        
         # Sauvegarder comme fichiers récents
         self.save_current_session()
         
@@ -432,9 +517,10 @@ class CertificateurApp(QMainWindow):
     
     def processing_error(self, error_message):
         """Erreur lors du traitement"""
-        self.loading_page.progress_bar.setVisible(False)
-        self.loading_page.progress_label.setVisible(False)
-        self.loading_page.process_button.setText("🚀 Lancer le traitement")
+        if self.sender() in self.cancelled_threads:
+            return
+        self.processing_thread = None
+        self.hide_processing_progress()
         self.loading_page.process_button.setEnabled(True)
         
         show_error_message(
@@ -455,8 +541,13 @@ class CertificateurApp(QMainWindow):
             if reply != QMessageBox.StandardButton.Yes:
                 return
         
+        # Conserver les dernières décisions de la session avant de la quitter
+        self.autosave_session()
+        decision_journal.fermer()
+        
         # Réinitialiser toutes les variables
         self.ext_df = None
+        self.session_id = None
         self.certificateur = ""
         self.rh_paths = []
         self.ext_path = ""
@@ -486,10 +577,40 @@ class CertificateurApp(QMainWindow):
             self.rh_paths,
             self.ext_path,
             self.template_path,
-            self.certificateur
+            self.certificateur,
+            self.session_id
         )
+        # Instantanés sortis de l'historique supprimés
+        purger_sessions(recent.get("session") for recent in load_recent_files(self.settings))
         self.update_recent_menu()
     
+    def autosave_session(self):
+        """Enregistrer les décisions et le cas affiché de la session en cours"""
+        if self.session_id is None or self.ext_df is None:
+            return
+        queue = self.validation_page.review_queue
+        curseur = queue.current() if queue is not None and queue.df is self.ext_df else None
+        try:
+            decision_journal.synchroniser()
+            enregistrer_decisions(self.session_id, self.ext_df, curseur)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde automatique de la session: {e}")
+    
+    def compact_decision_journal(self):
+        """Compacter le journal des décisions de la session en cours"""
+        if decision_journal.path is None:
+            self.show_status_message("Aucun journal des décisions ouvert", 3000)
+            return
+        try:
+            archive_path = decision_journal.compacter()
+        except (OSError, ValueError) as e:
+            show_error_message(self, "Erreur", f"Impossible de compacter le journal des décisions:\n{str(e)}")
+            return
+        if archive_path is None:
+            self.show_status_message("Journal des décisions déjà compact", 3000)
+        else:
+            self.show_status_message(f"Journal compacté, historique archivé: {os.path.basename(archive_path)}", 5000)
+    
     def load_recent_files_menu(self):
         """Charger le menu des fichiers récents"""
         self.update_recent_menu()
@@ -517,6 +638,8 @@ class CertificateurApp(QMainWindow):
     
     def load_recent_session(self, recent):
         """Charger une session récente"""
+        if session_existe(recent.get("session")) and self.open_saved_session(recent):
+            return
         try:
             # Vérifier que les fichiers existent
             missing_files = []
@@ -539,25 +662,68 @@ class CertificateurApp(QMainWindow):
                 return
             
             # Charger la session
-            self.loading_page.cert_input.setText(recent["certificateur"])
-            self.rh_paths = recent["rh_files"]
-            self.ext_path = recent["ext_file"]
-            self.template_path = recent["template_file"]
-            
-            # Mettre à jour l'affichage
-            self.loading_page.update_rh_display()
-            self.loading_page.ext_label.setText(f"📄 {os.path.basename(self.ext_path)}")
-            self.loading_page.ext_valid_label.setText("✓")
-            self.loading_page.ext_valid_label.setStyleSheet("color: #4caf50; font-weight: bold; font-size: 16px;")
-            self.loading_page.template_label.setText(f"📋 {os.path.basename(self.template_path)}")
-            self.loading_page.template_valid_label.setText("✓")
-            self.loading_page.template_valid_label.setStyleSheet("color: #4caf50; font-weight: bold; font-size: 16px;")
-            
-            self.loading_page.check_can_process()
+            self.show_session_files(recent)
             self.show_status_message("Session récente chargée", 3000)
             
         except Exception as e:
             show_error_message(self, "Erreur", f"Impossible de charger la session:\n{str(e)}")
+    
+    def show_session_files(self, recent):
+        """Reprendre les fichiers d'une session dans la page de chargement"""
+        self.loading_page.cert_input.setText(recent["certificateur"])
+        self.rh_paths = recent["rh_files"]
+        self.ext_path = recent["ext_file"]
+        self.template_path = recent["template_file"]
+        
+        # Mettre à jour l'affichage
+        self.loading_page.update_rh_display()
+        self.loading_page.ext_label.setText(f"📄 {os.path.basename(self.ext_path)}")
+        self.loading_page.ext_valid_label.setText("✓")
+        self.loading_page.ext_valid_label.setStyleSheet("color: #4caf50; font-weight: bold; font-size: 16px;")
+        self.loading_page.template_label.setText(f"📋 {os.path.basename(self.template_path)}")
+        self.loading_page.template_valid_label.setText("✓")
+        self.loading_page.template_valid_label.setStyleSheet("color: #4caf50; font-weight: bold; font-size: 16px;")
+        
+        self.loading_page.check_can_process()
+    
+    def open_saved_session(self, recent):
+        """
+        Rouvrir une session depuis son instantané, sans relire les fichiers
+        
+        Returns:
+            bool: False si l'instantané est illisible (autre utilisateur, fichier
+                corrompu) : la session est alors rechargée depuis ses fichiers
+        """
+        if self.processing_thread is not None and self.processing_thread.isRunning():
+            return False
+        try:
+            ext_df, meta = charger_session(recent["session"])
+        except Exception as e:
+            print(f"Instantané de session illisible: {e}")
+            return False
+        
+        # Décisions de la session quittée conservées avant de changer de session
+        self.autosave_session()
+        
+        # Décisions journalisées depuis la dernière sauvegarde de l'instantané
+        try:
+            decision_journal.ouvrir(recent["session"])
+            decision_journal.rejouer(ext_df)
+        except (OSError, ValueError) as e:
+            print(f"Journal des décisions illisible: {e}")
+        self.validation_page.reset_page()
+        self.report_page.reset_page()
+        
+        self.show_session_files(meta)
+        self.certificateur = meta["certificateur"]
+        self.session_id = recent["session"]
+        self.ext_df = ext_df
+        self.validation_page.pending_cursor = meta["curseur"]
+        
+        self.anomalies_page.update_page(ext_df)
+        self.go_to_step(1)
+        self.show_status_message("Session récente rouverte", 3000)
+        return True
 
     def logout(self):
         """Déconnecter l'utilisateur"""
@@ -570,6 +736,10 @@ class CertificateurApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            # Écrire les ajouts en attente avec la clé de l'utilisateur courant
+            whitelist_writer.flush()
+            self.autosave_session()
+            decision_journal.fermer()
             auth_manager.logout()
             
             # Masquer la fenêtre principale
@@ -585,6 +755,14 @@ class CertificateurApp(QMainWindow):
             "Voulez-vous vraiment quitter ? Les modifications non sauvegardées seront perdues."
         )
         if reply == QMessageBox.StandardButton.Yes:
+            # Arrêter les traitements en cours avant de fermer
+            self.cancel_processing()
+            self.report_page.cancel_report()
+            for thread in self.cancelled_threads + self.report_page.cancelled_threads:
+                thread.wait()
+            whitelist_writer.flush()
+            self.autosave_session()
+            decision_journal.fermer()
             event.accept()
         else:
             event.ignore()
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Package models pour les modèles de données des vues Qt
+"""
+
+from .anomalies_table_model import AnomaliesTableModel, TableColumn
+from .row_filter import RowFilter
+
+__all__ = ['AnomaliesTableModel', 'TableColumn', 'RowFilter']
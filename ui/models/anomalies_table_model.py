@@ -0,0 +1,179 @@
+"""
+Modèle de tableau des anomalies (QAbstractTableModel sur des tableaux de colonnes)
+
+Le tableau ne crée aucun item : chaque colonne est un instantané des valeurs
+du DataFrame (tableau numpy) et la vue ne demande à data() que le texte et
+les couleurs des lignes visibles à l'écran. Le tri et le filtrage permutent
+un tableau de positions, sans toucher aux colonnes.
+"""
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# Couleurs de mise en évidence d'une comparaison (valeurs différentes / identiques)
+COMPARAISON_DIFFERENT = ("#ff9999", "#330000")
+COMPARAISON_IDENTIQUE = "#99ff99"
+
+
+class TableColumn:
+    """Colonne affichée : valeurs brutes, mise en forme et couleurs par ligne"""
+
+    def __init__(self, title, values, formatter=str, color=None, colors=None, differences=None):
+        """
+        Args:
+            title: En-tête de la colonne
+            values: Valeurs brutes, une par ligne
+            formatter: Fonction valeur -> texte affiché
+            color: Couleur du texte de toute la colonne
+            colors: Couleur du texte de chaque ligne (None = couleur de la colonne)
+            differences: Booléens de comparaison ; si renseigné, la colonne est
+                mise en évidence (valeur différente / identique)
+        """
+        self.title = title
+        self.values = np.asarray(values, dtype=object)
+        self.formatter = formatter
+        self.color = color
+        self.colors = None if colors is None else np.asarray(colors, dtype=object)
+        self.differences = None if differences is None else np.asarray(differences, dtype=bool)
+        self._texts = None
+
+    def text(self, position):
+        return self.formatter(self.values[position])
+
+    def texts(self):
+        """Textes affichés de toutes les lignes (calculés au premier appel)"""
+        if self._texts is None:
+            self._texts = pd.Series(
+                [self.formatter(v) for v in self.values], dtype=object
+            )
+        return self._texts
+
+    def foreground(self, position):
+        if self.differences is not None:
+            return COMPARAISON_DIFFERENT[0] if self.differences[position] else COMPARAISON_IDENTIQUE
+        if self.colors is not None and self.colors[position] is not None:
+            return self.colors[position]
+        return self.color
+
+    def background(self, position):
+        if self.differences is not None and self.differences[position]:
+            return COMPARAISON_DIFFERENT[1]
+        return None
+
+    def sort_keys(self):
+        """Clés de tri : valeurs si la colonne est numérique, sinon textes affichés"""
+        valeurs = pd.Series(self.values).infer_objects()
+        if pd.api.types.is_numeric_dtype(valeurs) and not pd.api.types.is_bool_dtype(valeurs):
+            return valeurs.to_numpy(dtype=float)
+        return self.texts().to_numpy(dtype=str)
+
+
+class AnomaliesTableModel(QAbstractTableModel):
+    """Modèle en lecture seule d'un tableau de colonnes, trié et filtré par positions"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._columns = []
+        self._order = np.arange(0, dtype=np.intp)
+        self._mask = np.ones(0, dtype=bool)
+        self._rows = self._order
+        self._colors = {}
+
+    # --- Contenu ---------------------------------------------------------
+
+    def set_columns(self, columns):
+        """
+        Remplacer le contenu du tableau
+
+        Args:
+            columns: Liste de TableColumn de même longueur
+        """
+        self.beginResetModel()
+        self._columns = list(columns)
+        nb_lignes = len(self._columns[0].values) if self._columns else 0
+        self._order = np.arange(nb_lignes, dtype=np.intp)
+        self._mask = np.ones(nb_lignes, dtype=bool)
+        self._rows = self._order
+        self.endResetModel()
+
+    def clear(self):
+        """Vider le tableau"""
+        self.set_columns([])
+
+    def column(self, index):
+        """Colonne affichée en position index"""
+        return self._columns[index]
+
+    def source_row_count(self):
+        """Nombre total de lignes, filtrées ou non"""
+        return len(self._order)
+
+    def set_row_filter(self, mask):
+        """
+        Afficher seulement les lignes retenues
+
+        Args:
+            mask: Booléens par ligne de l'instantané (None = toutes les lignes)
+        """
+        self.beginResetModel()
+        self._mask = np.ones(len(self._order), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self._rows = self._order[self._mask[self._order]]
+        self.endResetModel()
+
+    # --- Interface QAbstractTableModel ------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            if 0 <= section < len(self._columns):
+                return self._columns[section].title
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self._columns[index.column()]
+        position = self._rows[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return column.text(position)
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._color(column.foreground(position))
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._color(column.background(position))
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if not 0 <= column < len(self._columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        keys = self._columns[column].sort_keys()
+        if order == Qt.SortOrder.DescendingOrder:
+            # Tri stable décroissant : les ex aequo gardent leur ordre d'origine
+            order_positions = len(keys) - 1 - np.argsort(keys[::-1], kind='stable')[::-1]
+        else:
+            order_positions = np.argsort(keys, kind='stable')
+        self._order = order_positions.astype(np.intp)
+        self._rows = self._order[self._mask[self._order]]
+        self.layoutChanged.emit()
+
+    def _color(self, name):
+        """QColor mémorisée par nom de couleur"""
+        if name is None:
+            return None
+        color = self._colors.get(name)
+        if color is None:
+            color = self._colors[name] = QColor(name)
+        return color
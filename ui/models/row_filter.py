@@ -0,0 +1,94 @@
+"""
+Filtrage vectorisé des lignes d'un tableau (recherche et catégories)
+
+Le texte de recherche de chaque ligne est calculé une fois, en minuscules,
+à la construction du filtre ; une frappe ne fait plus qu'un test de
+sous-chaîne par ligne, limité aux lignes déjà retenues quand la recherche
+prolonge la précédente. Les catégories (mots-clés) sont codées dans un
+masque de bits : filtrer par catégorie est un simple ET binaire.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class RowFilter:
+    """Texte de recherche en minuscules et masque de catégories de chaque ligne"""
+
+    def __init__(self, search_texts, category_texts=None, categories=None):
+        """
+        Args:
+            search_texts: Texte recherché de chaque ligne
+            category_texts: Texte dans lequel chercher les mots-clés des catégories
+            categories: Nom de catégorie -> mot-clé (8 catégories au plus)
+        """
+        self.search_texts = pd.Series(search_texts, dtype=object).str.lower().to_numpy(dtype=object)
+        self.bits = np.zeros(len(self.search_texts), dtype=np.uint8)
+        self._bit = {}
+
+        if categories:
+            if len(categories) > 8:
+                raise ValueError("8 catégories au plus dans un masque de bits")
+            textes = pd.Series(category_texts, dtype=object).str.lower()
+            for i, (nom, mot_cle) in enumerate(categories.items()):
+                bit = np.uint8(1 << i)
+                self._bit[nom] = bit
+                trouves = textes.str.contains(mot_cle, regex=False).to_numpy(dtype=bool)
+                self.bits[trouves] |= bit
+
+        self._derniere_recherche = ""
+        self._derniers_resultats = None
+
+    def __len__(self):
+        return len(self.search_texts)
+
+    def search(self, text):
+        """
+        Lignes dont le texte de recherche contient text (sans tenir compte de la casse)
+
+        Returns:
+            ndarray: Booléens par ligne (None si la recherche est vide)
+        """
+        text = text.lower()
+        if not text:
+            return None
+
+        if self._derniers_resultats is not None and text.startswith(self._derniere_recherche):
+            # Recherche prolongée : seules les lignes déjà retenues peuvent convenir
+            candidats = np.flatnonzero(self._derniers_resultats)
+        else:
+            candidats = np.arange(len(self.search_texts))
+
+        textes = self.search_texts[candidats]
+        trouves = np.fromiter((text in t for t in textes), dtype=bool, count=len(textes))
+        resultats = np.zeros(len(self.search_texts), dtype=bool)
+        resultats[candidats[trouves]] = True
+
+        self._derniere_recherche = text
+        self._derniers_resultats = resultats
+        return resultats
+
+    def category(self, name):
+        """
+        Lignes de la catégorie name
+
+        Returns:
+            ndarray: Booléens par ligne (None si la catégorie n'est pas filtrée)
+        """
+        bit = self._bit.get(name)
+        if bit is None:
+            return None
+        return (self.bits & bit) != 0
+
+    def mask(self, text="", category=None):
+        """
+        Lignes retenues par la recherche et la catégorie
+
+        Returns:
+            ndarray: Booléens par ligne (None si aucun filtre n'est actif)
+        """
+        masque = self.search(text)
+        par_categorie = self.category(category)
+        if par_categorie is not None:
+            masque = par_categorie if masque is None else masque & par_categorie
+        return masque
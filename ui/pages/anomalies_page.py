@@ -3,12 +3,18 @@ Page d'affichage des anomalies (Étape 2) - Version compacte et responsive
 Thème rouge bordeaux, noir et blanc
 """
 
+import numpy as np
+import pandas as pd
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QLabel, QTableWidget, QTableWidgetItem, QLineEdit, 
+                            QLabel, QTableView, QLineEdit, 
                             QComboBox, QHeaderView, QSizePolicy, QButtonGroup, QMessageBox, QFileDialog)
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
+from config.constants import CONFIG_PARAMS
+
+from ui.models.anomalies_table_model import AnomaliesTableModel, TableColumn
+from ui.models.row_filter import RowFilter
 from ui.widgets.stat_widget import StatWidget
 from core.anomalies import extraire_cas_a_verifier, extraire_cas_automatiques
 from core.report import generer_rapport
@@ -19,6 +25,26 @@ from mapping.directions_conservees import (
     ajouter_direction_valide, ajouter_variation_direction, ajouter_changement_direction
 )
 
+# Filtre par anomalie -> mot-clé cherché dans la colonne anomalie
+ANOMALY_FILTERS = {
+    "Non RH": "non rh",
+    "Profil": "profil",
+    "Direction": "direction",
+    "Inactif": "inactif"
+}
+
+
+def _valeurs(data, colonne, defaut='N/A'):
+    """Valeurs d'une colonne du DataFrame (defaut pour chaque ligne si absente)"""
+    if colonne in data.columns:
+        return data[colonne].to_numpy(dtype=object)
+    return np.full(len(data), defaut, dtype=object)
+
+
+def _format_inactivite(jours):
+    """Nombre de jours d'inactivité affiché ('12j')"""
+    return f"{jours:.0f}j" if isinstance(jours, (int, float)) else str(jours)
+
 
 class AnomaliesPage(QWidget):
     """Page d'affichage des anomalies - Version ultra-compacte avec thème rouge bordeaux"""
@@ -32,6 +58,7 @@ class AnomaliesPage(QWidget):
         self.current_view = "manual"  # manual, auto, validated
         self.df = None
         self.certificateur = None
+        self.row_filter = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -186,7 +213,12 @@ class AnomaliesPage(QWidget):
             }
             QLineEdit:focus { border: 2px solid #800020; }
         """)
-        self.search_input.textChanged.connect(self.filter_table)
+        # Filtrage différé : appliqué une fois la saisie terminée
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(CONFIG_PARAMS['display']['search_debounce_ms'])
+        self.search_timer.timeout.connect(self.filter_table)
+        self.search_input.textChanged.connect(self.search_timer.start)
         control_layout.addWidget(self.search_input)
         
         # Filtre par anomalie compact
@@ -260,9 +292,11 @@ class AnomaliesPage(QWidget):
     
     def create_single_table(self, parent_layout):
         """Tableau unique qui change de contenu selon le filtre"""
-        self.main_table = QTableWidget()
+        self.main_table = QTableView()
+        self.table_model = AnomaliesTableModel(self)
+        self.main_table.setModel(self.table_model)
         self.main_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #0d0d0d;
                 border: 1px solid #1a1a1a;
                 border-radius: 8px;
@@ -270,7 +304,7 @@ class AnomaliesPage(QWidget):
                 color: #fff;
                 alternate-background-color: #0a0a0a;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border: none;
                 border-bottom: 1px solid #1a1a1a;
@@ -289,7 +323,7 @@ class AnomaliesPage(QWidget):
         self.main_table.setAlternatingRowColors(True)
         self.main_table.setSortingEnabled(True)
         self.main_table.verticalHeader().setVisible(False)
-        self.main_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.main_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         
         parent_layout.addWidget(self.main_table)
     
@@ -362,120 +396,79 @@ class AnomaliesPage(QWidget):
             data = self.extraire_comptes_valides(self.ext_df)
             headers = ["Code", "Nom/Prénom", "Profil", "Direction"]
             self.fill_validated_data(data, headers)
+        
+        self.build_row_filter()
+        self.filter_table()
     
     def fill_manual_data(self, data, headers):
         """Remplir le tableau - Toujours afficher valeurs RH - Couleurs thème rouge"""
-        self.main_table.setRowCount(len(data))
-        self.main_table.setColumnCount(len(headers))
-        self.main_table.setHorizontalHeaderLabels(headers)
-        
-        for i, (idx, row) in enumerate(data.iterrows()):
-            self.main_table.setItem(i, 0, self.create_styled_item(str(row['code_utilisateur']), "#B22222"))
-            self.main_table.setItem(i, 1, self.create_styled_item(str(row['nom_prenom'])))
-            
-            # Anomalie avec indicateur visuel
-            anomalie_text = str(row['anomalie'])
-            if "harmonisé" in anomalie_text.lower():
-                # Jamais affiché dans cas manuels car auto-géré
-                pass
-            else:
-                self.main_table.setItem(i, 2, self.create_styled_item(anomalie_text, "#ff9900"))
-            
-            # Toujours afficher valeurs RH
-            self.main_table.setItem(i, 3, self.create_styled_item(str(row.get('profil_rh', 'N/A'))))
-            self.main_table.setItem(i, 4, self.create_styled_item(str(row.get('direction_rh', 'N/A'))))
-            
-            # Inactivité
-            jours = row.get('days_inactive', 'N/A')
-            jours_text = f"{jours:.0f}j" if isinstance(jours, (int, float)) else str(jours)
-            color = "#ff5555" if isinstance(jours, (int, float)) and jours > 120 else None
-            self.main_table.setItem(i, 5, self.create_styled_item(jours_text, color))
-        
+        anomalies = data['anomalie'].astype(str)
+        # Harmonisations jamais affichées dans cas manuels car auto-gérées
+        harmonisees = anomalies.str.lower().str.contains("harmonisé", regex=False).to_numpy()
+        
+        # Inactivité en rouge au-delà de 120 jours
+        jours = _valeurs(data, 'days_inactive')
+        numeriques = np.fromiter((isinstance(j, (int, float)) for j in jours), dtype=bool, count=len(jours))
+        inactifs = numeriques & (pd.to_numeric(pd.Series(jours), errors='coerce').to_numpy() > 120)
+        
+        self.table_model.set_columns([
+            TableColumn(headers[0], data['code_utilisateur'], color="#B22222"),
+            TableColumn(headers[1], data['nom_prenom']),
+            TableColumn(headers[2], np.where(harmonisees, "", anomalies.to_numpy(dtype=object)), color="#ff9900"),
+            TableColumn(headers[3], _valeurs(data, 'profil_rh')),
+            TableColumn(headers[4], _valeurs(data, 'direction_rh')),
+            TableColumn(headers[5], jours, formatter=_format_inactivite,
+                        colors=np.where(inactifs, "#ff5555", None)),
+        ])
         self.adjust_table_columns()
     
     def fill_auto_data(self, data, headers):
         """Remplir les cas automatiques avec distinction visuelle - Couleurs thème rouge"""
-        self.main_table.setRowCount(len(data))
-        self.main_table.setColumnCount(len(headers))
-        self.main_table.setHorizontalHeaderLabels(headers)
-        
-        for i, (idx, row) in enumerate(data.iterrows()):
-            self.main_table.setItem(i, 0, self.create_styled_item(str(row['code_utilisateur']), "#B22222"))
-            self.main_table.setItem(i, 1, self.create_styled_item(str(row['nom_prenom'])))
-            
-            # Type d'automatisation
-            anomalie = str(row['anomalie'])
-            if "harmonisé" in anomalie.lower():
-                type_text = "↻ Harmonisation"
-                color = "#4CAF50"
-            elif "non rh" in anomalie.lower():
-                type_text = "🚫 Non RH"
-                color = "#F44336"
-            elif "inactif" in anomalie.lower():
-                type_text = "💤 Inactivité"
-                color = "#A52A2A"  # Rouge bordeaux clair
-            else:
-                type_text = "✓ Validé"
-                color = "#800020"  # Rouge bordeaux
-            
-            self.main_table.setItem(i, 2, self.create_styled_item(type_text, color))
-            
-            # Valeurs RH
-            self.main_table.setItem(i, 3, self.create_styled_item(str(row.get('profil_rh', 'N/A'))))
-            self.main_table.setItem(i, 4, self.create_styled_item(str(row.get('direction_rh', 'N/A'))))
-            
-            # Décision
-            self.main_table.setItem(i, 5, self.create_styled_item(row.get('decision_manuelle', ''), "#00ff55"))
+        anomalies = data['anomalie'].astype(str).str.lower()
         
+        # Type d'automatisation (première correspondance, dans l'ordre)
+        conditions = [
+            anomalies.str.contains("harmonisé", regex=False).to_numpy(dtype=bool),
+            anomalies.str.contains("non rh", regex=False).to_numpy(dtype=bool),
+            anomalies.str.contains("inactif", regex=False).to_numpy(dtype=bool),
+        ]
+        types = np.select(conditions, ["↻ Harmonisation", "🚫 Non RH", "💤 Inactivité"], "✓ Validé")
+        couleurs = np.select(conditions, ["#4CAF50", "#F44336", "#A52A2A"], "#800020")
+        
+        self.table_model.set_columns([
+            TableColumn(headers[0], data['code_utilisateur'], color="#B22222"),
+            TableColumn(headers[1], data['nom_prenom']),
+            TableColumn(headers[2], types.astype(object), colors=couleurs.astype(object)),
+            TableColumn(headers[3], _valeurs(data, 'profil_rh')),
+            TableColumn(headers[4], _valeurs(data, 'direction_rh')),
+            TableColumn(headers[5], _valeurs(data, 'decision_manuelle', ''), color="#00ff55"),
+        ])
         self.adjust_table_columns()
     
     def fill_validated_data(self, data, headers):
         """Remplir avec les données validées"""
-        self.main_table.setRowCount(len(data))
-        self.main_table.setColumnCount(len(headers))
-        self.main_table.setHorizontalHeaderLabels(headers)
-        
-        for i, (idx, row) in enumerate(data.iterrows()):
-            self.main_table.setItem(i, 0, self.create_styled_item(str(row['code_utilisateur']), "#B22222"))
-            self.main_table.setItem(i, 1, self.create_styled_item(str(row['nom_prenom'])))
-            self.main_table.setItem(i, 2, self.create_styled_item(str(row.get('profil', 'N/A'))))
-            self.main_table.setItem(i, 3, self.create_styled_item(str(row.get('direction', 'N/A'))))
-        
+        self.table_model.set_columns([
+            TableColumn(headers[0], data['code_utilisateur'], color="#B22222"),
+            TableColumn(headers[1], data['nom_prenom']),
+            TableColumn(headers[2], _valeurs(data, 'profil')),
+            TableColumn(headers[3], _valeurs(data, 'direction')),
+        ])
         self.adjust_table_columns()
     
-    def create_styled_item(self, text, color=None):
-        """Créer un item stylé"""
-        item = QTableWidgetItem(text)
-        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        if color:
-            item.setForeground(QColor(color))
-        return item
-    
-    def create_comparison_item(self, text, is_different):
-        """Créer un item de comparaison"""
-        item = QTableWidgetItem(text)
-        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        if is_different:
-            item.setBackground(QColor("#330000"))
-            item.setForeground(QColor("#ff9999"))
-        else:
-            item.setForeground(QColor("#99ff99"))
-        
-        return item
-    
     def adjust_table_columns(self):
         """Ajuster les colonnes de manière responsive"""
         header = self.main_table.horizontalHeader()
         
+        nb_colonnes = self.table_model.columnCount()
+        
         # Colonnes fixes pour les codes et noms
-        if self.main_table.columnCount() > 0:
+        if nb_colonnes > 0:
             header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        if self.main_table.columnCount() > 1:
+        if nb_colonnes > 1:
             header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
         
         # Autres colonnes en mode stretch
-        for i in range(2, self.main_table.columnCount()):
+        for i in range(2, nb_colonnes):
             header.setSectionResizeMode(i, QHeaderView.ResizeMode.Stretch)
     
     def update_page(self, ext_df):
@@ -520,42 +513,30 @@ class AnomaliesPage(QWidget):
             (ext_df['anomalie'].isna())
         ]
     
+    def build_row_filter(self):
+        """Précalculer le texte de recherche et les catégories d'anomalie des lignes"""
+        model = self.table_model
+        nb_colonnes = model.columnCount()
+        if nb_colonnes == 0:
+            self.row_filter = None
+            return
+        
+        # Recherche dans les 3 premières colonnes
+        row_text = model.column(0).texts()
+        for col in range(1, min(3, nb_colonnes)):
+            row_text = row_text + " " + model.column(col).texts()
+        
+        # Catégories d'anomalie (colonne anomalie)
+        anomaly_text = model.column(2).texts() if nb_colonnes > 2 else None
+        self.row_filter = RowFilter(row_text, anomaly_text, ANOMALY_FILTERS if nb_colonnes > 2 else None)
+    
     def filter_table(self):
         """Filtrer le tableau selon la recherche et le filtre"""
-        search_text = self.search_input.text().lower()
-        anomaly_filter = self.anomaly_filter.currentText()
-        
-        # Implémentation basique du filtrage
-        for row in range(self.main_table.rowCount()):
-            show_row = True
-            
-            # Filtre par recherche
-            if search_text:
-                row_text = ""
-                for col in range(min(3, self.main_table.columnCount())):  # Chercher dans les 3 premières colonnes
-                    item = self.main_table.item(row, col)
-                    if item:
-                        row_text += item.text().lower() + " "
-                
-                if search_text not in row_text:
-                    show_row = False
-            
-            # Filtre par type d'anomalie
-            if show_row and anomaly_filter != "Toutes" and self.main_table.columnCount() > 2:
-                anomaly_item = self.main_table.item(row, 2)  # Colonne anomalie
-                if anomaly_item:
-                    anomaly_text = anomaly_item.text()
-                    filter_map = {
-                        "Non RH": "non rh",
-                        "Profil": "profil",
-                        "Direction": "direction",
-                        "Inactif": "inactif"
-                    }
-                    if anomaly_filter in filter_map:
-                        if filter_map[anomaly_filter] not in anomaly_text.lower():
-                            show_row = False
-            
-            self.main_table.setRowHidden(row, not show_row)
+        self.search_timer.stop()
+        if self.row_filter is None:
+            return
+        masque = self.row_filter.mask(self.search_input.text(), self.anomaly_filter.currentText())
+        self.table_model.set_row_filter(masque)
     
     def update_info_message(self):
         """Mettre à jour le message d'information selon la vue"""
@@ -571,8 +552,9 @@ class AnomaliesPage(QWidget):
             del self.cas_a_verifier
         
         # Vider le tableau
-        self.main_table.setRowCount(0)
-        self.main_table.setColumnCount(0)
+        self.search_timer.stop()
+        self.row_filter = None
+        self.table_model.clear()
         
         # Réinitialiser les statistiques
         self.stat_total.setText("0")
@@ -248,6 +248,16 @@ class LoadingPage(QWidget):
         self.progress_bar.setVisible(False)
         progress_layout.addWidget(self.progress_bar)
         
+        # Annulation du traitement en cours
+        cancel_layout = QHBoxLayout()
+        cancel_layout.addStretch()
+        self.cancel_button = QPushButton("✖ Annuler")
+        self.cancel_button.clicked.connect(self.parent_window.cancel_processing)
+        self.cancel_button.setVisible(False)
+        cancel_layout.addWidget(self.cancel_button)
+        cancel_layout.addStretch()
+        progress_layout.addLayout(cancel_layout)
+        
         parent_layout.addWidget(progress_widget)
     
     def select_rh_files(self):
@@ -400,6 +410,7 @@ class LoadingPage(QWidget):
         self.help_message.setVisible(False)
         self.progress_bar.setVisible(False)
         self.progress_label.setVisible(False)
+        self.cancel_button.setVisible(False)
         
         # Vérifier si on peut activer le bouton
         self.check_can_process()
\ No newline at end of file
@@ -6,14 +6,16 @@ import os
 from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QLabel, QGroupBox, QTableWidget, QTableWidgetItem,
-                            QFileDialog, QHeaderView, QSizePolicy)
+                            QFileDialog, QHeaderView, QSizePolicy, QProgressBar)
 from PyQt6.QtGui import QFont
 
 from ui.widgets.stat_widget import StatWidget
 from ui.styles import SUCCESS_MESSAGE_STYLE, WARNING_MESSAGE_STYLE
-from ui.utils import (set_decision_columns, get_last_directory, 
-                     show_info_message, show_error_message, open_file_with_system)
-from core.report import inject_to_template
+from ui.utils import (get_last_directory, show_info_message, show_error_message,
+                     open_file_with_system)
+from ui.threads.report_thread import ReportThread
+from core.export import formats_disponibles, FORMATS_EXPORT
+from core.progress import formater_duree
 from core.anomalies import extraire_cas_a_verifier
 from PyQt6.QtCore import Qt, pyqtSignal
 
@@ -24,6 +26,9 @@ class ReportPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_window = parent
+        self.report_thread = None
+        # Exports annulés encore en cours d'arrêt (gardés jusqu'à leur fin)
+        self.cancelled_threads = []
         # Permettre le redimensionnement
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.setup_ui()
@@ -110,6 +115,17 @@ class ReportPage(QWidget):
         self.generate_button.setMinimumWidth(200)
         button_layout.addWidget(self.generate_button)
         
+        # Progression de l'export et annulation
+        self.report_progress = QProgressBar()
+        self.report_progress.setRange(0, 1000)
+        self.report_progress.setVisible(False)
+        button_layout.addWidget(self.report_progress)
+        
+        self.cancel_report_button = QPushButton("✖ Annuler")
+        self.cancel_report_button.clicked.connect(self.cancel_report)
+        self.cancel_report_button.setVisible(False)
+        button_layout.addWidget(self.cancel_report_button)
+        
         button_layout.addStretch()
         
         self.new_button = QPushButton("🔄 Nouvelle certification")
@@ -220,58 +236,96 @@ class ReportPage(QWidget):
         if not output_path:
             return
         
-        try:
-            # Animation du bouton
-            self.set_button_processing_state(True)
-            
-            # Préparer et générer le rapport
-            self.create_and_save_report(output_path)
-            
-            # Restaurer le bouton
-            self.set_button_processing_state(False)
-            
-            # Message de succès avec option d'ouvrir
-            self.show_success_message(output_path)
-            
-        except Exception as e:
-            self.set_button_processing_state(False)
-            show_error_message(
-                self,
-                "Erreur",
-                f"Erreur lors de la génération du rapport:\n{str(e)}"
-            )
+        # Animation du bouton
+        self.set_button_processing_state(True)
+        
+        # Préparer et générer le rapport en arrière-plan
+        self.create_and_save_report(output_path)
     
     def get_output_path(self):
         """Demander le chemin de sauvegarde"""
         default_filename = f"rapport_certification_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         default_path = os.path.join(get_last_directory(self.parent_window.settings), default_filename)
         
-        output_path, _ = QFileDialog.getSaveFileName(
+        formats = formats_disponibles()
+        output_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Enregistrer le rapport",
             default_path,
-            "Fichiers Excel (*.xlsx)"
+            ";;".join(FORMATS_EXPORT[fmt] for fmt in formats)
         )
         
+        # Extension du format choisi si l'utilisateur ne l'a pas saisie
+        if output_path and not os.path.splitext(output_path)[1]:
+            fmt = next((f for f in formats if FORMATS_EXPORT[f] == selected_filter), 'xlsx')
+            output_path += f".{fmt}"
+        
         return output_path
     
     def create_and_save_report(self, output_path):
-        """Créer et sauvegarder le rapport"""
-        # Préparer les données
-        df_rapport = self.ext_df.copy()
-        df_rapport = set_decision_columns(df_rapport, self.parent_window.certificateur)
-        
-        # Générer le rapport
-        inject_to_template(
-            df_rapport, 
-            self.parent_window.template_path, 
+        """Lancer la création et l'enregistrement du rapport dans un thread"""
+        self.cancelled_threads = [t for t in self.cancelled_threads if t.isRunning()]
+        # Copie prise dans le thread de l'interface : le thread d'export ne lit
+        # jamais l'extraction que la page de validation peut encore modifier
+        self.report_thread = ReportThread(
+            self.ext_df.copy(),
             output_path,
-            certificateur=self.parent_window.certificateur
+            self.parent_window.template_path,
+            self.parent_window.certificateur
+        )
+        self.report_thread.progress_value.connect(self.update_report_progress)
+        self.report_thread.finished.connect(self.report_finished)
+        self.report_thread.error.connect(self.report_error)
+        self.report_thread.start()
+    
+    def update_report_progress(self, ecrites, total, avancement, restant):
+        """Mettre à jour la progression de l'export"""
+        self.report_progress.setValue(int(avancement * 1000))
+        message = f"📝 Rapport : {ecrites:,}/{total:,} lignes – {avancement:.0%}".replace(",", " ")
+        if restant >= 0:
+            message += f" – reste ~{formater_duree(restant)}"
+        self.parent_window.show_status_message(message, 0)
+    
+    def report_finished(self, output_path):
+        """Rapport écrit : message de succès avec option d'ouvrir"""
+        if self.sender() in self.cancelled_threads:
+            return
+        self.report_thread = None
+        self.set_button_processing_state(False)
+        self.parent_window.show_status_message("✅ Rapport généré", 3000)
+        self.show_success_message(output_path)
+    
+    def report_error(self, error_message):
+        """Erreur lors de l'écriture du rapport"""
+        if self.sender() in self.cancelled_threads:
+            return
+        self.report_thread = None
+        self.set_button_processing_state(False)
+        show_error_message(
+            self,
+            "Erreur",
+            f"Erreur lors de la génération du rapport:\n{error_message}"
         )
     
+    def cancel_report(self):
+        """Annuler l'export en cours (aucun fichier n'est laissé)"""
+        thread = self.report_thread
+        if thread is None or not thread.isRunning():
+            return
+        thread.cancel()
+        for signal in (thread.progress_value, thread.finished, thread.error):
+            signal.disconnect()
+        self.cancelled_threads.append(thread)
+        self.report_thread = None
+        self.set_button_processing_state(False)
+        self.parent_window.show_status_message("⏹️ Génération du rapport annulée", 3000)
+    
     def set_button_processing_state(self, is_processing):
         """Configurer l'état du bouton selon le traitement"""
+        self.report_progress.setVisible(is_processing)
+        self.cancel_report_button.setVisible(is_processing)
         if is_processing:
+            self.report_progress.setValue(0)
             self.generate_button.setText("⏳ Génération en cours...")
             self.generate_button.setEnabled(False)
         else:
@@ -291,6 +345,9 @@ class ReportPage(QWidget):
     
     def reset_page(self):
         """Réinitialiser la page"""
+        # Abandonner un export en cours
+        self.cancel_report()
+        
         # Réinitialiser le message
         self.report_message.setText("")
         
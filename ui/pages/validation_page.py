@@ -11,7 +11,9 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt6.QtGui import QFont, QColor
 from PyQt6.QtCore import Qt, pyqtSignal
 
-from core.anomalies import extraire_cas_a_verifier
+from core.review_queue import ReviewQueue
+from core.session_store import SESSION_AUTOSAVE_BATCH
+from core.decision_journal import decision_journal
 from mapping.profils_valides import (
     ajouter_profil_valide, ajouter_variation_profil, ajouter_changement_profil
 )
@@ -30,7 +32,10 @@ class ValidationPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_window = parent
-        self.current_cas_index = 0
+        self.review_queue = None
+        # Cas à réafficher à la réouverture d'une session (position iloc)
+        self.pending_cursor = None
+        self.decisions_since_save = 0
         self.df = None
         self.certificateur = None
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -696,29 +701,33 @@ class ValidationPage(QWidget):
     def show_current_case(self, ext_df):
         """Afficher le cas en cours de validation"""
         self.ext_df = ext_df
-        self.cas_a_verifier = extraire_cas_a_verifier(ext_df)
         
-        if len(self.cas_a_verifier) == 0:
+        # File construite une fois par extraction (les décisions restent dans ext_df)
+        if self.review_queue is None or self.review_queue.df is not ext_df:
+            self.review_queue = ReviewQueue(ext_df)
+            self.decisions_since_save = 0
+        if self.pending_cursor is not None:
+            self.review_queue.seek(self.pending_cursor)
+            self.pending_cursor = None
+        
+        if len(self.review_queue) == 0:
             self.show_completion_message()
             return
         
-        if self.current_cas_index >= len(self.cas_a_verifier):
-            self.current_cas_index = 0
-        
         self.display_case()
     
     def display_case(self):
         """Afficher les informations du cas actuel"""
         # Compteur et progression
-        total_cases = len(self.cas_a_verifier)
-        self.validation_counter.setText(f"Cas {self.current_cas_index + 1} sur {total_cases}")
+        total_cases = len(self.review_queue)
+        rank = self.review_queue.rank
+        self.validation_counter.setText(f"Cas {rank + 1} sur {total_cases}")
         
-        progress = ((self.current_cas_index) / total_cases) * 100 if total_cases > 0 else 0
+        progress = (rank / total_cases) * 100 if total_cases > 0 else 0
         self.validation_progress.setValue(int(progress))
         
         # Récupérer le cas actuel
-        cas_idx = self.cas_a_verifier.index[self.current_cas_index]
-        cas = self.cas_a_verifier.loc[cas_idx]
+        cas = self.ext_df.iloc[self.review_queue.current()]
         
         # S'assurer que les cards sont visibles
         self.anomaly_card.setVisible(True)
@@ -760,14 +769,13 @@ class ValidationPage(QWidget):
     
     def validate_decision(self):
         """Valider la décision pour le cas en cours"""
-        if len(self.cas_a_verifier) == 0:
+        if self.review_queue is None or len(self.review_queue) == 0:
             return
         
         decision = self.get_selected_decision()
-        cas_idx = self.cas_a_verifier.index[self.current_cas_index]
-        cas = self.cas_a_verifier.loc[cas_idx]
+        cas = self.ext_df.iloc[self.review_queue.current()]
         
-        self.save_decision(cas_idx, decision, cas)
+        self.save_decision(cas.name, decision, cas)
         self.parent_window.show_status_message(f"✅ Décision '{decision}' enregistrée", 2000)
         self.proceed_to_next_case()
     
@@ -789,6 +797,9 @@ class ValidationPage(QWidget):
         if comment:
             self.ext_df.loc[cas_idx, 'comment_certificateur'] = comment
         
+        decision_journal.enregistrer(cas.get('code_utilisateur', cas_idx), decision, comment,
+                                     self.parent_window.certificateur)
+        
         if decision in ["Modifier", "Conserver"]:
             self.add_to_whitelists(cas, decision)
     
@@ -810,20 +821,26 @@ class ValidationPage(QWidget):
     
     def proceed_to_next_case(self):
         """Passer au cas suivant ou afficher la fin"""
-        self.cas_a_verifier = extraire_cas_a_verifier(self.ext_df)
+        self.review_queue.decide()
         
-        if len(self.cas_a_verifier) > 0:
-            self.current_cas_index = 0
+        # Sauvegarde de la session par lots de décisions (et à la dernière)
+        self.decisions_since_save += 1
+        if self.decisions_since_save >= SESSION_AUTOSAVE_BATCH or len(self.review_queue) == 0:
+            self.parent_window.autosave_session()
+            self.decisions_since_save = 0
+        
+        if len(self.review_queue) > 0:
             self.display_case()
         else:
             self.show_completion_message()
     
     def skip_case(self):
         """Passer au cas suivant sans décision"""
-        self.current_cas_index += 1
-        if self.current_cas_index >= len(self.cas_a_verifier):
-            self.current_cas_index = 0
-        self.display_case()
+        self.review_queue.skip()
+        if len(self.review_queue) > 0:
+            self.display_case()
+        else:
+            self.show_completion_message()
     
     def show_completion_message(self):
         """Afficher le message de fin de validation"""
@@ -859,13 +876,12 @@ class ValidationPage(QWidget):
     
     def reset_page(self):
         """Réinitialiser la page"""
-        self.current_cas_index = 0
-        
         # Réinitialiser les données
         if hasattr(self, 'ext_df'):
             self.ext_df = None
-        if hasattr(self, 'cas_a_verifier'):
-            self.cas_a_verifier = None
+        self.review_queue = None
+        self.pending_cursor = None
+        self.decisions_since_save = 0
         
         # Réinitialiser l'interface
         self.validation_counter.setText("")
@@ -3,5 +3,6 @@ Package threads pour les tâches en arrière-plan
 """
 
 from .processing_thread import ProcessingThread
+from .report_thread import ReportThread
 
-__all__ = ['ProcessingThread']
\ No newline at end of file
+__all__ = ['ProcessingThread', 'ReportThread']
\ No newline at end of file
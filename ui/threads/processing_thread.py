@@ -9,40 +9,98 @@ from core.rh_utils import charger_et_preparer_rh
 from core.ext_utils import charger_et_preparer_ext
 from core.match_utils import associer_rh_aux_utilisateurs
 from core.anomalies import detecter_anomalies
+from core.progress import CancellationToken, SuiviProgression, TraitementAnnule
 from security.encryption import encryption_manager
+from mapping.whitelist_writer import whitelist_writer
+from mapping.whitelist_repository import invalidate_all as invalider_listes_blanches
+
+# Étapes du traitement et poids relatifs dans la barre de progression
+ETAPES_TRAITEMENT = [
+    ('rh', 25),
+    ('extraction', 25),
+    ('association', 20),
+    ('anomalies', 30),
+]
+
+# Libellé affiché et unité comptée pour chaque étape
+LIBELLES_ETAPES = {
+    'rh': ("Chargement des fichiers RH...", "fichiers"),
+    'extraction': ("Chargement du fichier d'extraction...", "fichier"),
+    'association': ("Association des données RH...", "lignes"),
+    'anomalies': ("Détection des anomalies...", "lignes"),
+}
 
 
 class ProcessingThread(QThread):
     """Thread pour le traitement des données"""
-    
+
     progress = pyqtSignal(str)
+    # Étape, éléments traités, total de l'étape, avancement global (0-1), secondes restantes (-1 inconnu)
+    progress_value = pyqtSignal(str, int, int, float, float)
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
-    
+    cancelled = pyqtSignal()
+
     def __init__(self, rh_paths, ext_path, certificateur):
         super().__init__()
         self.rh_paths = rh_paths
         self.ext_path = ext_path
         self.certificateur = certificateur
-    
+        self.token = CancellationToken()
+
+    def cancel(self):
+        """Demander l'arrêt du traitement (pris en compte au bloc suivant)"""
+        self.token.cancel()
+
+    def emettre_progression(self, etape, traites, total, avancement, restant):
+        """Relayer l'avancement d'une étape vers l'interface"""
+        self.progress_value.emit(etape, traites, total, avancement, -1.0 if restant is None else restant)
+
     def run(self):
         """Exécuter le traitement des données"""
+        suivi = SuiviProgression(ETAPES_TRAITEMENT, self.emettre_progression, self.token)
         try:
             encryption_manager.initialize(self.certificateur)
-            self.progress.emit("Chargement des fichiers RH...")
-            rh_df = charger_et_preparer_rh(self.rh_paths)
-            
-            self.progress.emit("Chargement du fichier d'extraction...")
-            ext_df = charger_et_preparer_ext(self.ext_path)
-            
-            self.progress.emit("Association des données RH...")
-            ext_df = associer_rh_aux_utilisateurs(ext_df, rh_df)
-            
-            self.progress.emit("Détection des anomalies...")
-            ext_df = detecter_anomalies(ext_df, certificateur=self.certificateur)
-            
+            # Ajouts antérieurs écrits : seuls ceux de ce traitement restent en attente
+            whitelist_writer.flush()
+            fichiers_rh = list(dict.fromkeys(self.rh_paths))
+            fichiers_lus = 0
+
+            def fichier_rh_lu(message):
+                # Durée (ou erreur) de chaque fichier RH affichée au fil de l'eau
+                nonlocal fichiers_lus
+                fichiers_lus += 1
+                self.progress.emit(message)
+                suivi.avancer(fichiers_lus, len(fichiers_rh))
+
+            self.progress.emit(LIBELLES_ETAPES['rh'][0])
+            suivi.demarrer('rh', len(fichiers_rh))
+            rh_df = charger_et_preparer_rh(self.rh_paths, progress_callback=fichier_rh_lu)
+
+            self.progress.emit(LIBELLES_ETAPES['extraction'][0])
+            suivi.demarrer('extraction', 1)
+            ext_df = charger_et_preparer_ext(self.ext_path, token=self.token)
+            suivi.avancer(1, 1)
+
+            self.progress.emit(LIBELLES_ETAPES['association'][0])
+            suivi.demarrer('association', len(ext_df))
+            ext_df = associer_rh_aux_utilisateurs(ext_df, rh_df, progress_callback=suivi.avancer)
+            del rh_df
+
+            self.progress.emit(LIBELLES_ETAPES['anomalies'][0])
+            suivi.demarrer('anomalies', len(ext_df))
+            ext_df = detecter_anomalies(ext_df, certificateur=self.certificateur,
+                                        progress_callback=suivi.avancer)
+
             self.progress.emit("Traitement terminé!")
             self.finished.emit(ext_df)
-            
+
+        except TraitementAnnule:
+            # Variations harmonisées de la détection interrompue abandonnées
+            # (fichiers et index en mémoire), données intermédiaires libérées
+            # avec le cadre de run()
+            whitelist_writer.discard()
+            invalider_listes_blanches()
+            self.cancelled.emit()
         except Exception as e:
-            self.error.emit(str(e))
\ No newline at end of file
+            self.error.emit(str(e))
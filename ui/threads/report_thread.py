@@ -0,0 +1,59 @@
+"""
+Thread pour la génération du rapport en arrière-plan
+"""
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.export import exporter_rapport
+from core.progress import CancellationToken, SuiviProgression, TraitementAnnule
+from ui.utils import set_decision_columns
+
+
+class ReportThread(QThread):
+    """Thread pour l'export du rapport (Excel, CSV ou Parquet)"""
+
+    # Lignes écrites, total, avancement (0-1), secondes restantes (-1 inconnu)
+    progress_value = pyqtSignal(int, int, float, float)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, ext_df, output_path, template_path, certificateur):
+        super().__init__()
+        # Copie de l'extraction propre au thread, prise par la page avant start()
+        self.ext_df = ext_df
+        self.output_path = output_path
+        self.template_path = template_path
+        self.certificateur = certificateur
+        self.token = CancellationToken()
+
+    def cancel(self):
+        """Demander l'arrêt de l'export (pris en compte au bloc de lignes suivant)"""
+        self.token.cancel()
+
+    def emettre_progression(self, _etape, ecrites, total, avancement, restant):
+        """Relayer l'avancement de l'écriture vers l'interface"""
+        self.progress_value.emit(ecrites, total, avancement, -1.0 if restant is None else restant)
+
+    def run(self):
+        """Préparer et écrire le rapport"""
+        suivi = SuiviProgression([('rapport', 1)], self.emettre_progression, self.token)
+        try:
+            # Préparer les données (ext_df est déjà une copie propre au thread)
+            df_rapport = set_decision_columns(self.ext_df, self.certificateur)
+            suivi.demarrer('rapport', len(df_rapport))
+
+            # Générer le rapport (template Excel, CSV ou Parquet selon l'extension)
+            exporter_rapport(
+                df_rapport,
+                self.output_path,
+                template_path=self.template_path,
+                certificateur=self.certificateur,
+                progress_callback=suivi.avancer
+            )
+            self.finished.emit(self.output_path)
+
+        except TraitementAnnule:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
@@ -83,13 +83,20 @@ def save_last_directory(settings, file_path):
     settings.setValue("last_directory", os.path.dirname(file_path))
 
 
-def save_recent_files(settings, rh_paths, ext_path, template_path, certificateur):
-    """Sauvegarder les fichiers récents"""
+def save_recent_files(settings, rh_paths, ext_path, template_path, certificateur, session_id=None):
+    """
+    Sauvegarder les fichiers récents
+
+    Args:
+        session_id: Instantané de la session (core.session_store) rouvert
+            depuis le menu Récents sans retraiter les fichiers
+    """
     recent = {
         "rh_files": rh_paths,
         "ext_file": ext_path,
         "template_file": template_path,
         "certificateur": certificateur,
+        "session": session_id,
         "date": datetime.now().isoformat()
     }
     